@@ -9,8 +9,9 @@ import secrets
 import typing  # this can go away when Python 3.8 support is dropped
 from argparse import Namespace
 from collections import Counter, deque
-from collections.abc import Collection, MutableSequence
+from collections.abc import Collection, KeysView, MutableSequence
 from enum import IntEnum, IntFlag
+from operator import methodcaller
 from typing import (AbstractSet, Any, Callable, ClassVar, Dict, Iterable, Iterator, List, Mapping, NamedTuple,
                     Optional, Protocol, Set, Tuple, Union, Type)
 
@@ -68,6 +69,10 @@ class MultiWorld():
     is_race: bool = False
     precollected_items: Dict[int, List[Item]]
     state: CollectionState
+    sphere_analysis: Optional[SphereAnalysis]
+    """set by analyze_spheres, see get_sphere_analysis"""
+    placement_count: int
+    """increased whenever an item is placed on or taken from a location, or precollected; see get_sphere_analysis"""
 
     plando_options: PlandoOptions
     early_items: Dict[int, Dict[str, int]]
@@ -157,6 +162,8 @@ class MultiWorld():
         self.customitemarray = []
         self.shuffle_ganon = True
         self.spoiler = Spoiler(self)
+        self.sphere_analysis = None
+        self.placement_count = 0
         self.early_items = {player: {} for player in self.player_ids}
         self.local_early_items = {player: {} for player in self.player_ids}
         self.indirect_connections = {}
@@ -477,6 +484,7 @@ class MultiWorld():
 
     def push_precollected(self, item: Item):
         self.precollected_items[item.player].append(item)
+        self.placement_count += 1
         self.state.collect(item, True)
 
     def push_item(self, location: Location, item: Item, collect: bool = True):
@@ -552,6 +560,9 @@ class MultiWorld():
                 return True
             state = starting_state.copy()
         else:
+            sphere_analysis = self.get_sphere_analysis()
+            if sphere_analysis:
+                return sphere_analysis.beatable
             state = CollectionState(self)
             if self.has_beaten_game(state):
                 return True
@@ -587,6 +598,11 @@ class MultiWorld():
         locations is followed by an empty set, and then a set of all of the
         unreachable locations.
         """
+        sphere_analysis = self.get_sphere_analysis()
+        if sphere_analysis:
+            yield from sphere_analysis.get_spheres()
+            return
+
         state = CollectionState(self)
         locations = set(self.get_filled_locations())
 
@@ -609,6 +625,9 @@ class MultiWorld():
     def fulfills_accessibility(self, state: Optional[CollectionState] = None):
         """Check if accessibility rules are fulfilled with current or supplied state."""
         if not state:
+            sphere_analysis = self.get_sphere_analysis()
+            if sphere_analysis:
+                return sphere_analysis.fulfills_accessibility()
             state = CollectionState(self)
         players: Dict[str, Set[int]] = {
             "minimal": set(),
@@ -663,12 +682,252 @@ class MultiWorld():
 
         return False
 
+    def analyze_spheres(self, keep_states: bool = False) -> SphereAnalysis:
+        """Sweeps all locations once from an empty state and keeps the result as sphere_analysis,
+        to be reused by can_beat_game, get_spheres, fulfills_accessibility and Spoiler.create_playthrough
+        for as long as item placements don't change.
+        :param keep_states: also keep the state before each sphere, as used by Spoiler.create_playthrough"""
+        self.sphere_analysis = SphereAnalysis(self, keep_states)
+        return self.sphere_analysis
+
+    def get_sphere_analysis(self) -> Optional[SphereAnalysis]:
+        """Returns the result of analyze_spheres, unless items were placed, moved or precollected since."""
+        if self.sphere_analysis and self.sphere_analysis.placement_count == self.placement_count:
+            return self.sphere_analysis
+        return None
+
+
+class SphereAnalysis:
+    """Logical spheres of all locations of a MultiWorld, swept once from an empty CollectionState.
+    See MultiWorld.analyze_spheres."""
+    multiworld: MultiWorld
+    spheres: List[Set[Location]]
+    """locations in order of logical spheres, including locations without an item"""
+    unreachable: Set[Location]
+    """locations that can't be reached"""
+    beaten_sphere: Optional[int]
+    """amount of spheres that have to be collected for has_beaten_game, None if the game can't be beaten"""
+    states: Optional[List[CollectionState]]
+    """if kept, the state before collecting each sphere, followed by the final state"""
+    placement_count: int
+    """MultiWorld.placement_count at the time of the analysis"""
+
+    def __init__(self, multiworld: MultiWorld, keep_states: bool = False) -> None:
+        self.multiworld = multiworld
+        self.placement_count = multiworld.placement_count
+        self.spheres = []
+        self.states = [] if keep_states else None
+        self.beaten_sphere = None
+        state = CollectionState(multiworld)
+        locations = set(multiworld.get_locations())
+        while True:
+            if self.beaten_sphere is None and multiworld.has_beaten_game(state):
+                self.beaten_sphere = len(self.spheres)
+            if self.states is not None:
+                self.states.append(state.copy())
+            sphere = {location for location in locations if location.can_reach(state)}
+            if not sphere:
+                break
+            for location in sphere:
+                if location.item:
+                    state.collect(location.item, True, location)
+            locations -= sphere
+            self.spheres.append(sphere)
+        self.unreachable = locations
+
+    @property
+    def beatable(self) -> bool:
+        return self.beaten_sphere is not None
+
+    def get_spheres(self) -> Iterator[Set[Location]]:
+        """Same as MultiWorld.get_spheres"""
+        for sphere in self.spheres:
+            filled = {location for location in sphere if location.item}
+            if not filled:
+                break
+            yield filled
+        unreachable = {location for location in self.unreachable if location.item}
+        if unreachable:
+            yield set()
+            yield unreachable
+
+    def fulfills_accessibility(self) -> bool:
+        """Same as MultiWorld.fulfills_accessibility without a supplied state"""
+        accessibility = {player: world.options.accessibility.current_key
+                         for player, world in self.multiworld.worlds.items()}
+        missing = [location for location in self.unreachable
+                   if accessibility[location.player] == "full" or location.advancement]
+        if self.beatable and not any(accessibility[location.player] == "full" or
+                                     (location.item and accessibility[location.item.player] != "minimal")
+                                     for location in missing):
+            return True
+        if missing:
+            logging.warning(f"Could not access required locations for accessibility check. Missing: {missing}")
+        return False
+
 
 PathValue = Tuple[str, Optional["PathValue"]]
 
 
+class CopyOnAccessDict(dict):
+    """Per-player mapping used by CollectionState.copy.
+    Values are copied out of `origin` the first time they are looked up, reading or writing, as a looked up value can
+    get modified in place, like `state.prog_items[player][item] += 1`. So data of players a state never looks at is never
+    duplicated. Looking at keys, `len`, `in`, `==` and `repr` don't copy anything, while `values`, `items` and `copy`
+    copy all remaining values. Values in `origin` are never modified, both the copied and the copying state only modify
+    their own copies. Removing keys is not supported."""
+    __slots__ = ("origin", "copy_value")
+    origin: Dict[int, Any]
+    copy_value: Callable[[Any], Any]
+
+    def __init__(self, origin: Dict[int, Any], copy_value: Callable[[Any], Any]) -> None:
+        super().__init__()
+        self.origin = origin
+        self.copy_value = copy_value
+
+    def __missing__(self, key: int) -> Any:
+        value = self.copy_value(self.origin[key])
+        self[key] = value
+        return value
+
+    def share(self) -> Dict[int, Any]:
+        """Returns all current values as a new origin to create another CopyOnAccessDict from.
+        As these values are now shared, this mapping switches over to the new origin as well."""
+        origin = self.origin.copy()
+        origin.update(dict.items(self))
+        self.origin = origin
+        self.clear()
+        return origin
+
+    def materialize(self) -> None:
+        for key in self.origin:
+            if not dict.__contains__(self, key):
+                self.__missing__(key)
+
+    def current(self) -> Dict[int, Any]:
+        """Returns a dict of all current values without copying them, which must not be modified."""
+        current = self.origin.copy()
+        current.update(dict.items(self))
+        return current
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self.origin
+
+    def get(self, key: int, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def __iter__(self) -> Iterator[int]:
+        yield from self.origin
+        for key in dict.__iter__(self):
+            if key not in self.origin:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self.origin) + sum(1 for key in dict.__iter__(self) if key not in self.origin)
+
+    def keys(self) -> typing.KeysView[int]:
+        return KeysView(self)
+
+    def values(self) -> typing.ValuesView[Any]:
+        self.materialize()
+        return dict.values(self)
+
+    def items(self) -> typing.ItemsView[int, Any]:
+        self.materialize()
+        return dict.items(self)
+
+    def copy(self) -> Dict[int, Any]:
+        self.materialize()
+        return dict(dict.items(self))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CopyOnAccessDict):
+            other = other.current()
+        return self.current() == other
+
+    def __ne__(self, other: object) -> bool:
+        return not self == other
+
+    def __repr__(self) -> str:
+        return repr(self.current())
+
+
+def _copy_entrance_dependencies(dependencies: Dict[str, Set[Entrance]]) -> Dict[str, Set[Entrance]]:
+    return {item_name: entrances.copy() for item_name, entrances in dependencies.items()}
+
+
+class DependencyCounter(Counter):
+    """Counter of a player's progression items, remembering which item names changed since the last time the player's
+    reachable regions were updated. Used by CollectionState for worlds with `World.track_rule_dependencies`."""
+    changed: Set[str]
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.changed = set()
+        super().__init__(*args, **kwargs)
+
+    def __setitem__(self, key: str, value: int) -> None:
+        self.changed.add(key)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        self.changed.add(key)
+        super().__delitem__(key)
+
+    def pop(self, key: str, *default: Any) -> Any:
+        self.changed.add(key)
+        return super().pop(key, *default)
+
+    def clear(self) -> None:
+        self.changed.update(self)
+        super().clear()
+
+    def copy(self) -> DependencyCounter:
+        ret = DependencyCounter(self)
+        ret.changed = self.changed.copy()
+        return ret
+
+
+class _TracingDependencyCounter(DependencyCounter):
+    """Swapped in as the class of a DependencyCounter while an Entrance.access_rule is evaluated,
+    recording which item names the rule looked at."""
+    accessed: Set[str]
+    untraceable: bool
+
+    def __getitem__(self, key: str) -> int:
+        self.accessed.add(key)
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self.accessed.add(key)
+        return super().get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        self.accessed.add(key)
+        return super().__contains__(key)
+
+    # anything looking at the counter as a whole can depend on any item, so it can't be traced
+    def _untraceable(name: str) -> Callable[..., Any]:
+        def untraceable_access(self: _TracingDependencyCounter, *args: Any, **kwargs: Any) -> Any:
+            self.untraceable = True
+            return getattr(super(_TracingDependencyCounter, self), name)(*args, **kwargs)
+        return untraceable_access
+
+    __iter__ = _untraceable("__iter__")
+    __len__ = _untraceable("__len__")
+    __eq__ = _untraceable("__eq__")
+    __ne__ = _untraceable("__ne__")
+    keys = _untraceable("keys")
+    values = _untraceable("values")
+    items = _untraceable("items")
+    total = _untraceable("total")
+    elements = _untraceable("elements")
+    most_common = _untraceable("most_common")
+    copy = _untraceable("copy")
+    del _untraceable
+
+
 class CollectionState():
-    prog_items: Dict[int, Counter[str]]
+    prog_items: Dict[int, typing.MutableMapping[str, int]]
     multiworld: MultiWorld
     reachable_regions: Dict[int, Set[Region]]
     blocked_connections: Dict[int, Set[Entrance]]
@@ -676,11 +935,31 @@ class CollectionState():
     path: Dict[Union[Region, Entrance], PathValue]
     locations_checked: Set[Location]
     stale: Dict[int, bool]
+    entrance_dependencies: Dict[int, Dict[str, Set[Entrance]]]
+    """for players with World.track_rule_dependencies, item name -> blocked entrances whose access_rule looked at it"""
+    untraced_entrances: Dict[int, Set[Entrance]]
+    """for players with World.track_rule_dependencies, blocked entrances that have to be rechecked on every update"""
+    copy_on_access_attributes: ClassVar[Tuple[Tuple[str, Callable[[Any], Any]], ...]] = (
+        ("prog_items", methodcaller("copy")),
+        ("reachable_regions", methodcaller("copy")),
+        ("blocked_connections", methodcaller("copy")),
+        ("entrance_dependencies", _copy_entrance_dependencies),
+        ("untraced_entrances", methodcaller("copy")),
+    )
+    """per-player attributes shared between copies of a state until accessed, see CopyOnAccessDict"""
     additional_init_functions: List[Callable[[CollectionState, MultiWorld], None]] = []
     additional_copy_functions: List[Callable[[CollectionState, CollectionState], CollectionState]] = []
 
     def __init__(self, parent: MultiWorld):
-        self.prog_items = {player: Counter() for player in parent.get_all_ids()}
+        tracked_players = {player for player, world in parent.worlds.items()
+                           if world.track_rule_dependencies and world.explicit_indirect_conditions}
+        self.prog_items = {}
+        for player in parent.get_all_ids():
+            world = parent.worlds.get(player)
+            if player in tracked_players:
+                self.prog_items[player] = DependencyCounter()
+            else:
+                self.prog_items[player] = Counter()
         self.multiworld = parent
         self.reachable_regions = {player: set() for player in parent.get_all_ids()}
         self.blocked_connections = {player: set() for player in parent.get_all_ids()}
@@ -688,6 +967,8 @@ class CollectionState():
         self.path = {}
         self.locations_checked = set()
         self.stale = {player: True for player in parent.get_all_ids()}
+        self.entrance_dependencies = {player: {} for player in tracked_players}
+        self.untraced_entrances = {player: set() for player in tracked_players}
         for function in self.additional_init_functions:
             function(self, parent)
         for items in parent.precollected_items.values():
@@ -698,16 +979,26 @@ class CollectionState():
         self.stale[player] = False
         world: AutoWorld.World = self.multiworld.worlds[player]
         reachable_regions = self.reachable_regions[player]
-        queue = deque(self.blocked_connections[player])
         start: Region = world.get_region(world.origin_region_name)
+        tracked = player in self.entrance_dependencies and isinstance(self.prog_items[player], DependencyCounter)
+        if tracked and start in reachable_regions:
+            queue = self._get_dependent_connections(player)
+        else:
+            queue = deque(self.blocked_connections[player])
 
         # init on first call - this can't be done on construction since the regions don't exist yet
         if start not in reachable_regions:
             reachable_regions.add(start)
             self.blocked_connections[player].update(start.exits)
             queue.extend(start.exits)
-
-        if world.explicit_indirect_conditions:
+            if tracked:
+                self.entrance_dependencies[player].clear()
+                self.untraced_entrances[player].clear()
+                self.prog_items[player].changed.clear()
+
+        if tracked:
+            self._update_reachable_regions_tracked(player, queue)
+        elif world.explicit_indirect_conditions:
             self._update_reachable_regions_explicit_indirect_conditions(player, queue)
         else:
             self._update_reachable_regions_auto_indirect_conditions(player, queue)
@@ -734,6 +1025,74 @@ class CollectionState():
                     if new_entrance in blocked_connections and new_entrance not in queue:
                         queue.append(new_entrance)
 
+    def _get_dependent_connections(self, player: int) -> deque:
+        """Blocked connections that have to be rechecked because an item their access_rule looked at changed."""
+        prog_items: DependencyCounter = self.prog_items[player]
+        dependencies = self.entrance_dependencies[player]
+        queue = deque(self.untraced_entrances[player])
+        queued = set(queue)
+        for item_name in prog_items.changed:
+            for entrance in dependencies.pop(item_name, ()):
+                if entrance not in queued:
+                    queued.add(entrance)
+                    queue.append(entrance)
+        prog_items.changed.clear()
+        return queue
+
+    def _update_reachable_regions_tracked(self, player: int, queue: deque):
+        reachable_regions = self.reachable_regions[player]
+        blocked_connections = self.blocked_connections[player]
+        dependencies = self.entrance_dependencies[player]
+        untraced_entrances = self.untraced_entrances[player]
+        prog_items: DependencyCounter = self.prog_items[player]
+        # run BFS on connections that may have changed, and record which items blocked ones looked at
+        while queue:
+            connection = queue.popleft()
+            if connection not in blocked_connections:
+                continue  # outdated dependency entry
+            new_region = connection.connected_region
+            if new_region in reachable_regions:
+                blocked_connections.remove(connection)
+                untraced_entrances.discard(connection)
+                continue
+            # rules from worlds.generic.Rules know which items they look at, so they don't need to be traced
+            rule_dependencies: Optional[AbstractSet[Tuple[str, int]]] = \
+                getattr(connection.access_rule, "item_dependencies", None)
+            if rule_dependencies is not None and type(connection).can_reach is Entrance.can_reach \
+                    and all(item_player == player for _, item_player in rule_dependencies):
+                reached = connection.can_reach(self)
+                untraceable = False
+                accessed: Iterable[str] = (item_name for item_name, _ in rule_dependencies)
+            else:
+                prog_items.__class__ = _TracingDependencyCounter
+                prog_items.accessed = set()
+                prog_items.untraceable = False
+                try:
+                    reached = connection.can_reach(self)
+                finally:
+                    prog_items.__class__ = DependencyCounter
+                untraceable = prog_items.untraceable
+                accessed = prog_items.accessed
+            if reached:
+                assert new_region, f"tried to search through an Entrance \"{connection}\" with no connected Region"
+                reachable_regions.add(new_region)
+                blocked_connections.remove(connection)
+                untraced_entrances.discard(connection)
+                blocked_connections.update(new_region.exits)
+                queue.extend(new_region.exits)
+                self.path[new_region] = (new_region.name, self.path.get(connection, None))
+
+                # Retry connections if the new region can unblock them
+                for new_entrance in self.multiworld.indirect_connections.get(new_region, set()):
+                    if new_entrance in blocked_connections and new_entrance not in queue:
+                        queue.append(new_entrance)
+            elif untraceable:
+                untraced_entrances.add(connection)
+            else:
+                untraced_entrances.discard(connection)
+                for item_name in accessed:
+                    dependencies.setdefault(item_name, set()).add(connection)
+
     def _update_reachable_regions_auto_indirect_conditions(self, player: int, queue: deque):
         reachable_regions = self.reachable_regions[player]
         blocked_connections = self.blocked_connections[player]
@@ -758,15 +1117,25 @@ class CollectionState():
             queue.extend(blocked_connections)
 
     def copy(self) -> CollectionState:
-        ret = CollectionState(self.multiworld)
-        ret.prog_items = {player: counter.copy() for player, counter in self.prog_items.items()}
-        ret.reachable_regions = {player: region_set.copy() for player, region_set in
-                                 self.reachable_regions.items()}
-        ret.blocked_connections = {player: entrance_set.copy() for player, entrance_set in
-                                   self.blocked_connections.items()}
+        """Per-player data is copied on access: it is shared between this state and the copy,
+        and only duplicated for a player once either state looks up that player's data again."""
+        ret = self.__class__.__new__(self.__class__)
+        ret.multiworld = self.multiworld
+        for attribute, copy_value in self.copy_on_access_attributes:
+            per_player: Dict[int, Any] = getattr(self, attribute)
+            if isinstance(per_player, CopyOnAccessDict):
+                origin = per_player.share()
+            else:
+                origin = per_player
+                setattr(self, attribute, CopyOnAccessDict(origin, copy_value))
+            setattr(ret, attribute, CopyOnAccessDict(origin, copy_value))
         ret.advancements = self.advancements.copy()
         ret.path = self.path.copy()
         ret.locations_checked = self.locations_checked.copy()
+        # items may get collected into the copy through World.collect directly, so reachability has to be rechecked
+        ret.stale = dict.fromkeys(self.stale, True)
+        for function in self.additional_init_functions:
+            function(ret, self.multiworld)
         for function in self.additional_copy_functions:
             ret = function(self, ret)
         return ret
@@ -1149,7 +1518,7 @@ class Location:
     always_allow: Callable[[CollectionState, Item], bool] = staticmethod(lambda state, item: False)
     access_rule: Callable[[CollectionState], bool] = staticmethod(lambda state: True)
     item_rule: Callable[[Item], bool] = staticmethod(lambda item: True)
-    item: Optional[Item] = None
+    _item: Optional[Item] = None
 
     def __init__(self, player: int, name: str = '', address: Optional[int] = None, parent: Optional[Region] = None):
         self.player = player
@@ -1157,6 +1526,16 @@ class Location:
         self.address = address
         self.parent_region = parent
 
+    @property
+    def item(self) -> Optional[Item]:
+        return self._item
+
+    @item.setter
+    def item(self, item: Optional[Item]) -> None:
+        self._item = item
+        if self.parent_region and self.parent_region.multiworld:
+            self.parent_region.multiworld.placement_count += 1
+
     def can_fill(self, state: CollectionState, item: Item, check_access: bool = True) -> bool:
         return ((
             self.always_allow(state, item)
@@ -1330,6 +1709,18 @@ class Spoiler:
         collection_spheres: List[Set[Location]] = []
         state = CollectionState(multiworld)
         sphere_candidates = set(prog_locations)
+        sphere_analysis = multiworld.get_sphere_analysis()
+        if sphere_analysis and sphere_analysis.states is not None:
+            logging.debug('Reusing collection spheres of sphere analysis.')
+            for analysis_sphere in sphere_analysis.spheres:
+                # iterating the same as the sweep below, as the culling depends on the order of each sphere
+                sphere = {location for location in sphere_candidates if location in analysis_sphere}
+                if not sphere:
+                    break
+                sphere_candidates -= sphere
+                collection_spheres.append(sphere)
+            state_cache.extend(sphere_analysis.states[1:len(collection_spheres) + 1])
+            state = sphere_analysis.states[len(collection_spheres)].copy()
         logging.debug('Building up collection spheres.')
         while sphere_candidates:
 
@@ -1363,28 +1754,18 @@ class Spoiler:
         # reducing each range of influence to the bare minimum required inside it
         restore_later: Dict[Location, Item] = {}
         for num, sphere in reversed(tuple(enumerate(collection_spheres))):
-            to_delete: Set[Location] = set()
-            for location in sphere:
-                # we remove the item at location and check if game is still beatable
-                logging.debug('Checking if %s (Player %d) is required to beat the game.', location.item.name,
-                              location.item.player)
-                old_item = location.item
-                location.item = None
-                if multiworld.can_beat_game(state_cache[num]):
-                    to_delete.add(location)
-                    restore_later[location] = old_item
-                else:
-                    # still required, got to keep it around
-                    location.item = old_item
+            to_delete = self._cull_sphere(list(sphere), state_cache[num])
+            restore_later.update(to_delete)
 
             # cull entries in spheres for spoiler walkthrough at end
-            sphere -= to_delete
+            sphere.difference_update(to_delete)
 
         # second phase, sphere 0
         removed_precollected: List[Item] = []
         for item in (i for i in chain.from_iterable(multiworld.precollected_items.values()) if i.advancement):
             logging.debug('Checking if %s (Player %d) is required to beat the game.', item.name, item.player)
             multiworld.precollected_items[item.player].remove(item)
+            multiworld.placement_count += 1
             multiworld.state.remove(item)
             if not multiworld.can_beat_game():
                 multiworld.push_precollected(item)
@@ -1433,6 +1814,89 @@ class Spoiler:
         for item in removed_precollected:
             multiworld.push_precollected(item)
 
+    def _cull_sphere(self, sphere: List[Location], sphere_state: Optional[CollectionState]) -> Dict[Location, Item]:
+        """
+        Finds the locations of a sphere whose items aren't required to beat the game, going through them in order and
+        keeping each item whose removal, together with all the removals before it, makes the game unbeatable.
+
+        Instead of checking each item on its own, items get removed in groups that grow while they turn out to be
+        unneeded and are only split up when a group can't be removed as a whole. Each check starts from everything
+        that is reachable without any of the sphere's unchecked items, which only grows while going through the
+        sphere. Both give the same result as checking the items one by one from sphere_state, as long as no rule is
+        made harder by collecting more items.
+        Leaves the items of the returned locations removed.
+        """
+        multiworld = self.multiworld
+        culled: Dict[Location, Item] = {}
+        prog_locations = [location for location in multiworld.get_filled_locations() if location.item.advancement]
+        base_state = sphere_state.copy() if sphere_state else CollectionState(multiworld)
+        base_stale = True
+
+        def update_base_state(unchecked: List[Location]) -> None:
+            old_items = [location.item for location in unchecked]
+            for location in unchecked:
+                location.item = None
+            locations = {location for location in prog_locations
+                         if location.item and location not in base_state.locations_checked}
+            while True:
+                reachable = {location for location in locations if location.can_reach(base_state)}
+                if not reachable:
+                    break
+                for location in reachable:
+                    base_state.collect(location.item, True, location)
+                locations -= reachable
+            for location, old_item in zip(unchecked, old_items):
+                location.item = old_item
+
+        def can_beat_without(start: int, end: int) -> bool:
+            nonlocal base_stale
+            if base_stale:
+                update_base_state(sphere[start:])
+                base_stale = False
+            group = sphere[start:end]
+            logging.debug('Checking if %s are required to beat the game.',
+                          ", ".join(f"{location.item.name} (Player {location.item.player})" for location in group))
+            # the rest of the sphere is reachable from sphere_state, so a sweep would collect it first anyway
+            state = base_state.copy()
+            for location in sphere[end:]:
+                state.collect(location.item, True, location)
+            old_items = [location.item for location in group]
+            for location in group:
+                location.item = None
+            if multiworld.can_beat_game(state):
+                culled.update(zip(group, old_items))
+                return True
+            for location, old_item in zip(group, old_items):
+                location.item = old_item
+            return False
+
+        def bisect(start: int, end: int, known_required: bool = False) -> None:
+            nonlocal base_stale
+            if not known_required and can_beat_without(start, end):
+                return
+            if end - start == 1:
+                # still required, got to keep it around
+                location = sphere[start]
+                base_state.collect(location.item, True, location)
+                base_stale = True
+                return
+            middle = (start + end) // 2
+            bisect(start, middle)
+            # if the first half could be removed, the whole group failing means the second half can't be either
+            bisect(middle, end, all(location in culled for location in sphere[start:middle]))
+
+        group_size = 1
+        start = 0
+        while start < len(sphere):
+            end = min(start + group_size, len(sphere))
+            if can_beat_without(start, end):
+                group_size *= 2
+            else:
+                bisect(start, end, True)
+                group_size = max(1, group_size // 2)
+            start = end
+        return culled
+
     def create_paths(self, state: CollectionState, collection_spheres: List[Set[Location]]) -> None:
         from itertools import zip_longest
         multiworld = self.multiworld
@@ -33,6 +33,189 @@ def sweep_from_pool(base_state: CollectionState, itempool: typing.Sequence[Item]
     return new_state
 
 
+class _FillCandidates:
+    """
+    Index of the open locations of a fill_restrictive call.
+    Locations are kept in insertion ordered dicts by id, one over all locations and one per player, so a placed location
+    is removed in constant time while a candidate search still returns the first fillable location in list order.
+    Searches that check access only ask locations for their reachability in the current maximum exploration state up
+    to the first one that fits, moving a frontier through the locations in order. The reachable locations it passes go
+    into their own bucket, so later searches against the same state look at those first and skip unreachable ones.
+    Locations overriding Location.can_fill or Location.always_allow are always asked directly.
+    """
+    open: typing.Dict[int, Location]
+    by_player: typing.Dict[int, typing.Dict[int, Location]]
+    asked_directly: typing.Set[int]
+    state: typing.Optional[CollectionState]
+    order: typing.Dict[typing.Optional[int], typing.List[Location]]
+    """locations of all players (None) or one player in list order, placed ones are skipped until the next compaction"""
+    start: typing.Dict[typing.Optional[int], int]
+    """index into order before which all locations are placed"""
+    frontier: typing.Dict[typing.Optional[int], int]
+    """index into order up to which reachability was asked in the current state"""
+    reachable: typing.Dict[typing.Optional[int], typing.Dict[int, Location]]
+    """open locations before the frontier that are reachable in the current state or asked directly, in list order"""
+
+    def __init__(self, locations: typing.List[Location]) -> None:
+        self.open = {id(location): location for location in locations}
+        self.by_player = {}
+        for location in self.open.values():
+            self.by_player.setdefault(location.player, {})[id(location)] = location
+        self.asked_directly = {id(location) for location in self.open.values()
+                               if type(location).can_fill is not Location.can_fill
+                               or location.always_allow is not Location.always_allow}
+        self.state = None
+        self.order = {}
+        self.start = {}
+        self.frontier = {}
+        self.reachable = {}
+
+    def __len__(self) -> int:
+        return len(self.open)
+
+    def set_state(self, state: CollectionState) -> None:
+        self.state = state
+        self.frontier = {}
+        self.reachable = {}
+
+    def _start_order(self, scope: typing.Optional[int]) -> typing.Tuple[typing.List[Location], int]:
+        """Returns the order of scope and the index of its first open location."""
+        bucket = self.open if scope is None else self.by_player.get(scope, {})
+        order = self.order.get(scope)
+        # drop placed locations once they make up half of the list, so skipping them stays amortized constant
+        if order is None or len(order) > 2 * len(bucket):
+            order = self.order[scope] = list(bucket.values())
+            self.start[scope] = 0
+        # the first fitting locations get placed most, so skip the placed ones at the front only once
+        start = self.start[scope]
+        while start < len(order) and id(order[start]) not in self.open:
+            start += 1
+        self.start[scope] = start
+        return order, start
+
+    def can_fill(self, location: Location, item: Item) -> bool:
+        """Same as location.can_fill(self.state, item) for a location in the reachable buckets."""
+        return location.can_fill(self.state, item, id(location) in self.asked_directly)
+
+    def pop(self, item: Item, check_access: bool, single_player: bool) -> typing.Optional[Location]:
+        """Removes and returns the first location item can be placed in, if any."""
+        scope = item.player if single_player else None
+        if not check_access:
+            for location in (self.open if scope is None else self.by_player.get(scope, {})).values():
+                if location.can_fill(self.state, item, False):
+                    return self._remove(location)
+            return None
+
+        # all reachable locations come before the frontier, so they are looked at first to keep the list order
+        reachable = self.reachable.setdefault(scope, {})
+        for location in reachable.values():
+            if self.can_fill(location, item):
+                return self._remove(location)
+        index = self.frontier.get(scope)
+        if index is None:
+            order, index = self._start_order(scope)
+        else:
+            order = self.order[scope]
+        while index < len(order):
+            location = order[index]
+            index += 1
+            if id(location) in self.open \
+                    and (id(location) in self.asked_directly or location.can_reach(self.state)):
+                reachable[id(location)] = location
+                if self.can_fill(location, item):
+                    self.frontier[scope] = index
+                    return self._remove(location)
+        self.frontier[scope] = index
+        return None
+
+    def _remove(self, location: Location) -> Location:
+        del self.open[id(location)]
+        del self.by_player[location.player][id(location)]
+        for scope in (None, location.player):
+            if scope in self.reachable:
+                self.reachable[scope].pop(id(location), None)
+        return location
+
+
+class _ExplorationSweep:
+    """
+    Builds the maximum exploration states of a fill_restrictive call, the same as sweep_from_pool from its base state.
+    Each sweep remembers in which of its passes each filled location was reached. Between batches the pool mostly loses
+    the items placed since, so each pass of the next sweep asks the locations reached by that pass last time and the
+    ones filled since, instead of every location that is left. The locations the last sweep could not reach are asked
+    once its passes are over, and the sweep only ends at a pass that reaches nothing after that, so the old passes
+    decide how much gets asked but not what gets reached.
+    """
+    base_state: CollectionState
+    player: typing.Optional[int]
+    """player whose filled locations the last sweep looked at, None for all players"""
+    reached_in: typing.Optional[typing.Dict[int, int]]
+    """pass in which each location was reached by the last sweep, None before the first one"""
+    seen: typing.Set[int]
+    """all locations the last sweep looked at, reached or not"""
+
+    def __init__(self, base_state: CollectionState) -> None:
+        self.base_state = base_state
+        self.player = None
+        self.reached_in = None
+        self.seen = set()
+
+    def sweep(self, itempool: typing.Sequence[Item], player: typing.Optional[int] = None) -> CollectionState:
+        """Same as sweep_from_pool(base_state, itempool, multiworld.get_filled_locations(player))."""
+        multiworld = self.base_state.multiworld
+        state = self.base_state.copy()
+        for item in itempool:
+            state.collect(item, True)
+        locations = [location for location in multiworld.get_filled_locations(player)
+                     if location.advancement and location not in state.advancements]
+
+        pending: typing.Dict[int, Location] = {}
+        by_pass: typing.List[typing.List[Location]] = []
+        if self.reached_in is None or player != self.player:
+            pending.update((id(location), location) for location in locations)
+        else:
+            unreached: typing.List[Location] = []
+            for location in locations:
+                pass_num = self.reached_in.get(id(location))
+                if pass_num is not None:
+                    while len(by_pass) <= pass_num:
+                        by_pass.append([])
+                    by_pass[pass_num].append(location)
+                elif id(location) in self.seen:
+                    unreached.append(location)
+                else:
+                    # filled since the last sweep
+                    pending[id(location)] = location
+            # the items placed since may open up locations the last sweep could not reach, asking them only after its
+            # passes still finds them as the sweep keeps going until nothing more is reachable
+            by_pass.append(unreached)
+
+        reached_in: typing.Dict[int, int] = {}
+        pass_num = 0
+        while True:
+            if pass_num < len(by_pass):
+                pending.update((id(location), location) for location in by_pass[pass_num])
+            reached = [location for location in pending.values() if location.can_reach(state)]
+            if not reached and pass_num + 1 >= len(by_pass):
+                break
+            for location in reached:
+                del pending[id(location)]
+                reached_in[id(location)] = pass_num
+                state.advancements.add(location)
+                state.collect(location.item, True, location)
+            pass_num += 1
+        self.player = player
+        self.reached_in = reached_in
+        self.seen = {id(location) for location in locations}
+
+        if __debug__ and logging.getLogger().isEnabledFor(logging.DEBUG):
+            full_state = sweep_from_pool(self.base_state, itempool,
+                                         None if player is None else multiworld.get_filled_locations(player))
+            assert state.prog_items == full_state.prog_items and state.advancements == full_state.advancements, \
+                "Maximum exploration state differs from a full sweep."
+        return state
+
+
 def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locations: typing.List[Location],
                      item_pool: typing.List[Item], single_player_placement: bool = False, lock: bool = False,
                      swap: bool = True, on_place: typing.Optional[typing.Callable[[Location], None]] = None,
@@ -58,11 +241,14 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
     for item in item_pool:
         reachable_items.setdefault(item.player, deque()).append(item)
 
+    candidates = _FillCandidates(locations)
+    exploration = _ExplorationSweep(base_state)
+
     # for progress logging
     total = min(len(item_pool), len(locations))
     placed = 0
 
-    while any(reachable_items.values()) and locations:
+    while any(reachable_items.values()) and candidates:
         # grab one item per player
         items_to_place = [items.pop()
                           for items in reachable_items.values() if items]
@@ -71,21 +257,19 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
                 if pool_item is item:
                     item_pool.pop(p)
                     break
-        maximum_exploration_state = sweep_from_pool(
-            base_state, item_pool + unplaced_items, multiworld.get_filled_locations(item.player)
-            if single_player_placement else None)
+        maximum_exploration_state = exploration.sweep(item_pool + unplaced_items,
+                                                      item.player if single_player_placement else None)
+        candidates.set_state(maximum_exploration_state)
 
         has_beaten_game = multiworld.has_beaten_game(maximum_exploration_state)
 
         while items_to_place:
             # if we have run out of locations to fill,break out of this loop
-            if not locations:
+            if not candidates:
                 unplaced_items += items_to_place
                 break
             item_to_place = items_to_place.pop(0)
 
-            spot_to_fill: typing.Optional[Location] = None
-
             # if minimal accessibility, only check whether location is reachable if game not beatable
             if multiworld.worlds[item_to_place.player].options.accessibility == Accessibility.option_minimal:
                 perform_access_check = not multiworld.has_beaten_game(maximum_exploration_state,
@@ -94,15 +278,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             else:
                 perform_access_check = True
 
-            for i, location in enumerate(locations):
-                if (not single_player_placement or location.player == item_to_place.player) \
-                        and location.can_fill(maximum_exploration_state, item_to_place, perform_access_check):
-                    # popping by index is faster than removing by content,
-                    spot_to_fill = locations.pop(i)
-                    # skipping a scan for the element
-                    break
-
-            else:
+            spot_to_fill: typing.Optional[Location] = candidates.pop(item_to_place, perform_access_check,
+                                                                     single_player_placement)
+            if spot_to_fill is None:
                 # we filled all reachable spots.
                 if swap:
                     # try swapping this item with previously placed items in a safe way then in an unsafe way
@@ -174,6 +352,9 @@ def fill_restrictive(multiworld: MultiWorld, base_state: CollectionState, locati
             if on_place:
                 on_place(spot_to_fill)
 
+    # drop the filled locations from the caller's list in one go instead of removing them one placement at a time
+    locations[:] = candidates.open.values()
+
     if total > 1000:
         _log_fill_progress(name, placed, total)
 
@@ -610,7 +791,77 @@ def flood_items(multiworld: MultiWorld) -> None:
                 break
 
 
-def balance_multiworld_progression(multiworld: MultiWorld) -> None:
+class ProgressionBalancingReport(typing.NamedTuple):
+    """How much balance_multiworld_progression achieved."""
+    moved_items: int = 0
+    tested_items: int = 0
+    balanced_spheres: int = 0
+    """spheres in which at least one player was below their threshold"""
+    below_threshold: typing.Dict[int, int] = {}
+    """per player, in how many spheres they were still below their threshold after swapping"""
+    limit_reached: bool = False
+
+
+class _SphereIndex:
+    """
+    Spheres of the locations left to progression balancing, each computed once from where balancing is, instead of
+    again for every sphere that needs balancing and looks ahead. Moving items into earlier spheres changes the spheres
+    after, see moved_items.
+    """
+    multiworld: MultiWorld
+    state: CollectionState
+    """holds the items of all spheres computed so far"""
+    remaining: typing.Set[Location]
+    spheres: typing.List[typing.Set[Location]]
+    unlocked_counts: typing.List[typing.Counter[int]]
+    """per sphere, how many of its locations per player aren't locked"""
+    beaten: typing.List[bool]
+    """per sphere, if the game is beaten with its items and those of the spheres before"""
+    reachable_by: typing.Dict[Location, int]
+    """sphere by which a location is known to be reachable, without asking it"""
+
+    def __init__(self, state: CollectionState, locations: typing.Iterable[Location]) -> None:
+        self.multiworld = state.multiworld
+        self.state = state.copy()
+        self.remaining = set(locations)
+        self.spheres = []
+        self.unlocked_counts = []
+        self.beaten = []
+        self.reachable_by = {}
+
+    def moved_items(self, state: CollectionState, locations: typing.Iterable[Location], num: int) -> "_SphereIndex":
+        """
+        New index from state, after moving progression items into checked locations while at sphere num - 1, and
+        non-progression items out of them. The states then only gain items, so locations can only get reachable earlier
+        and the spheres computed so far from num on tell by when they're reachable at the latest.
+        """
+        index = _SphereIndex(state, locations)
+        index.reachable_by = {location: sphere_num for sphere_num, sphere in enumerate(self.spheres[num:])
+                              for location in sphere}
+        return index
+
+    def __getitem__(self, num: int) -> typing.Set[Location]:
+        """Sphere num, counted from the locations the index was built with, computing it and the ones before first."""
+        while len(self.spheres) <= num:
+            sphere_num = len(self.spheres)
+            reachable_by = self.reachable_by
+            sphere = {location for location in self.remaining
+                      if reachable_by.get(location, sphere_num + 1) <= sphere_num or self.state.can_reach(location)}
+            self.remaining -= sphere
+            for location in sphere:
+                if location.advancement:
+                    self.state.collect(location.item, True, location)
+            self.spheres.append(sphere)
+            self.unlocked_counts.append(Counter(location.player for location in sphere if not location.locked))
+            self.beaten.append(self.multiworld.has_beaten_game(self.state))
+        return self.spheres[num]
+
+
+def balance_multiworld_progression(multiworld: MultiWorld, test_limit: int = 0) -> ProgressionBalancingReport:
+    """
+    :param test_limit: stop balancing after the sphere in which this many items were tested for being moved earlier,
+        0 for no limit. Unlike a time limit, this keeps the result the same for the same seed.
+    """
     # A system to reduce situations where players have no checks remaining, popularly known as "BK mode."
     # Overall progression balancing algorithm:
     # Gather up all locations in a sphere.
@@ -624,6 +875,7 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
     }
     if not balanceable_players:
         logging.info('Skipping multiworld progression balancing.')
+        return ProgressionBalancingReport()
     else:
         logging.info(f'Balancing multiworld progression for {len(balanceable_players)} Players.')
         logging.debug(balanceable_players)
@@ -648,6 +900,12 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         }
         sphere_num: int = 1
         moved_item_count: int = 0
+        tested_item_count: int = 0
+        balanced_sphere_count: int = 0
+        below_threshold: typing.Counter[int] = Counter()
+        sphere_index: typing.Optional[_SphereIndex] = None
+        moved_index: typing.Optional[_SphereIndex] = None
+        index_position: int = 0
 
         def get_sphere_locations(sphere_state: CollectionState,
                                  locations: typing.Set[Location]) -> typing.Set[Location]:
@@ -656,15 +914,34 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
         def item_percentage(player: int, num: int) -> float:
             return num / total_locations_count[player]
 
+        def limit_reached() -> bool:
+            return bool(test_limit) and tested_item_count >= test_limit
+
+        def get_report() -> ProgressionBalancingReport:
+            logging.info(f"Progression balancing moved {moved_item_count} items after testing {tested_item_count}, "
+                         f"{balanced_sphere_count} spheres needed balancing"
+                         + (", stopped at the test limit." if limit_reached() else "."))
+            if below_threshold:
+                logging.info(f"Players still below their threshold, by number of spheres: {dict(below_threshold)}")
+            return ProgressionBalancingReport(moved_item_count, tested_item_count, balanced_sphere_count,
+                                              dict(below_threshold), limit_reached())
+
         # If there are no locations that aren't locked, there's no point in attempting to balance progression.
         if len(total_locations_count) == 0:
-            return
+            return get_report()
 
         while True:
             # Gather non-locked locations.
             # This ensures that only shuffled locations get counted for progression balancing,
             #   i.e. the items the players will be checking.
-            sphere_locations = get_sphere_locations(state, unchecked_locations)
+            if sphere_index is None:
+                sphere_index = _SphereIndex(state, unchecked_locations)
+                index_position = 0
+            elif moved_index is not None:
+                sphere_index = moved_index.moved_items(state, unchecked_locations, index_position)
+                index_position = 0
+                moved_index = None
+            sphere_locations = sphere_index[index_position].copy()
             for location in sphere_locations:
                 unchecked_locations.remove(location)
                 if not location.locked:
@@ -694,16 +971,16 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                         and item_percentage(player, reachables) < threshold_percentages[player])
                 }
                 if balancing_players:
-                    balancing_state = state.copy()
-                    balancing_unchecked_locations = unchecked_locations.copy()
+                    balanced_sphere_count += 1
                     balancing_reachables = reachable_locations_count.copy()
-                    balancing_sphere = sphere_locations.copy()
+                    balancing_position = index_position
                     candidate_items: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
+                    # Gather a set of locations which we can swap items into
+                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
                     while True:
                         # Check locations in the current sphere and gather progression items to swap earlier
-                        for location in balancing_sphere:
+                        for location in sphere_index[balancing_position]:
                             if location.advancement:
-                                balancing_state.collect(location.item, True, location)
                                 player = location.item.player
                                 # only replace items that end up in another player's world
                                 if (not location.locked and not location.item.skip_in_prog_balancing and
@@ -712,48 +989,50 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                         location.progress_type != LocationProgressType.PRIORITY):
                                     candidate_items[player].add(location)
                                     logging.debug(f"Candidate item: {location.name}, {location.item.name}")
-                        balancing_sphere = get_sphere_locations(balancing_state, balancing_unchecked_locations)
+                        balancing_position += 1
+                        balancing_sphere = sphere_index[balancing_position]
                         for location in balancing_sphere:
-                            balancing_unchecked_locations.remove(location)
-                            if not location.locked:
-                                balancing_reachables[location.player] += 1
-                        if multiworld.has_beaten_game(balancing_state) or all(
+                            unlocked_locations[location.player].add(location)
+                        for player, count in sphere_index.unlocked_counts[balancing_position].items():
+                            balancing_reachables[player] += count
+                        balancing_beaten = sphere_index.beaten[balancing_position - 1]
+                        if balancing_beaten or all(
                                 item_percentage(player, reachables) >= threshold_percentages[player]
                                 for player, reachables in balancing_reachables.items()
                                 if player in threshold_percentages):
                             break
                         elif not balancing_sphere:
                             raise RuntimeError('Not all required items reachable. Something went terribly wrong here.')
-                    # Gather a set of locations which we can swap items into
-                    unlocked_locations: typing.Dict[int, typing.Set[Location]] = collections.defaultdict(set)
-                    for l in unchecked_locations:
-                        if l not in balancing_unchecked_locations:
-                            unlocked_locations[l.player].add(l)
                     items_to_replace: typing.List[Location] = []
                     for player in balancing_players:
+                        if limit_reached():
+                            break
                         locations_to_test = unlocked_locations[player]
                         items_to_test = list(candidate_items[player])
                         items_to_test.sort()
                         multiworld.random.shuffle(items_to_test)
-                        while items_to_test:
+                        # everything reachable with just the items found to be needed so far, which all the tested
+                        # states contain, so sweeping from it gives the same results as sweeping from state
+                        needed_state = sweep_from_pool(state, locations=list(locations_to_test))
+                        while items_to_test and not limit_reached():
                             testing = items_to_test.pop()
-                            reducing_state = state.copy()
-                            for location in itertools.chain((
-                                l for l in items_to_replace
-                                if l.item.player == player
-                            ), items_to_test):
+                            tested_item_count += 1
+                            reducing_state = needed_state.copy()
+                            for location in items_to_test:
                                 reducing_state.collect(location.item, True, location)
 
                             reducing_state.sweep_for_advancements(locations=locations_to_test)
 
-                            if multiworld.has_beaten_game(balancing_state):
-                                if not multiworld.has_beaten_game(reducing_state):
-                                    items_to_replace.append(testing)
+                            if balancing_beaten:
+                                needed = not multiworld.has_beaten_game(reducing_state)
                             else:
                                 reduced_sphere = get_sphere_locations(reducing_state, locations_to_test)
                                 p = item_percentage(player, reachable_locations_count[player] + len(reduced_sphere))
-                                if p < threshold_percentages[player]:
-                                    items_to_replace.append(testing)
+                                needed = p < threshold_percentages[player]
+                            if needed:
+                                items_to_replace.append(testing)
+                                needed_state.collect(testing.item, True, testing)
+                                needed_state.sweep_for_advancements(locations=locations_to_test)
 
                     old_moved_item_count = moved_item_count
 
@@ -782,6 +1061,8 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
 
                     if old_moved_item_count < moved_item_count:
                         logging.debug(f"Moved {moved_item_count} items so far\n")
+                        # the moved items are collected earlier now, so the spheres after this one change
+                        moved_index = sphere_index
                         unlocked = {fresh for player in balancing_players for fresh in unlocked_locations[player]}
                         for location in get_sphere_locations(state, unlocked):
                             unchecked_locations.remove(location)
@@ -789,16 +1070,26 @@ def balance_multiworld_progression(multiworld: MultiWorld) -> None:
                                 reachable_locations_count[location.player] += 1
                             sphere_locations.add(location)
 
+                    below_threshold.update(
+                        player for player in balancing_players
+                        if item_percentage(player, reachable_locations_count[player]) < threshold_percentages[player])
+
             for location in sphere_locations:
                 if location.advancement:
                     state.collect(location.item, True, location)
             checked_locations |= sphere_locations
+            index_position += 1
 
             if multiworld.has_beaten_game(state):
                 break
             elif not sphere_locations:
                 logging.warning("Progression Balancing ran out of paths.")
                 break
+            elif limit_reached():
+                logging.warning(f"Progression Balancing reached its limit of {test_limit} tested items.")
+                break
+
+        return get_report()
 
 
 def swap_location_item(location_1: Location, location_2: Location, check_locked: bool = True) -> None:
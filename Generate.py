@@ -1,16 +1,24 @@
 from __future__ import annotations
 
 import argparse
+import concurrent.futures
 import copy
 import logging
+import multiprocessing
 import os
+import pickle
+import queue
 import random
+import shutil
 import string
 import sys
+import tempfile
+import time
+import traceback
 import urllib.parse
 import urllib.request
 from collections import Counter
-from typing import Any, Dict, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from itertools import chain
 
 import ModuleUpdate
@@ -23,7 +31,7 @@ from BaseClasses import seeddigits, get_seed, PlandoOptions
 from Utils import parse_yamls, version_tuple, __version__, tuplize_version
 
 
-def mystery_argparse():
+def mystery_argparse(argv: Optional[List[str]] = None):
     from settings import get_settings
     settings = get_settings()
     defaults = settings.generator
@@ -52,7 +60,14 @@ def mystery_argparse():
     parser.add_argument("--skip_output", action="store_true",
                         help="Skips generation assertion and output stages and skips multidata and spoiler output. "
                              "Intended for debugging and testing purposes.")
-    args = parser.parse_args()
+    parser.add_argument("--roll_workers", type=int, default=0,
+                        help="Parse and roll player files in this many processes. Each player file then gets its own "
+                             "random source, so options roll differently than without, but the same for any number "
+                             "of processes.")
+    parser.add_argument("--attempts", type=int, default=1,
+                        help="Generate with this many seeds derived from the seed at once, each in its own process, "
+                             "and keep the first that succeeds. For settings that often fail to fill.")
+    args = parser.parse_args(argv)
     if not os.path.isabs(args.weights_file_path):
         args.weights_file_path = os.path.join(args.player_files_path, args.weights_file_path)
     if not os.path.isabs(args.meta_file_path):
@@ -65,7 +80,7 @@ def get_seed_name(random_source) -> str:
     return f"{random_source.randint(0, pow(10, seeddigits) - 1)}".zfill(seeddigits)
 
 
-def main(args=None) -> Tuple[argparse.Namespace, int]:
+def main(args=None, log_folder: Optional[str] = None) -> Tuple[argparse.Namespace, int]:
     # __name__ == "__main__" check so unittests that already imported worlds don't trip this.
     if __name__ == "__main__" and "worlds" in sys.modules:
         raise Exception("Worlds system should not be loaded before logging init.")
@@ -75,7 +90,7 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
 
     seed = get_seed(args.seed)
 
-    Utils.init_logging(f"Generate_{seed}", loglevel=args.log_level)
+    Utils.init_logging(f"Generate_{seed}", loglevel=args.log_level, log_folder=log_folder)
     random.seed(seed)
     seed_name = get_seed_name(random)
 
@@ -83,6 +98,19 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
         logging.info("Race mode enabled. Using non-deterministic random source.")
         random.seed()  # reset to time-based random source
 
+    pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+    if args.roll_workers:
+        pool = concurrent.futures.ProcessPoolExecutor(args.roll_workers)
+    try:
+        return roll_player_files(args, seed, seed_name, pool)
+    finally:
+        if pool:
+            pool.shutdown()
+
+
+def roll_player_files(args: argparse.Namespace, seed: int, seed_name: str,
+                      pool: Optional[concurrent.futures.ProcessPoolExecutor]) -> Tuple[argparse.Namespace, int]:
+    """Reads the weights, meta and player files and rolls the settings of all players, in pool if there is one."""
     weights_cache: Dict[str, Tuple[Any, ...]] = {}
     if args.weights_file_path and os.path.exists(args.weights_file_path):
         try:
@@ -108,15 +136,19 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
         meta_weights = None
     player_id = 1
     player_files = {}
+    player_file_paths: Dict[str, str] = {}
     for file in os.scandir(args.player_files_path):
         fname = file.name
         if file.is_file() and not fname.startswith(".") and \
                 os.path.join(args.player_files_path, fname) not in {args.meta_file_path, args.weights_file_path}:
-            path = os.path.join(args.player_files_path, fname)
-            try:
-                weights_cache[fname] = read_weights_yamls(path)
-            except Exception as e:
-                raise ValueError(f"File {fname} is invalid. Please fix your yaml.") from e
+            player_file_paths[fname] = os.path.join(args.player_files_path, fname)
+    if pool:
+        read_futures = {fname: pool.submit(read_weights_yamls, path) for fname, path in player_file_paths.items()}
+    for fname, path in player_file_paths.items():
+        try:
+            weights_cache[fname] = read_futures[fname].result() if pool else read_weights_yamls(path)
+        except Exception as e:
+            raise ValueError(f"File {fname} is invalid. Please fix your yaml.") from e
 
     # sort dict for consistent results across platforms:
     weights_cache = {key: value for key, value in sorted(weights_cache.items(), key=lambda k: k[0].casefold())}
@@ -144,7 +176,7 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
                         f"Provide a general weights file ({args.weights_file_path}) or individual player files. "
                         f"A mix is also permitted.")
 
-    from worlds.AutoWorld import AutoWorldRegister
+    from worlds import network_data_package
     from worlds.alttp.EntranceRandomizer import parse_arguments
     erargs = parse_arguments(['--multi', str(args.multi)])
     erargs.seed = seed
@@ -158,9 +190,17 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
     erargs.name = {}
     erargs.csv_output = args.csv_output
 
-    settings_cache: Dict[str, Tuple[argparse.Namespace, ...]] = \
-        {fname: (tuple(roll_settings(yaml, args.plando) for yaml in yamls) if args.sameoptions else None)
-         for fname, yamls in weights_cache.items()}
+    settings_cache: Dict[str, Optional[Tuple[argparse.Namespace, ...]]]
+    if pool and args.sameoptions:
+        roll_seeds = {fname: random.getrandbits(64) for fname in weights_cache}
+        roll_futures = {fname: pool.submit(roll_settings_batch, yamls, args.plando, roll_seeds[fname])
+                        for fname, yamls in weights_cache.items()}
+        settings_cache = {fname: get_rolled_settings(future, weights_cache[fname], args.plando, roll_seeds[fname])
+                          for fname, future in roll_futures.items()}
+    else:
+        settings_cache = \
+            {fname: (tuple(roll_settings(yaml, args.plando) for yaml in yamls) if args.sameoptions else None)
+             for fname, yamls in weights_cache.items()}
 
     if meta_weights:
         for category_name, category_dict in meta_weights.items():
@@ -171,7 +211,7 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
                         for yaml in weights_cache[path]:
                             if category_name is None:
                                 for category in yaml:
-                                    if category in AutoWorldRegister.world_types and \
+                                    if category in network_data_package["games"] and \
                                             key in Options.CommonOptions.type_hints:
                                         yaml[category][key] = option
                             elif category_name not in yaml:
@@ -185,13 +225,30 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
     name_counter = Counter()
     erargs.player_options = {}
 
+    # first player of each player file -> its random seed and settings being rolled in the pool, in order of players
+    player_rolls: Dict[int, Tuple[int, concurrent.futures.Future]] = {}
+    if pool and not args.sameoptions:
+        player = 1
+        while player <= args.multi and player_path_cache[player]:
+            path = player_path_cache[player]
+            roll_seed = random.getrandbits(64)
+            player_rolls[player] = roll_seed, pool.submit(roll_settings_batch, weights_cache[path], args.plando,
+                                                          roll_seed)
+            player += max(len(weights_cache[path]), 1)
+
     player = 1
     while player <= args.multi:
         path = player_path_cache[player]
         if path:
             try:
-                settings: Tuple[argparse.Namespace, ...] = settings_cache[path] if settings_cache[path] else \
-                    tuple(roll_settings(yaml, args.plando) for yaml in weights_cache[path])
+                settings: Tuple[argparse.Namespace, ...]
+                if settings_cache[path]:
+                    settings = settings_cache[path]
+                elif player in player_rolls:
+                    roll_seed, future = player_rolls[player]
+                    settings = get_rolled_settings(future, weights_cache[path], args.plando, roll_seed)
+                else:
+                    settings = tuple(roll_settings(yaml, args.plando) for yaml in weights_cache[path])
                 for settingsObject in settings:
                     for k, v in vars(settingsObject).items():
                         if v is not None:
@@ -213,7 +270,6 @@ def main(args=None) -> Tuple[argparse.Namespace, int]:
                 raise ValueError(f"File {path} is invalid. Please fix your yaml.") from e
         else:
             raise RuntimeError(f'No weights specified for player {player}')
-
     if len(set(name.lower() for name in erargs.name.values())) != len(erargs.name):
         raise Exception(f"Names have to be unique. Names: {Counter(name.lower() for name in erargs.name.values())}")
 
@@ -233,6 +289,135 @@ def read_weights_yamls(path) -> Tuple[Any, ...]:
     return tuple(parse_yamls(yaml))
 
 
+def roll_settings_batch(yamls: Tuple[Any, ...], plando_options: PlandoOptions, roll_seed: int) \
+        -> Tuple[Tuple[str, ...], Optional[bytes]]:
+    """
+    Rolls the settings of all yamls of a player file in a worker process of --roll_workers, with its own random source.
+    Returns the rolled games along with the pickled settings, so the worlds of the games can be loaded before unpickling,
+    or None instead of the settings if they can't be pickled.
+    """
+    settings = roll_settings_seeded(yamls, plando_options, roll_seed)
+    games = tuple(settings_object.game for settings_object in settings)
+    try:
+        return games, pickle.dumps(settings)
+    except (pickle.PicklingError, AttributeError, TypeError):  # options created at runtime
+        return games, None
+
+
+def get_rolled_settings(future: concurrent.futures.Future, yamls: Tuple[Any, ...], plando_options: PlandoOptions,
+                        roll_seed: int) -> Tuple[argparse.Namespace, ...]:
+    """Returns the settings rolled by roll_settings_batch, rolling them again here if they couldn't be pickled."""
+    from worlds import load_games
+
+    games, settings = future.result()
+    load_games(games)
+    if settings is not None:
+        return pickle.loads(settings)
+    return roll_settings_seeded(yamls, plando_options, roll_seed)
+
+
+def roll_settings_seeded(yamls: Tuple[Any, ...], plando_options: PlandoOptions, roll_seed: int) \
+        -> Tuple[argparse.Namespace, ...]:
+    """Rolls the settings of all yamls of a player file with the random source seeded with roll_seed, then restores
+    the random source, so the settings of --roll_workers don't depend on which process rolls them."""
+    random_state = random.getstate()
+    try:
+        random.seed(roll_seed)
+        return tuple(roll_settings(yaml, plando_options) for yaml in yamls)
+    finally:
+        random.setstate(random_state)
+
+
+def get_attempt_seeds(seed: int, attempts: int) -> List[int]:
+    """The seeds of --attempts, starting with seed itself so the first attempt generates as it would without."""
+    seed_source = random.Random(seed)
+    return [seed, *(seed_source.randint(0, pow(10, seeddigits) - 1) for _ in range(attempts - 1))]
+
+
+def run_attempt(erargs: argparse.Namespace, seed: int, attempt: int, results: multiprocessing.Queue,
+                loglevel: int, log_folder: Optional[str]) -> None:
+    """Generates a single attempt of --attempts in its own process and reports its failure reason, or None."""
+    # every attempt logs to its own file
+    with Utils.silenced_stdout():
+        Utils.init_logging(f"Generate_{erargs.seed}_attempt_{attempt}", loglevel=loglevel, log_folder=log_folder)
+        from Main import main as ERmain
+        try:
+            ERmain(erargs, seed)
+        except Exception as e:
+            logging.exception(f"Attempt {attempt} with seed {seed} failed.")
+            results.put((attempt, traceback.format_exception_only(type(e), e)[-1].strip()))
+        else:
+            results.put((attempt, None))
+
+
+def generate_attempts(erargs: argparse.Namespace, seed: int, attempts: int, log_folder: Optional[str] = None) -> int:
+    """
+    Generates the rolled settings with as many seeds as attempts at once, each in its own process. The output of the
+    first attempt that succeeds is kept and the others get stopped. Logs why the attempts that finished before it
+    failed, and raises if all of them did. Returns the seed of the attempt that succeeded.
+    Each attempt writes its own log to log_folder, or the logs folder if that is None.
+    """
+    attempt_seeds = get_attempt_seeds(seed, attempts)
+    # forked attempts start with the worlds already imported and don't need the settings to be pickled
+    context = Utils.get_fork_context()
+    results = context.Queue()
+    os.makedirs(erargs.outputpath, exist_ok=True)
+    logging.info(f"Generating {attempts} attempts with seeds {', '.join(map(str, attempt_seeds))}.")
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="attempts_", dir=erargs.outputpath) as attempts_dir:
+        processes: List[multiprocessing.Process] = []
+        for attempt, attempt_seed in enumerate(attempt_seeds):
+            attempt_args = copy.copy(erargs)
+            attempt_args.outputpath = os.path.join(attempts_dir, str(attempt))
+            process = context.Process(target=run_attempt, name=f"Attempt {attempt}", daemon=True,
+                                      args=(attempt_args, attempt_seed, attempt, results, logging.getLogger().level,
+                                            log_folder))
+            process.start()
+            processes.append(process)
+
+        pending = set(range(attempts))
+        failures: Dict[int, str] = {}
+        winner: Optional[int] = None
+        try:
+            while pending and winner is None:
+                try:
+                    reports = [results.get(timeout=1)]
+                except queue.Empty:
+                    # results get sent before a process exits, so those that exited without one have crashed
+                    exited = {attempt for attempt in pending if processes[attempt].exitcode is not None}
+                    reports = []
+                    while not results.empty():
+                        reports.append(results.get())
+                    reported = {attempt for attempt, _ in reports}
+                    reports += [(attempt, f"Process exited with code {processes[attempt].exitcode}")
+                                for attempt in exited - reported]
+                for attempt, error in reports:
+                    pending.discard(attempt)
+                    if error is None:
+                        if winner is None:
+                            winner = attempt
+                    else:
+                        failures[attempt] = error
+                        logging.warning(f"Attempt {attempt} with seed {attempt_seeds[attempt]} failed: {error}")
+        finally:
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+                process.join()
+
+        if winner is None:
+            raise Exception(f"All {attempts} attempts failed, see the log of each attempt for details.")
+        if pending - {winner}:
+            logging.info(f"Stopped attempts {', '.join(map(str, sorted(pending - {winner})))}.")
+        winner_dir = os.path.join(attempts_dir, str(winner))
+        if os.path.isdir(winner_dir):
+            for file in os.scandir(winner_dir):
+                shutil.move(file.path, os.path.join(erargs.outputpath, file.name))
+    logging.info(f"Attempt {winner} with seed {attempt_seeds[winner]} succeeded after "
+                 f"{time.perf_counter() - start:.2f}s, {len(failures)} attempts failed before it.")
+    return attempt_seeds[winner]
+
+
 def interpret_on_off(value) -> bool:
     return {"on": True, "off": False}.get(value, value)
 
@@ -342,10 +527,11 @@ def update_weights(weights: dict, new_weights: dict, update_type: str, name: str
 
 
 def roll_meta_option(option_key, game: str, category_dict: Dict) -> Any:
-    from worlds import AutoWorldRegister
+    from worlds import AutoWorldRegister, load_games
 
     if not game:
         return get_choice(option_key, category_dict)
+    load_games((game,))
     if game in AutoWorldRegister.world_types:
         game_world = AutoWorldRegister.world_types[game]
         options = game_world.options_dataclass.type_hints
@@ -426,7 +612,7 @@ def handle_option(ret: argparse.Namespace, game_weights: dict, option_key: str,
 
 
 def roll_settings(weights: dict, plando_options: PlandoOptions = PlandoOptions.bosses):
-    from worlds import AutoWorldRegister
+    from worlds import AutoWorldRegister, load_games, network_data_package
 
     if "linked_options" in weights:
         weights = roll_linked_options(weights)
@@ -453,9 +639,11 @@ def roll_settings(weights: dict, plando_options: PlandoOptions = PlandoOptions.b
             raise Exception(f"Option {option_key} has to be in a game's section, not on its own.")
 
     ret.game = get_choice("game", weights)
+    load_games((ret.game,))
     if ret.game not in AutoWorldRegister.world_types:
         from worlds import failed_world_loads
-        picks = Utils.get_fuzzy_results(ret.game, list(AutoWorldRegister.world_types) + failed_world_loads, limit=1)[0]
+        picks = Utils.get_fuzzy_results(ret.game, list(network_data_package["games"]) + failed_world_loads,
+                                        limit=1)[0]
         if picks[0] in failed_world_loads:
             raise Exception(f"No functional world found to handle game {ret.game}. "
                             f"Did you mean '{picks[0]}' ({picks[1]}% sure)? "
@@ -526,17 +714,23 @@ def roll_alttp_settings(ret: argparse.Namespace, weights):
 if __name__ == '__main__':
     import atexit
     confirmation = atexit.register(input, "Press enter to close.")
-    erargs, seed = main()
-    from Main import main as ERmain
-    multiworld = ERmain(erargs, seed)
-    if __debug__:
-        import gc
-        import sys
-        import weakref
-        weak = weakref.ref(multiworld)
-        del multiworld
-        gc.collect()  # need to collect to deref all hard references
-        assert not weak(), f"MultiWorld object was not de-allocated, it's referenced {sys.getrefcount(weak())} times." \
-                           " This would be a memory leak."
+    # only load the worlds of the games that get rolled
+    os.environ.setdefault("ARCHIPELAGO_LAZY_WORLDS", "1")
+    args = mystery_argparse()
+    erargs, seed = main(args)
+    if args.attempts > 1:
+        generate_attempts(erargs, seed, args.attempts)
+    else:
+        from Main import main as ERmain
+        multiworld = ERmain(erargs, seed)
+        if __debug__:
+            import gc
+            import sys
+            import weakref
+            weak = weakref.ref(multiworld)
+            del multiworld
+            gc.collect()  # need to collect to deref all hard references
+            assert not weak(), f"MultiWorld object was not de-allocated, it's referenced {sys.getrefcount(weak())} " \
+                               "times. This would be a memory leak."
     # in case of error-free exit should not need confirmation
     atexit.unregister(confirmation)
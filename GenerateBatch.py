@@ -0,0 +1,165 @@
+"""
+Generates many seeds from one or more sets of player files with a pool of warm worker processes, which import worlds
+once instead of once per seed. Meant for bulk test generation, for example:
+  python GenerateBatch.py --player_files_path Players --count 500 --workers 8 --skip_output --report batch.json
+Arguments that aren't listed in --help are passed on to Generate.py for each seed.
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import gc
+import json
+import logging
+import os
+import sys
+import time
+import traceback
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import ModuleUpdate
+
+ModuleUpdate.update()
+
+import Utils
+
+
+class ClassStateSnapshot:
+    """
+    Class attributes of the classes a generation runs through, such as CollectionState.additional_init_functions and
+    those of all worlds, to undo what a generation changed about them before the next one runs in the same process.
+    Lists, dicts and sets are restored in place, but only shallowly.
+    """
+    _missing = object()
+
+    def __init__(self, classes: Iterable[type]) -> None:
+        self.attributes: Dict[type, Dict[str, Tuple[Any, Any]]] = {
+            cls: {name: (value, copy.copy(value) if type(value) in (list, dict, set) else None)
+                  for name, value in vars(cls).items()}
+            for cls in classes
+        }
+
+    @classmethod
+    def of_generation_classes(cls) -> ClassStateSnapshot:
+        from BaseClasses import CollectionState, MultiWorld
+        from worlds.AutoWorld import AutoWorldRegister
+        return cls((CollectionState, MultiWorld, *AutoWorldRegister.world_types.values()))
+
+    def restore(self) -> List[str]:
+        """Restores the class attributes and returns the names of those that had changed."""
+        changed: List[str] = []
+        for cls, attributes in self.attributes.items():
+            for name in set(vars(cls)) - attributes.keys():
+                delattr(cls, name)
+                changed.append(f"{cls.__name__}.{name}")
+            for name, (value, contents) in attributes.items():
+                if vars(cls).get(name, self._missing) is not value:
+                    setattr(cls, name, value)
+                    changed.append(f"{cls.__name__}.{name}")
+                if contents is not None and value != contents:
+                    if isinstance(value, list):
+                        value[:] = contents
+                    else:
+                        value.clear()
+                        value.update(contents)
+                    changed.append(f"{cls.__name__}.{name}")
+        return changed
+
+
+# taken before forking the workers, or when they start if they can't be forked
+class_state: Optional[ClassStateSnapshot] = None
+
+
+def init_worker() -> None:
+    global class_state
+    if class_state is None:
+        import worlds  # noqa: F401
+        class_state = ClassStateSnapshot.of_generation_classes()
+
+
+def generate_seed(player_files_path: str, seed: int, generate_args: List[str],
+                  log_folder: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Generates a single seed in a worker and returns its result with timings, or the error it failed with.
+    The generation logs to log_folder, or the logs folder if that is None.
+    """
+    import Generate
+    import Main
+
+    assert class_state, "Worker was not initialized"
+    changed = class_state.restore()
+    if changed:
+        logging.debug(f"Restored class attributes changed by the previous generation: {', '.join(changed)}")
+
+    result: Dict[str, Any] = {"player_files_path": player_files_path, "seed": seed, "success": False, "error": None,
+                              "generate_time": None, "time": None}
+    start = time.perf_counter()
+    try:
+        args = Generate.mystery_argparse(["--player_files_path", player_files_path, "--seed", str(seed),
+                                          *generate_args])
+        erargs, seed = Generate.main(args, log_folder)
+        result["generate_time"] = round(time.perf_counter() - start, 4)
+        Main.main(erargs, seed)
+        result["success"] = True
+    except Exception:
+        logging.exception(f"Generation of seed {seed} failed.")
+        result["error"] = traceback.format_exc()
+    result["time"] = round(time.perf_counter() - start, 4)
+    gc.collect()
+    return result
+
+
+def generate_seed_job(job: Tuple[str, int, List[str]]) -> Dict[str, Any]:
+    # every generation logs to its own file through Generate.main
+    with Utils.silenced_stdout():
+        return generate_seed(*job)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generates many seeds with warm worker processes.")
+    parser.add_argument("--player_files_path", nargs="+", required=True,
+                        help="Folders with player files, each of them gets generated --count times.")
+    parser.add_argument("--count", type=int, default=1, help="How many seeds to generate per folder.")
+    parser.add_argument("--seed", type=int, help="Seed of the first generation, following ones count up from it.")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1))
+    parser.add_argument("--report", help="Where to write a JSON report of all generations.")
+    args, generate_args = parser.parse_known_args(argv)
+
+    from BaseClasses import get_seed
+    first_seed = get_seed(args.seed)
+    jobs = [(path, first_seed + index, generate_args)
+            for path in args.player_files_path for index in range(args.count)]
+
+    Utils.init_logging("GenerateBatch")
+    logger = logging.getLogger("GenerateBatch")
+    global class_state
+    import worlds  # noqa: F401
+    class_state = ClassStateSnapshot.of_generation_classes()
+
+    # forked workers start with the worlds already imported
+    context = Utils.get_fork_context()
+    results: List[Dict[str, Any]] = []
+    start = time.perf_counter()
+    logger.info(f"Generating {len(jobs)} seeds with {args.workers} workers.")
+    with context.Pool(args.workers, initializer=init_worker) as pool:
+        for result in pool.imap_unordered(generate_seed_job, jobs):
+            results.append(result)
+            if result["success"]:
+                logger.info(f"[{len(results)}/{len(jobs)}] Seed {result['seed']} of {result['player_files_path']} "
+                            f"done in {result['time']:.2f}s.")
+            else:
+                logger.error(f"[{len(results)}/{len(jobs)}] Seed {result['seed']} of {result['player_files_path']} "
+                             f"failed: {result['error'].strip().splitlines()[-1]}")
+
+    failures = [result for result in results if not result["success"]]
+    logger.info(f"Generated {len(results) - len(failures)} of {len(results)} seeds "
+                f"in {time.perf_counter() - start:.2f}s, {len(failures)} failed.")
+    if args.report:
+        results.sort(key=lambda result: (args.player_files_path.index(result["player_files_path"]), result["seed"]))
+        with open(args.report, "w") as f:
+            json.dump({"version": Utils.__version__, "results": results}, f, indent=2)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
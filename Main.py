@@ -1,26 +1,75 @@
 import collections
 import concurrent.futures
+import contextlib
 import logging
+import multiprocessing
 import os
-import pickle
 import tempfile
+import threading
 import time
 import zipfile
-import zlib
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 
 import worlds
 from BaseClasses import CollectionState, Item, Location, LocationProgressType, MultiWorld, Region
 from Fill import FillError, balance_multiworld_progression, distribute_items_restrictive, distribute_planned, \
     flood_items
 from Options import StartInventoryPool
-from Utils import __version__, output_path, version_tuple, get_settings
+from Utils import __version__, encode_multidata, output_path, version_tuple, get_settings
 from settings import get_settings
 from worlds import AutoWorld
 from worlds.generic.Rules import exclusion_rules, locality_rules
 
 __all__ = ["main"]
 
+# the multiworld of a forked output process, see start_output_processes
+_output_multiworld: Optional[MultiWorld] = None
+
+
+def _init_output_process(multiworld: MultiWorld) -> None:
+    global _output_multiworld
+    _output_multiworld = multiworld
+
+
+def _generate_output_in_process(player: int, output_directory: str) -> Dict[str, Any]:
+    assert _output_multiworld, "Output process was not initialized"
+    AutoWorld.call_single(_output_multiworld, "generate_output", player, output_directory)
+    world = _output_multiworld.worlds[player]
+    return {name: getattr(world, name) for name in world.output_attributes
+            if hasattr(world, name) and not isinstance(getattr(world, name), threading.Event)}
+
+
+def start_output_processes(multiworld: MultiWorld, players: List[int], output_directory: str, processes: int) \
+        -> Tuple[Optional[concurrent.futures.ProcessPoolExecutor], Dict[int, concurrent.futures.Future]]:
+    """
+    Starts generate_output of the players with a process_safe_output world in up to `processes` processes, forked
+    with a copy of the multiworld as it is now. Forking only carries over the calling thread, so this has to happen
+    before other threads get started. Returns no pool and no futures if processes can't be forked here.
+    """
+    players = [player for player in players if multiworld.worlds[player].process_safe_output]
+    # daemonic processes, like the workers of GenerateBatch.py, can't have children
+    if not processes or not players or "fork" not in multiprocessing.get_all_start_methods() \
+            or multiprocessing.current_process().daemon:
+        return None, {}
+    pool = concurrent.futures.ProcessPoolExecutor(min(processes, len(players)), multiprocessing.get_context("fork"),
+                                                  initializer=_init_output_process, initargs=(multiworld,))
+    return pool, {player: pool.submit(_generate_output_in_process, player, output_directory) for player in players}
+
+
+def collect_process_output(world: AutoWorld.World, future: concurrent.futures.Future) -> None:
+    """
+    Waits for generate_output of a world in its process and takes over the output_attributes it set, then sets the
+    threading.Event ones, also if it failed, as generate_output does in a thread.
+    """
+    try:
+        for name, value in future.result().items():
+            setattr(world, name, value)
+    finally:
+        for name in world.output_attributes:
+            event = getattr(world, name, None)
+            if isinstance(event, threading.Event):
+                event.set()
+
 
 def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = None):
     if not baked_server_options:
@@ -216,7 +265,7 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     AutoWorld.call_all(multiworld, 'post_fill')
 
     if multiworld.players > 1 and not args.skip_prog_balancing:
-        balance_multiworld_progression(multiworld)
+        balance_multiworld_progression(multiworld, get_settings().generator.progression_balancing_limit)
     else:
         logger.info("Progression balancing skipped.")
 
@@ -230,18 +279,29 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
     logger.info(f'Beginning output...')
     outfilebase = 'AP_' + multiworld.seed_name
 
+    # shared by the accessibility check, the multidata's spheres and the playthrough
+    multiworld.analyze_spheres(keep_states=args.spoiler > 1)
+
     output = tempfile.TemporaryDirectory()
     with output as temp_dir:
         output_players = [player for player in multiworld.player_ids if AutoWorld.World.generate_output.__code__
                           is not multiworld.worlds[player].generate_output.__code__]
-        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool:
+        # forked before the thread pool starts its threads
+        process_pool, process_futures = start_output_processes(multiworld, output_players, temp_dir,
+                                                               get_settings().generator.output_processes)
+        with concurrent.futures.ThreadPoolExecutor(len(output_players) + 2) as pool, \
+                process_pool or contextlib.nullcontext():
             check_accessibility_task = pool.submit(multiworld.fulfills_accessibility)
 
             output_file_futures = [pool.submit(AutoWorld.call_stage, multiworld, "generate_output", temp_dir)]
             for player in output_players:
                 # skip starting a thread for methods that say "pass".
-                output_file_futures.append(
-                    pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
+                if player in process_futures:
+                    output_file_futures.append(
+                        pool.submit(collect_process_output, multiworld.worlds[player], process_futures[player]))
+                else:
+                    output_file_futures.append(
+                        pool.submit(AutoWorld.call_single, multiworld, "generate_output", player, temp_dir))
 
             # collect ER hint info
             er_hint_data: Dict[int, Dict[int, str]] = {}
@@ -342,11 +402,8 @@ def main(args, seed=None, baked_server_options: Optional[Dict[str, object]] = No
                 }
                 AutoWorld.call_all(multiworld, "modify_multidata", multidata)
 
-                multidata = zlib.compress(pickle.dumps(multidata), 9)
-
                 with open(os.path.join(temp_dir, f'{outfilebase}.archipelago'), 'wb') as f:
-                    f.write(bytes([3]))  # version of format
-                    f.write(multidata)
+                    f.write(encode_multidata(multidata))
 
             output_file_futures.append(pool.submit(write_multidata))
             if not check_accessibility_task.result():
@@ -13,6 +13,7 @@ import itertools
 import logging
 import math
 import operator
+import os
 import pickle
 import random
 import shlex
@@ -46,6 +47,10 @@ from NetUtils import Endpoint, ClientStatus, NetworkItem, decode, encode, Networ
 min_client_version = Version(0, 1, 6)
 colorama.init()
 
+# (game, checksum) -> encoded package, shared by all Contexts of the process to answer GetDataPackage without encoding
+# the same packages again, see Context.get_data_package_msg
+encoded_game_packages: typing.Dict[typing.Tuple[str, str], str] = {}
+
 
 def remove_from_list(container, value):
     try:
@@ -131,9 +136,18 @@ class Client(Endpoint):
         self.slot = None
         self.send_index = 0
         self.tags = []
+        self.outbox: typing.List[str] = []
+        # registered through SetNotify, to unregister them again on disconnect
+        self.stored_data_notification_keys: typing.Set[str] = set()
+        self.stored_data_notification_prefixes: typing.Set[str] = set()
         self.messageprocessor = client_message_processor(ctx, self)
         self.ctx = weakref.ref(ctx)
 
+    @property
+    def batches_messages(self) -> bool:
+        """If messages to this client get sent together in one frame, see Context.queue_encoded_msgs."""
+        return "NoBatching" not in self.tags
+
     @property
     def items_handling(self):
         if self.no_items:
@@ -159,6 +173,137 @@ class Client(Endpoint):
 team_slot = typing.Tuple[int, int]
 
 
+def batch_encoded_msgs(msgs: typing.Iterable[str], max_size: int) -> typing.Generator[str, None, None]:
+    """Joins encoded lists of messages into as few lists as possible, each below max_size unless a single one isn't."""
+    parts: typing.List[str] = []
+    size = 0
+    for msg in msgs:
+        part = msg[1:-1].strip()
+        if not part:
+            continue
+        if parts and size + len(part) + 1 > max_size:
+            yield f"[{','.join(parts)}]"
+            parts = []
+            size = 0
+        parts.append(part)
+        size += len(part) + 1
+    if parts:
+        yield f"[{','.join(parts)}]"
+
+
+class SaveJournal:
+    """
+    Append-only log of the changes to the save since the last full save, so saving costs as much as what changed
+    instead of as much as the whole save. Each entry is its length as a little-endian uint32, followed by its
+    generation and operations as a zlib-compressed pickle. Entries only apply to the full save of their generation,
+    so entries written before a full save aren't applied on top of it again if the journal couldn't be truncated.
+    """
+    # after the journal outgrew both, it gets compacted into a new full save
+    min_compaction_size = 64 * 1024
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.generation = 0
+        self.size = 0
+        self.save_size = 0
+        self.changed: typing.Dict[str, typing.Set[typing.Any]] = collections.defaultdict(set)
+        self.new_checks: typing.Dict[team_slot, typing.Set[int]] = collections.defaultdict(set)
+        self.saved_item_counts: typing.Dict[typing.Tuple[int, int, bool], int] = {}
+        self.saved_game_options: typing.Dict[str, typing.Any] = {}
+
+    def record(self, section: str, key: typing.Any, added: typing.Optional[typing.Iterable[int]] = None) -> None:
+        if added is None:
+            self.changed[section].add(key)
+        else:
+            self.new_checks[key].update(added)
+
+    def needs_compaction(self) -> bool:
+        return self.size > max(self.save_size, self.min_compaction_size)
+
+    def get_operations(self, ctx: Context) -> typing.List[typing.Tuple[typing.Any, ...]]:
+        """Turns what was recorded since the last entry into operations on the save data, see apply_operations."""
+        operations: typing.List[typing.Tuple[typing.Any, ...]] = [
+            ("update", "location_checks", key, locations) for key, locations in self.new_checks.items()]
+        for section, keys in self.changed.items():
+            values = getattr(ctx, section)
+            for key in keys:
+                if section == "received_items":
+                    start = self.saved_item_counts.get(key, 0)
+                    self.saved_item_counts[key] = len(values[key])
+                    operations.append(("extend", section, key, values[key][start:]))
+                elif section == "random":
+                    operations.append(("set", None, "random_state", values.getstate()))
+                elif section in ("client_activity_timers", "client_connection_timers"):
+                    # saved as pairs of key and timestamp
+                    operations.append(("set_pair", section, key, values[key].timestamp()))
+                elif key in values:
+                    operations.append(("set", section, key, values[key]))
+                else:
+                    operations.append(("delete", section, key))
+        game_options = ctx.get_game_options()
+        if game_options != self.saved_game_options:
+            self.saved_game_options = game_options
+            operations.append(("set", None, "game_options", game_options))
+        self.changed.clear()
+        self.new_checks.clear()
+        return operations
+
+    @staticmethod
+    def apply_operations(save_data: typing.Dict[str, typing.Any],
+                         operations: typing.Iterable[typing.Tuple[typing.Any, ...]]) -> None:
+        for operation, section, key, *value in operations:
+            target = save_data if section is None else save_data[section]
+            if operation == "set":
+                target[key] = value[0]
+            elif operation == "delete":
+                target.pop(key, None)
+            elif operation == "update":
+                target.setdefault(key, set()).update(value[0])
+            elif operation == "extend":
+                target.setdefault(key, []).extend(value[0])
+            elif operation == "set_pair":
+                save_data[section] = (*(pair for pair in target if tuple(pair[0]) != key), (key, value[0]))
+
+    def write(self, ctx: Context) -> None:
+        operations = self.get_operations(ctx)
+        if operations:
+            entry = zlib.compress(pickle.dumps((self.generation, operations)))
+            with open(self.path, "ab") as f:
+                f.write(len(entry).to_bytes(4, "little") + entry)
+            self.size += 4 + len(entry)
+
+    def read(self, save_data: typing.Dict[str, typing.Any]) -> int:
+        """Applies the entries of the generation of save_data to it and returns how many there were."""
+        generation = save_data.get("journal_generation", 0)
+        count = 0
+        try:
+            with open(self.path, "rb") as f:
+                while length := f.read(4):
+                    entry = f.read(int.from_bytes(length, "little"))
+                    if len(length) < 4 or len(entry) < int.from_bytes(length, "little"):
+                        logging.warning(f"Ignoring incomplete entry at the end of {self.path}.")
+                        break
+                    entry_generation, operations = restricted_loads(zlib.decompress(entry))
+                    if entry_generation == generation:
+                        self.apply_operations(save_data, operations)
+                        count += 1
+        except FileNotFoundError:
+            pass
+        return count
+
+    def reset(self, ctx: Context, generation: int, save_size: int) -> None:
+        """Starts over after a full save of generation, which is what the journal then records changes to."""
+        with open(self.path, "wb"):
+            pass
+        self.generation = generation
+        self.size = 0
+        self.save_size = save_size
+        self.changed.clear()
+        self.new_checks.clear()
+        self.saved_item_counts = {key: len(items) for key, items in ctx.received_items.items()}
+        self.saved_game_options = ctx.get_game_options()
+
+
 class Context:
     dumper = staticmethod(encode)
     loader = staticmethod(decode)
@@ -181,7 +326,10 @@ class Context:
     save_version = 2
     stored_data: typing.Dict[str, object]
     read_data: typing.Dict[str, object]
+    read_data_cache: typing.Dict[str, object]
     stored_data_notification_clients: typing.Dict[str, typing.Set[Client]]
+    stored_data_prefix_notification_clients: typing.Dict[int, typing.Dict[str, typing.Set[Client]]]
+    """by length of the prefix, then by the prefix"""
     slot_info: typing.Dict[int, NetworkSlot]
     generator_version = Version(0, 0, 0)
     checksums: typing.Dict[str, str]
@@ -208,6 +356,11 @@ class Context:
         self.slot_info = {}
         self.log_network = log_network
         self.endpoints = []
+        # seconds that broadcasts to a client get collected for before they are sent as one frame,
+        # 0 sends them at the end of the current event loop iteration
+        self.batch_window: float = 0
+        self.outbox_clients: typing.List[Client] = []
+        self.outbox_flush: typing.Optional[asyncio.Handle] = None
         self.clients = {}
         self.compatibility: int = compatibility
         self.shutdown_task = None
@@ -232,6 +385,9 @@ class Context:
         self.location_check_points = location_check_points
         self.hints_used = collections.defaultdict(int)
         self.hints: typing.Dict[team_slot, typing.Set[NetUtils.Hint]] = collections.defaultdict(set)
+        # (team, finding player, location) of hints that aren't found yet -> slots that have them and the hint
+        self.unfound_hints: typing.Dict[typing.Tuple[int, int, int], typing.Set[typing.Tuple[int, NetUtils.Hint]]] \
+            = collections.defaultdict(set)
         self.release_mode: str = release_mode
         self.remaining_mode: str = remaining_mode
         self.collect_mode: str = collect_mode
@@ -250,6 +406,7 @@ class Context:
         self.auto_save_interval = 60  # in seconds
         self.auto_saver_thread: typing.Optional[threading.Thread] = None
         self.save_dirty = False
+        self.journal: typing.Optional[SaveJournal] = None
         self.tags = ['AP']
         self.games: typing.Dict[int, str] = {}
         self.minimum_client_versions: typing.Dict[int, Version] = {}
@@ -258,9 +415,13 @@ class Context:
         self.group_collected: typing.Dict[int, typing.Set[int]] = {}
         self.random = random.Random()
         self.stored_data = {}
-        self.stored_data_notification_clients = collections.defaultdict(weakref.WeakSet)
+        self.stored_data_notification_clients = {}
+        self.stored_data_prefix_notification_clients = {}
         self.read_data = {}
-        self.spheres = []
+        self.read_data_cache = {}
+        self._spheres: typing.Union[typing.List[typing.Dict[int, typing.Set[int]]],
+                                    typing.Callable[[], typing.List[typing.Dict[int, typing.Set[int]]]]] = []
+        self.spheres_indexed: typing.Optional[bool] = None
 
         # init empty to satisfy linter, I suppose
         self.gamespackage = {}
@@ -276,7 +437,11 @@ class Context:
     # Data package retrieval
     def _load_game_data(self):
         import worlds
-        self.gamespackage = worlds.network_data_package["games"]
+        # without the groups, which aren't sent to clients. The packages are shared with worlds.world_manifest and
+        # other Contexts of this process, so they're copied instead of changed
+        self.gamespackage = {game_name: {key: value for key, value in game_package.items()
+                                         if key not in ("item_name_groups", "location_name_groups")}
+                             for game_name, game_package in worlds.network_data_package["games"].items()}
 
         self.item_name_groups = {world_name: world.item_name_groups for world_name, world in
                                  worlds.AutoWorldRegister.world_types.items()}
@@ -284,11 +449,15 @@ class Context:
                                      worlds.AutoWorldRegister.world_types.items()}
         for world_name, world in worlds.AutoWorldRegister.world_types.items():
             self.non_hintable_names[world_name] = world.hint_blacklist
-
-        for game_package in self.gamespackage.values():
-            # remove groups from data sent to clients
-            del game_package["item_name_groups"]
-            del game_package["location_name_groups"]
+        for game_name, entry in worlds.world_manifest.items():
+            # worlds that aren't loaded with worlds.lazy_loading, take what's needed from the manifest instead
+            if game_name not in worlds.AutoWorldRegister.world_types:
+                game_package = entry["data_package"]
+                self.item_name_groups[game_name] = {group_name: set(item_names) for group_name, item_names
+                                                    in game_package["item_name_groups"].items()}
+                self.location_name_groups[game_name] = {group_name: set(location_names) for group_name, location_names
+                                                        in game_package["location_name_groups"].items()}
+                self.non_hintable_names[game_name] = frozenset(entry["hint_blacklist"])
 
     def _init_game_data(self):
         for game_name, game_package in self.gamespackage.items():
@@ -310,6 +479,20 @@ class Context:
             self.item_names[game].update(archipelago_item_names)
             self.location_names[game].update(archipelago_location_names)
 
+    def get_data_package_msg(self, games: typing.Iterable[str]) -> str:
+        """Encoded DataPackage message with the packages of games, which are encoded only once per checksum."""
+        encoded_games: typing.List[str] = []
+        for game in games:
+            game_package = self.gamespackage[game]
+            checksum = game_package.get("checksum")
+            encoded_package = encoded_game_packages.get((game, checksum)) if checksum else None
+            if encoded_package is None:
+                encoded_package = self.dumper(game_package)
+                if checksum:
+                    encoded_game_packages[game, checksum] = encoded_package
+            encoded_games.append(f"{self.dumper(game)}:{encoded_package}")
+        return '[{"cmd":"DataPackage","data":{"games":{' + ",".join(encoded_games) + '}}}]'
+
     def item_names_for_game(self, game: str) -> typing.Optional[typing.Dict[str, int]]:
         return self.gamespackage[game]["item_name_to_id"] if game in self.gamespackage else None
 
@@ -321,6 +504,10 @@ class Context:
         if not endpoint.socket or not endpoint.socket.open:
             return False
         msg = self.dumper(msgs)
+        if getattr(endpoint, "outbox", None):
+            # queue behind the broadcasts that aren't sent yet, to keep the order
+            self.queue_encoded_msgs(endpoint, msg)
+            return True
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -335,6 +522,9 @@ class Context:
     async def send_encoded_msgs(self, endpoint: Endpoint, msg: str) -> bool:
         if not endpoint.socket or not endpoint.socket.open:
             return False
+        if getattr(endpoint, "outbox", None):
+            self.queue_encoded_msgs(endpoint, msg)
+            return True
         try:
             await endpoint.socket.send(msg)
         except websockets.ConnectionClosed:
@@ -347,6 +537,9 @@ class Context:
             return True
 
     async def broadcast_send_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
+        return self._broadcast_encoded_msgs(endpoints, msg)
+
+    def _broadcast_encoded_msgs(self, endpoints: typing.Iterable[Endpoint], msg: str) -> bool:
         sockets = []
         for endpoint in endpoints:
             if endpoint.socket and endpoint.socket.open:
@@ -361,10 +554,48 @@ class Context:
                 self.logger.info(f"Outgoing broadcast: {msg}")
             return True
 
+    def broadcast_encoded(self, endpoints: typing.Iterable[Client], msg: str):
+        """Sends an encoded message to clients, batched with other messages to the clients that allow it."""
+        unbatched: typing.List[Client] = []
+        for endpoint in endpoints:
+            if endpoint.batches_messages:
+                self.queue_encoded_msgs(endpoint, msg)
+            else:
+                unbatched.append(endpoint)
+        if unbatched:
+            async_start(self.broadcast_send_encoded_msgs(unbatched, msg))
+
+    # frames from batched messages don't grow beyond this, to stay within the size clients accept
+    max_batch_size = 256 * 1024
+
+    def queue_encoded_msgs(self, client: Client, msg: str):
+        """Queues an encoded list of messages to be sent together with the others queued for the client."""
+        if not client.outbox:
+            self.outbox_clients.append(client)
+        client.outbox.append(msg)
+        if not self.outbox_flush:
+            loop = asyncio.get_running_loop()
+            if self.batch_window:
+                self.outbox_flush = loop.call_later(self.batch_window, self.flush_outboxes)
+            else:
+                self.outbox_flush = loop.call_soon(self.flush_outboxes)
+
+    def flush_outboxes(self):
+        """Sends the queued messages of each client as few frames, once to all clients that have the same ones."""
+        self.outbox_flush = None
+        clients_by_outbox: typing.Dict[typing.Tuple[str, ...], typing.List[Client]] = {}
+        for client in self.outbox_clients:
+            clients_by_outbox.setdefault(tuple(client.outbox), []).append(client)
+            client.outbox = []
+        self.outbox_clients = []
+        for msgs, clients in clients_by_outbox.items():
+            for frame in batch_encoded_msgs(msgs, self.max_batch_size):
+                self._broadcast_encoded_msgs(clients, frame)
+
     def broadcast_all(self, msgs: typing.List[dict]):
         msgs = self.dumper(msgs)
         endpoints = (endpoint for endpoint in self.endpoints if endpoint.auth)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.broadcast_encoded(endpoints, msgs)
 
     def broadcast_text_all(self, text: str, additional_arguments: dict = {}):
         self.logger.info("Notice (all): %s" % text)
@@ -373,17 +604,18 @@ class Context:
     def broadcast_team(self, team: int, msgs: typing.List[dict]):
         msgs = self.dumper(msgs)
         endpoints = (endpoint for endpoint in itertools.chain.from_iterable(self.clients[team].values()))
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.broadcast_encoded(endpoints, msgs)
 
     def broadcast(self, endpoints: typing.Iterable[Client], msgs: typing.List[dict]):
         msgs = self.dumper(msgs)
-        async_start(self.broadcast_send_encoded_msgs(endpoints, msgs))
+        self.broadcast_encoded(endpoints, msgs)
 
     async def disconnect(self, endpoint: Client):
         if endpoint in self.endpoints:
             self.endpoints.remove(endpoint)
         if endpoint.slot and endpoint in self.clients[endpoint.team][endpoint.slot]:
             self.clients[endpoint.team][endpoint.slot].remove(endpoint)
+        self.remove_stored_data_notifications(endpoint)
         await on_client_disconnected(self, endpoint)
 
     def notify_client(self, client: Client, text: str, additional_arguments: dict = {}):
@@ -418,16 +650,21 @@ class Context:
         self.data_filename = multidatapath
 
     @staticmethod
-    def decompress(data: bytes) -> dict:
+    def decompress(data: bytes) -> typing.MutableMapping[str, typing.Any]:
+        """Decodes multidata. Format 4 gets decoded lazily, section by section as they're accessed."""
         format_version = data[0]
-        if format_version > 3:
+        if format_version > 4:
             raise Utils.VersionException("Incompatible multidata.")
+        if format_version == 4:
+            return Utils.MultidataSections.from_bytes(data)
         return restricted_loads(zlib.decompress(data[1:]))
 
-    def _load(self, decoded_obj: dict, game_data_packages: typing.Dict[str, typing.Any],
+    def _load(self, decoded_obj: typing.MutableMapping[str, typing.Any],
+              game_data_packages: typing.Dict[str, typing.Any],
               use_embedded_server_options: bool):
 
         self.read_data = {}
+        self.read_data_cache = {}
         # there might be a better place to put this.
         self.read_data["race_mode"] = lambda: decoded_obj.get("race_mode", 0)
         mdata_ver = decoded_obj["minimum_versions"]["server"]
@@ -455,17 +692,19 @@ class Context:
             self.player_names[0, slot_id] = slot_info.name
             self.player_name_lookup[slot_info.name] = 0, slot_id
             self.read_data[f"hints_{0}_{slot_id}"] = lambda local_team=0, local_player=slot_id: \
-                list(self.get_rechecked_hints(local_team, local_player))
+                list(self.hints[local_team, local_player])
             self.read_data[f"client_status_{0}_{slot_id}"] = lambda local_team=0, local_player=slot_id: \
                 self.client_game_state[local_team, local_player]
 
         self.seed_name = decoded_obj["seed_name"]
         self.random.seed(self.seed_name)
         self.connect_names = decoded_obj['connect_names']
-        self.locations = LocationStore(decoded_obj.pop("locations"))  # pre-emptively free memory
+        # pre-emptively free memory, index items by receiver for hints and collect
+        self.locations = LocationStore(decoded_obj.pop("locations"), index_items=True)
+        # decoded per slot on first use if the multidata is sectioned
         self.slot_data = decoded_obj['slot_data']
-        for slot, data in self.slot_data.items():
-            self.read_data[f"slot_data_{slot}"] = lambda data=data: data
+        for slot in self.slot_data:
+            self.read_data[f"slot_data_{slot}"] = lambda slot=slot: self.slot_data[slot]
         self.er_hint_data = {int(player): {int(address): name for address, name in loc_data.items()}
                              for player, loc_data in decoded_obj["er_hint_data"].items()}
 
@@ -475,6 +714,7 @@ class Context:
 
         for slot, hints in decoded_obj["precollected_hints"].items():
             self.hints[0, slot].update(hints)
+        self.index_hints()
 
         # declare slots that aren't players as done
         for slot, slot_info in self.slot_info.items():
@@ -503,13 +743,21 @@ class Context:
         for game_name, data in self.location_name_groups.items():
             self.read_data[f"location_name_groups_{game_name}"] = lambda lgame=game_name: self.location_name_groups[lgame]
 
-        # sorted access spheres
-        self.spheres = decoded_obj.get("spheres", [])
+        # sorted access spheres, sectioned multidata only decodes them once they're needed
+        if isinstance(decoded_obj, Utils.MultidataSections):
+            self._spheres = decoded_obj.get_lazy("spheres", [])
+        else:
+            self._spheres = decoded_obj.get("spheres", [])
+        self.spheres_indexed = None
 
     # saving
 
     def save(self, now=False) -> bool:
         if self.saving:
+            if self.journal:
+                if now or self.journal.needs_compaction():
+                    return self._save()
+                return self._save_journal()
             if now:
                 self.save_dirty = False
                 return self._save()
@@ -521,16 +769,40 @@ class Context:
 
     def _save(self, exit_save: bool = False) -> bool:
         try:
-            encoded_save = pickle.dumps(self.get_save())
-            with open(self.save_filename, "wb") as f:
-                f.write(zlib.compress(encoded_save))
+            if self.journal:
+                # written next to the old save first, so there is always a save the journal applies to
+                save_data = self.get_save()
+                save_data["journal_generation"] = self.journal.generation + 1
+                encoded_save = zlib.compress(pickle.dumps(save_data))
+                with open(self.save_filename + ".tmp", "wb") as f:
+                    f.write(encoded_save)
+                os.replace(self.save_filename + ".tmp", self.save_filename)
+                self.journal.reset(self, save_data["journal_generation"], len(encoded_save))
+            else:
+                encoded_save = pickle.dumps(self.get_save())
+                with open(self.save_filename, "wb") as f:
+                    f.write(zlib.compress(encoded_save))
         except Exception as e:
             self.logger.exception(e)
             return False
         else:
             return True
 
-    def init_save(self, enabled: bool = True):
+    def _save_journal(self) -> bool:
+        try:
+            self.journal.write(self)
+        except Exception as e:
+            self.logger.exception(e)
+            return False
+        else:
+            return True
+
+    def record_change(self, section: str, key: typing.Any, added: typing.Optional[typing.Iterable[int]] = None):
+        """Remembers which entry of a section of the save changed, for the next journal entry."""
+        if self.journal:
+            self.journal.record(section, key, added)
+
+    def init_save(self, enabled: bool = True, journal: bool = False):
         self.saving = enabled
         if self.saving:
             if not self.save_filename:
@@ -538,14 +810,24 @@ class Context:
                 name, ext = os.path.splitext(self.data_filename)
                 self.save_filename = name + '.apsave' if ext.lower() in ('.archipelago', '.zip') \
                     else self.data_filename + '_' + 'apsave'
+            if journal:
+                self.journal = SaveJournal(self.save_filename + ".journal")
             try:
                 with open(self.save_filename, 'rb') as f:
                     save_data = restricted_loads(zlib.decompress(f.read()))
+                    if self.journal:
+                        self.journal.generation = save_data.get("journal_generation", 0)
+                        entries = self.journal.read(save_data)
+                        if entries:
+                            self.logger.info(f"Applied {entries} save journal entries.")
                     self.set_save(save_data)
             except FileNotFoundError:
                 self.logger.error('No save data found, starting a new game')
             except Exception as e:
                 self.logger.exception(e)
+            if self.journal:
+                # start the journal over from a save that includes everything in it
+                self._save()
             self._start_async_saving()
 
     def _start_async_saving(self, atexit_save: bool = True):
@@ -579,8 +861,14 @@ class Context:
                 import atexit
                 atexit.register(self._save, True)  # make sure we save on exit too
 
+    def get_game_options(self) -> typing.Dict[str, typing.Any]:
+        return {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
+                "server_password": self.server_password, "password": self.password,
+                "release_mode": self.release_mode,
+                "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
+                "item_cheat": self.item_cheat, "compatibility": self.compatibility}
+
     def get_save(self) -> dict:
-        self.recheck_hints()
         d = {
             "version": self.save_version,
             "connect_names": self.connect_names,
@@ -597,12 +885,7 @@ class Context:
             "random_state": self.random.getstate(),
             "group_collected": dict(self.group_collected),
             "stored_data": self.stored_data,
-            "game_options": {"hint_cost": self.hint_cost, "location_check_points": self.location_check_points,
-                             "server_password": self.server_password, "password": self.password,
-                             "release_mode": self.release_mode,
-                             "remaining_mode": self.remaining_mode, "collect_mode": self.collect_mode,
-                             "item_cheat": self.item_cheat, "compatibility": self.compatibility}
-
+            "game_options": self.get_game_options()
         }
 
         return d
@@ -643,6 +926,8 @@ class Context:
 
         if "stored_data" in savedata:
             self.stored_data = savedata["stored_data"]
+        self.index_hints()
+        self.read_data_cache.clear()
         # count items and slots from lists for items_handling = remote
         self.logger.info(
             f'Loaded save file with {sum([len(v) for k, v in self.received_items.items() if k[2]])} received items '
@@ -663,18 +948,46 @@ class Context:
                     self.hints[hint_team, hint_slot]
                 }
 
-    def get_rechecked_hints(self, team: int, slot: int):
-        self.recheck_hints(team, slot)
-        return self.hints[team, slot]
+    def index_hints(self):
+        """Rechecks all hints and indexes the ones that aren't found yet by their location."""
+        self.recheck_hints()
+        self.unfound_hints.clear()
+        for (team, slot), hints in self.hints.items():
+            for hint in hints:
+                if not hint.found:
+                    self.unfound_hints[team, hint.finding_player, hint.location].add((slot, hint))
+
+    def mark_hints_found(self, team: int, finding_player: int, locations: typing.Iterable[int]):
+        """Turns the hints for newly checked locations into found ones, for every slot that has them."""
+        changed_slots: typing.Set[int] = set()
+        for location in locations:
+            for slot, hint in self.unfound_hints.pop((team, finding_player, location), ()):
+                hints = self.hints[team, slot]
+                hints.discard(hint)
+                hints.add(hint._replace(found=True))
+                changed_slots.add(slot)
+        for slot in changed_slots:
+            self.on_changed_hints(team, slot)
+
+    @property
+    def spheres(self) -> typing.List[typing.Dict[int, typing.Set[int]]]:
+        if callable(self._spheres):
+            self._spheres = self._spheres()
+        return self._spheres
 
     def get_sphere(self, player: int, location_id: int) -> int:
         """Get sphere of a location, -1 if spheres are not available."""
-        if self.spheres:
-            for i, sphere in enumerate(self.spheres):
-                if location_id in sphere.get(player, set()):
-                    return i
-            raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
-                           f"Location or player may not exist.")
+        if self.spheres_indexed is None:
+            # spheres are stored with the locations on first use, for constant time lookups
+            if self.spheres:
+                self.locations.set_spheres(self.spheres)
+            self.spheres_indexed = bool(self.spheres)
+        if self.spheres_indexed:
+            try:
+                return self.locations.get_sphere(player, location_id)
+            except KeyError:
+                raise KeyError(f"No Sphere found for location ID {location_id} belonging to player {player}. "
+                               f"Location or player may not exist.") from None
         return -1
 
     def get_players_package(self):
@@ -732,8 +1045,11 @@ class Context:
                 if hint not in self.hints[team, hint.finding_player]:
                     self.hints[team, hint.finding_player].add(hint)
                     new_hint_events.add(hint.finding_player)
+                    unfound_hints = self.unfound_hints[team, hint.finding_player, hint.location]
+                    unfound_hints.add((hint.finding_player, hint))
                     for player in self.slot_set(hint.receiving_player):
                         self.hints[team, player].add(hint)
+                        unfound_hints.add((player, hint))
                         new_hint_events.add(player)
 
             self.logger.info("Notice (Team #%d): %s" % (team + 1, format_hint(self, team, hint)))
@@ -760,6 +1076,76 @@ class Context:
             release_player(self, client.team, client.slot)
         self.save()  # save goal completion flag
 
+    def get_read_data(self, key: str) -> object:
+        """Value of a _read_ key, without its prefix. Cached until the hints or status it's read from change."""
+        if key not in self.read_data_cache:
+            if key not in self.read_data:
+                return None
+            self.read_data_cache[key] = self.read_data[key]()
+        return self.read_data_cache[key]
+
+    def get_stored_data_notification_clients(self, key: str) -> typing.Set[Client]:
+        """Clients that registered for SetReply packages of key, by the key itself or by a prefix of it."""
+        targets: typing.Set[Client] = set(self.stored_data_notification_clients.get(key, ()))
+        for length, clients_by_prefix in self.stored_data_prefix_notification_clients.items():
+            clients = clients_by_prefix.get(key[:length])
+            if clients:
+                targets.update(clients)
+        return targets
+
+    def add_stored_data_notifications(self, client: Client, keys: typing.Iterable[str],
+                                      prefixes: typing.Iterable[str]) -> None:
+        """Registers client for SetReply packages of keys and of all keys starting with one of prefixes."""
+        for key in keys:
+            self.stored_data_notification_clients.setdefault(key, weakref.WeakSet()).add(client)
+            client.stored_data_notification_keys.add(key)
+        for prefix in prefixes:
+            self.stored_data_prefix_notification_clients.setdefault(len(prefix), {}) \
+                .setdefault(prefix, weakref.WeakSet()).add(client)
+            client.stored_data_notification_prefixes.add(prefix)
+
+    def remove_stored_data_notifications(self, client: Client) -> None:
+        """Unregisters client from all its SetReply notifications, dropping keys and prefixes nobody registered."""
+        for key in client.stored_data_notification_keys:
+            clients = self.stored_data_notification_clients.get(key)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del self.stored_data_notification_clients[key]
+        for prefix in client.stored_data_notification_prefixes:
+            clients_by_prefix = self.stored_data_prefix_notification_clients.get(len(prefix), {})
+            clients = clients_by_prefix.get(prefix)
+            if clients is not None:
+                clients.discard(client)
+                if not clients:
+                    del clients_by_prefix[prefix]
+                    if not clients_by_prefix:
+                        del self.stored_data_prefix_notification_clients[len(prefix)]
+        client.stored_data_notification_keys.clear()
+        client.stored_data_notification_prefixes.clear()
+
+    def apply_stored_data_sets(self, sets: typing.List[dict]) -> typing.List[dict]:
+        """
+        Applies the operations of Set packages to the data storage and returns their SetReply packages.
+        Either all of them get stored, or none if an operation fails. Values are never modified in place.
+        """
+        values: typing.Dict[str, object] = {}
+        replies: typing.List[dict] = []
+        for set_args in sets:
+            key = set_args["key"]
+            value = values[key] if key in values else self.stored_data.get(key, set_args.get("default", 0))
+            reply = {**set_args, "cmd": "SetReply", "original_value": value}
+            value = copy.copy(value)
+            for operation in set_args["operations"]:
+                func = modify_functions[operation["operation"]]
+                value = func(value, operation["value"])
+            values[key] = reply["value"] = value
+            replies.append(reply)
+        for key, value in values.items():
+            self.stored_data[key] = value
+            self.record_change("stored_data", key)
+        return replies
+
     def on_new_hint(self, team: int, slot: int):
         self.on_changed_hints(team, slot)
         self.broadcast(self.clients[team][slot], [{
@@ -768,14 +1154,18 @@ class Context:
         }])
 
     def on_changed_hints(self, team: int, slot: int):
+        self.record_change("hints", (team, slot))
         key: str = f"_read_hints_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+        self.read_data_cache.pop(key[6:], None)
+        targets: typing.Set[Client] = self.get_stored_data_notification_clients(key)
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.hints[team, slot]}])
 
     def on_client_status_change(self, team: int, slot: int):
+        self.record_change("client_game_state", (team, slot))
         key: str = f"_read_client_status_{team}_{slot}"
-        targets: typing.Set[Client] = set(self.stored_data_notification_clients[key])
+        self.read_data_cache.pop(key[6:], None)
+        targets: typing.Set[Client] = self.get_stored_data_notification_clients(key)
         if targets:
             self.broadcast(targets, [{"cmd": "SetReply", "key": key, "value": self.client_game_state[team, slot]}])
 
@@ -881,12 +1271,14 @@ async def on_client_joined(ctx: Context, client: Client):
                               "you may have additional local commands you can list with /help.",
                       {"type": "Tutorial"})
     ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+    ctx.record_change("client_connection_timers", (client.team, client.slot))
 
 
 async def on_client_left(ctx: Context, client: Client):
     if len(ctx.clients[client.team][client.slot]) < 1:
         update_client_status(ctx, client, ClientStatus.CLIENT_UNKNOWN)
         ctx.client_connection_timers[client.team, client.slot] = datetime.datetime.now(datetime.timezone.utc)
+        ctx.record_change("client_connection_timers", (client.team, client.slot))
 
     version_str = '.'.join(str(x) for x in client.version)
 
@@ -1008,6 +1400,7 @@ def collect_player(ctx: Context, team: int, slot: int, is_group: bool = False):
             if slot in group_players:
                 group_collected_players = ctx.group_collected.setdefault(group, set())
                 group_collected_players.add(slot)
+                ctx.record_change("group_collected", group)
                 if set(group_players) == group_collected_players:
                     collect_player(ctx, team, group, True)
 
@@ -1021,7 +1414,9 @@ def send_items_to(ctx: Context, team: int, target_slot: int, *items: NetworkItem
         for item in items:
             if item.player != target_slot:
                 get_received_items(ctx, team, target, False).append(item)
+                ctx.record_change("received_items", (team, target, False))
             get_received_items(ctx, team, target, True).append(item)
+            ctx.record_change("received_items", (team, target, True))
 
 
 def register_location_checks(ctx: Context, team: int, slot: int, locations: typing.Iterable[int],
@@ -1031,6 +1426,7 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
     if new_locations:
         if count_activity:
             ctx.client_activity_timers[team, slot] = datetime.datetime.now(datetime.timezone.utc)
+            ctx.record_change("client_activity_timers", (team, slot))
         for location in new_locations:
             item_id, target_player, flags = ctx.locations[slot][location]
             new_item = NetworkItem(item_id, location, slot, flags)
@@ -1043,16 +1439,14 @@ def register_location_checks(ctx: Context, team: int, slot: int, locations: typi
             ctx.broadcast_team(team, [info_text])
 
         ctx.location_checks[team, slot] |= new_locations
+        ctx.record_change("location_checks", (team, slot), new_locations)
         send_new_items(ctx)
         ctx.broadcast(ctx.clients[team][slot], [{
             "cmd": "RoomUpdate",
             "hint_points": get_slot_points(ctx, team, slot),
             "checked_locations": new_locations,  # send back new checks only
         }])
-        old_hints = ctx.hints[team, slot].copy()
-        ctx.recheck_hints(team, slot)
-        if old_hints != ctx.hints[team, slot]:
-            ctx.on_changed_hints(team, slot)
+        ctx.mark_hints_found(team, slot, new_locations)
         ctx.save()
 
 
@@ -1461,12 +1855,14 @@ class ClientMessageProcessor(CommonCommandProcessor):
         if alias_name:
             alias_name = alias_name[:16].strip()
             self.ctx.name_aliases[self.client.team, self.client.slot] = alias_name
+            self.ctx.record_change("name_aliases", (self.client.team, self.client.slot))
             self.output(f"Hello, {alias_name}")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
             return True
         elif (self.client.team, self.client.slot) in self.ctx.name_aliases:
             del (self.ctx.name_aliases[self.client.team, self.client.slot])
+            self.ctx.record_change("name_aliases", (self.client.team, self.client.slot))
             self.output("Removed Alias")
             update_aliases(self.ctx, self.client.team)
             self.ctx.save()
@@ -1486,6 +1882,8 @@ class ClientMessageProcessor(CommonCommandProcessor):
                 new_item = NetworkItem(names[item_name], -1, self.client.slot)
                 get_received_items(self.ctx, self.client.team, self.client.slot, False).append(new_item)
                 get_received_items(self.ctx, self.client.team, self.client.slot, True).append(new_item)
+                self.ctx.record_change("received_items", (self.client.team, self.client.slot, False))
+                self.ctx.record_change("received_items", (self.client.team, self.client.slot, True))
                 self.ctx.broadcast_text_all(
                     'Cheat console: sending "' + item_name + '" to ' + self.ctx.get_aliased_name(self.client.team,
                                                                                                  self.client.slot),
@@ -1504,9 +1902,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
         cost = self.ctx.get_hint_cost(self.client.slot)
 
         if not input_text:
-            hints = {hint.re_check(self.ctx, self.client.team) for hint in
-                     self.ctx.hints[self.client.team, self.client.slot]}
-            self.ctx.hints[self.client.team, self.client.slot] = hints
+            hints = self.ctx.hints[self.client.team, self.client.slot]
             self.ctx.notify_hints(self.client.team, list(hints), recipients=(self.client.slot,))
             self.output(f"A hint costs {self.ctx.get_hint_cost(self.client.slot)} points. "
                         f"You have {points_available} points.")
@@ -1582,6 +1978,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     can_pay = 1000
 
                 self.ctx.random.shuffle(not_found_hints)
+                self.ctx.record_change("random", None)
                 # By popular vote, make hints prefer non-local placements
                 not_found_hints.sort(key=lambda hint: int(hint.receiving_player != hint.finding_player))
                 # By another popular vote, prefer early sphere
@@ -1596,6 +1993,7 @@ class ClientMessageProcessor(CommonCommandProcessor):
                     hints.append(hint)
                     can_pay -= 1
                     self.ctx.hints_used[self.client.team, self.client.slot] += 1
+                    self.ctx.record_change("hints_used", (self.client.team, self.client.slot))
 
                 self.ctx.notify_hints(self.client.team, hints)
                 if not_found_hints:
@@ -1750,23 +2148,17 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
     elif cmd == "GetDataPackage":
         exclusions = args.get("exclusions", [])
         if "games" in args:
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name in set(args.get("games", []))}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": games}}])
+            games = set(args.get("games", []))
+            await ctx.send_encoded_msgs(client, ctx.get_data_package_msg(
+                name for name in ctx.gamespackage if name in games))
         # TODO: remove exclusions behaviour around 0.5.0
         elif exclusions:
             exclusions = set(exclusions)
-            games = {name: game_data for name, game_data in ctx.gamespackage.items()
-                     if name not in exclusions}
-
-            package = {"games": games}
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": package}])
+            await ctx.send_encoded_msgs(client, ctx.get_data_package_msg(
+                name for name in ctx.gamespackage if name not in exclusions))
 
         else:
-            await ctx.send_msgs(client, [{"cmd": "DataPackage",
-                                          "data": {"games": ctx.gamespackage}}])
+            await ctx.send_encoded_msgs(client, ctx.get_data_package_msg(ctx.gamespackage))
 
     elif client.auth:
         if cmd == "ConnectUpdate":
@@ -1870,39 +2262,37 @@ async def process_client_cmd(ctx: Context, client: Client, args: dict):
             args["cmd"] = "Retrieved"
             keys = args["keys"]
             args["keys"] = {
-                key: ctx.read_data.get(key[6:], lambda: None)() if key.startswith("_read_") else
-                     ctx.stored_data.get(key, None)
+                key: ctx.get_read_data(key[6:]) if key.startswith("_read_") else ctx.stored_data.get(key, None)
                 for key in keys
             }
             await ctx.send_msgs(client, [args])
 
         elif cmd == "Set":
-            if "key" not in args or args["key"].startswith("_read_") or \
-                    "operations" not in args or not type(args["operations"]) == list:
+            # multiple keys can be set at once through a list of Set arguments
+            sets = args.get("sets", [args])
+            if type(sets) != list or not sets or not all(
+                    type(set_args) == dict and type(set_args.get("key")) == str and
+                    not set_args["key"].startswith("_read_") and type(set_args.get("operations")) == list
+                    for set_args in sets):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'Set', "original_cmd": cmd}])
                 return
-            args["cmd"] = "SetReply"
-            value = ctx.stored_data.get(args["key"], args.get("default", 0))
-            args["original_value"] = copy.copy(value)
-            for operation in args["operations"]:
-                func = modify_functions[operation["operation"]]
-                value = func(value, operation["value"])
-            ctx.stored_data[args["key"]] = args["value"] = value
-            targets = set(ctx.stored_data_notification_clients[args["key"]])
-            if args.get("want_reply", True):
-                targets.add(client)
-            if targets:
-                ctx.broadcast(targets, [args])
+            for reply in ctx.apply_stored_data_sets(sets):
+                targets = ctx.get_stored_data_notification_clients(reply["key"])
+                if reply.get("want_reply", args.get("want_reply", True)):
+                    targets.add(client)
+                if targets:
+                    ctx.broadcast(targets, [reply])
             ctx.save()
 
         elif cmd == "SetNotify":
-            if "keys" not in args or type(args["keys"]) != list:
+            if not ("keys" in args or "prefixes" in args) or type(args.get("keys", [])) != list or \
+                    type(args.get("prefixes", [])) != list or \
+                    not all(type(prefix) == str for prefix in args.get("prefixes", [])):
                 await ctx.send_msgs(client, [{'cmd': 'InvalidPacket', "type": "arguments",
                                               "text": 'SetNotify', "original_cmd": cmd}])
                 return
-            for key in args["keys"]:
-                ctx.stored_data_notification_clients[key].add(client)
+            ctx.add_stored_data_notifications(client, args.get("keys", []), args.get("prefixes", []))
 
 
 def update_client_status(ctx: Context, client: Client, new_status: ClientStatus):
@@ -1974,12 +2364,14 @@ class ServerCommandProcessor(CommonCommandProcessor):
                     if alias_name:
                         alias_name = alias_name.strip()[:15]
                         self.ctx.name_aliases[team, slot] = alias_name
+                        self.ctx.record_change("name_aliases", (team, slot))
                         self.output(f"Named {player_name} as {alias_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
                         return True
                     else:
                         del (self.ctx.name_aliases[team, slot])
+                        self.ctx.record_change("name_aliases", (team, slot))
                         self.output(f"Removed Alias for {player_name}")
                         update_aliases(self.ctx, team)
                         self.ctx.save()
@@ -2269,6 +2661,10 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--password', default=defaults["password"])
     parser.add_argument('--savefile', default=defaults["savefile"])
     parser.add_argument('--disable_save', default=defaults["disable_save"], action='store_true')
+    parser.add_argument('--batch_window', default=defaults["batch_window"], type=int,
+                        help="Milliseconds to collect broadcasts to a client for before sending them together.")
+    parser.add_argument('--save_journal', default=defaults["save_journal"], action='store_true',
+                        help="Journal changes to the save as they happen instead of saving everything periodically.")
     parser.add_argument('--cert', help="Path to a SSL Certificate for encryption.")
     parser.add_argument('--cert_key', help="Path to SSL Certificate Key file")
     parser.add_argument('--loglevel', default=defaults["loglevel"],
@@ -2359,6 +2755,7 @@ async def main(args: argparse.Namespace):
                   args.hint_cost, not args.disable_item_cheat, args.release_mode, args.collect_mode,
                   args.remaining_mode,
                   args.auto_shutdown, args.compatibility, args.log_network)
+    ctx.batch_window = args.batch_window / 1000
     data_filename = args.multidata
 
     if not data_filename:
@@ -2388,7 +2785,7 @@ async def main(args: argparse.Namespace):
         logging.exception(f"Failed to read multiworld data ({e})")
         raise
 
-    ctx.init_save(not args.disable_save)
+    ctx.init_save(not args.disable_save, args.save_journal)
 
     ssl_context = load_server_cert(args.cert, args.cert_key) if args.cert else None
 
@@ -2410,6 +2807,8 @@ async def main(args: argparse.Namespace):
 client_message_processor = ClientMessageProcessor
 
 if __name__ == '__main__':
+    # the server only needs the data packages of the games, which come from the world manifest
+    os.environ.setdefault("ARCHIPELAGO_LAZY_WORLDS", "1")
     try:
         asyncio.run(main(parse_args()))
     except asyncio.exceptions.CancelledError:
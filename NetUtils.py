@@ -2,11 +2,18 @@ from __future__ import annotations
 
 import typing
 import enum
+import math
+import re
 import warnings
 from json import JSONEncoder, JSONDecoder
 
 import websockets
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from Utils import ByValue, Version
 
 
@@ -102,7 +109,72 @@ _encode = JSONEncoder(
 ).encode
 
 
+def _orjson_default(obj: typing.Any) -> typing.Any:
+    """Converts what orjson can't encode itself like _scan_for_TypedTuples, with the common tuples spelled out."""
+    obj_type = type(obj)
+    if obj_type is NetworkItem:
+        return {"item": obj[0], "location": obj[1], "player": obj[2], "flags": obj[3], "class": "NetworkItem"}
+    if obj_type is NetworkPlayer:
+        return {"team": obj[0], "slot": obj[1], "alias": obj[2], "name": obj[3], "class": "NetworkPlayer"}
+    if obj_type is NetworkSlot:
+        return {"name": obj[0], "game": obj[1], "type": obj[2], "group_members": obj[3], "class": "NetworkSlot"}
+    if obj_type is Hint:
+        return {"receiving_player": obj[0], "finding_player": obj[1], "location": obj[2], "item": obj[3],
+                "found": obj[4], "entrance": obj[5], "item_flags": obj[6], "class": "Hint"}
+    if isinstance(obj, tuple) and hasattr(obj, "_fields"):
+        data = obj._asdict()
+        data["class"] = obj_type.__name__
+        return data
+    if isinstance(obj, (set, frozenset)):
+        return tuple(obj)
+    raise TypeError
+
+
+if orjson:
+    _orjson_options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+    # what's specific to the floats orjson writes differently, looking for those first is a lot faster than
+    # searching for the floats right away. One at a time, as an alternation has no literal to search for.
+    _orjson_float_candidates = tuple(re.compile(pattern).finditer
+                                     for pattern in (r"0\.0000", r"e\d(?<=\de\d)", r"e-\d(?<=\de-\d)"))
+    # a float value or a float dict key, from the character in front of it
+    _orjson_float = re.compile(r'[\[:,]-?[\d.]+(?:e-?\d+)?[,\]}]|"-?[\d.]+(?:e-?\d+)?":').match
+
+
+def _has_non_finite_float(obj: typing.Any) -> bool:
+    if isinstance(obj, float):
+        return not math.isfinite(obj)
+    if isinstance(obj, dict):
+        return any(map(_has_non_finite_float, obj)) or any(map(_has_non_finite_float, obj.values()))
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return any(map(_has_non_finite_float, obj))
+    return False
+
+
+def _has_orjson_differing_float(obj: typing.Any, encoded: str) -> bool:
+    """
+    orjson writes floats below 1e-4 and from 1e16, as well as NaN and Infinity, differently than json,
+    those are encoded with json instead.
+    """
+    for find_candidates in _orjson_float_candidates:
+        for candidate in find_candidates(encoded):
+            start = candidate.start()
+            while start and encoded[start - 1] in "-.0123456789":
+                start -= 1
+            if start and _orjson_float(encoded, start - 1):
+                return True
+    # orjson writes NaN and Infinity as null
+    return "null" in encoded and _has_non_finite_float(obj)
+
+
 def encode(obj: typing.Any) -> str:
+    if orjson:
+        try:
+            encoded = orjson.dumps(obj, default=_orjson_default, option=_orjson_options).decode()
+        except orjson.JSONEncodeError:
+            pass  # such as integers beyond 64 bit or invalid strings, leave it to json
+        else:
+            if not _has_orjson_differing_float(obj, encoded):
+                return encoded
     return _encode(_scan_for_TypedTuples(obj))
 
 
@@ -350,7 +422,8 @@ class Hint(typing.NamedTuple):
 
 
 class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
-    def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]]):
+    def __init__(self, values: typing.MutableMapping[int, typing.Dict[int, typing.Tuple[int, int, int]]],
+                 index_items: bool = False):
         super().__init__(values)
 
         if not self:
@@ -362,16 +435,58 @@ class _LocationStore(dict, typing.MutableMapping[int, typing.Dict[int, typing.Tu
         if len(self.get(0, {})):
             raise ValueError("Invalid player id 0 for location")
 
+        # optional index for hints and collect, receiver -> item -> (position, sender, location, flags) in order of
+        # self, the position in the store keeps results in the same order as without the index
+        self._receiver_index: typing.Optional[typing.Dict[int, typing.Dict[int, typing.List[
+            typing.Tuple[int, int, int, int]]]]] = None
+        if index_items:
+            self._receiver_index = {}
+            position = 0
+            for finding_player, check_data in self.items():
+                for location_id, (item_id, receiving_player, item_flags) in check_data.items():
+                    self._receiver_index.setdefault(receiving_player, {}).setdefault(item_id, []).append(
+                        (position, finding_player, location_id, item_flags))
+                    position += 1
+        self._spheres: typing.Dict[typing.Tuple[int, int], int] = {}
+
     def find_item(self, slots: typing.Set[int], seeked_item_id: int
                   ) -> typing.Generator[typing.Tuple[int, int, int, int, int], None, None]:
+        if self._receiver_index is not None:
+            found: typing.List[typing.Tuple[int, int, int, int, int]] = []
+            for receiving_player in slots:
+                for position, finding_player, location_id, item_flags in \
+                        self._receiver_index.get(receiving_player, {}).get(seeked_item_id, ()):
+                    found.append((position, finding_player, location_id, receiving_player, item_flags))
+            found.sort()
+            for _, finding_player, location_id, receiving_player, item_flags in found:
+                yield finding_player, location_id, seeked_item_id, receiving_player, item_flags
+            return
         for finding_player, check_data in self.items():
             for location_id, (item_id, receiving_player, item_flags) in check_data.items():
                 if receiving_player in slots and item_id == seeked_item_id:
                     yield finding_player, location_id, item_id, receiving_player, item_flags
 
+    def set_spheres(self, spheres: typing.Sequence[typing.Dict[int, typing.Iterable[int]]]) -> None:
+        for sphere, sphere_locations in enumerate(spheres):
+            for player, locations in sphere_locations.items():
+                player_locations = self.get(player, {})
+                self._spheres.update({(player, location): sphere
+                                      for location in locations if location in player_locations})
+
+    def get_sphere(self, player: int, location: int) -> int:
+        try:
+            return self._spheres[player, location]
+        except KeyError:
+            raise KeyError(f"No sphere for location {location} of player {player}") from None
+
     def get_for_player(self, slot: int) -> typing.Dict[int, typing.Set[int]]:
         import collections
         all_locations: typing.Dict[int, typing.Set[int]] = collections.defaultdict(set)
+        if self._receiver_index is not None:
+            for entries in self._receiver_index.get(slot, {}).values():
+                for _, source_slot, location_id, _ in entries:
+                    all_locations[source_slot].add(location_id)
+            return all_locations
         for source_slot, location_data in self.items():
             for location_id, values in location_data.items():
                 if values[1] == slot:
@@ -4,6 +4,7 @@ import asyncio
 import json
 import typing
 import builtins
+import contextlib
 import os
 import itertools
 import subprocess
@@ -15,6 +16,7 @@ import collections
 import importlib
 import logging
 import warnings
+import zlib
 
 from argparse import Namespace
 from settings import Settings, get_settings
@@ -445,6 +447,96 @@ def restricted_loads(s: bytes) -> Any:
     return RestrictedUnpickler(io.BytesIO(s)).load()
 
 
+# multidata (.archipelago) format 4: the format byte, the length of the index as a little-endian uint32, then the
+# zlib-compressed pickled index, mapping each top-level key to the (offset, length) of its section after the index.
+# Keys of multidata_split_sections map to an index of their own instead, with a section per slot.
+multidata_split_sections = frozenset(("slot_data",))
+
+
+def encode_multidata(multidata: typing.Mapping[str, Any]) -> bytes:
+    """Encodes multidata in format 4, with independently compressed sections. Sections that a MultidataSections
+    never decoded are copied over as they are."""
+    sections: typing.List[bytes] = []
+    offset = 0
+
+    def add_section(mapping: typing.Mapping[Any, Any], key: Any) -> typing.Tuple[int, int]:
+        nonlocal offset
+        section = mapping.raw_section(key) if isinstance(mapping, MultidataSections) else None
+        if section is None:
+            section = zlib.compress(pickle.dumps(mapping[key]), 9)
+        sections.append(section)
+        offset += len(section)
+        return offset - len(section), len(section)
+
+    index: Dict[str, Any] = {}
+    for key in multidata:
+        if key in multidata_split_sections:
+            index[key] = {slot: add_section(multidata[key], slot) for slot in multidata[key]}
+        else:
+            index[key] = add_section(multidata, key)
+    encoded_index = zlib.compress(pickle.dumps(index), 9)
+    return b"".join((bytes([4]), len(encoded_index).to_bytes(4, "little"), encoded_index, *sections))
+
+
+class MultidataSections(typing.MutableMapping[Any, Any]):
+    """Multidata in format 4, which decodes each section on first access. See encode_multidata."""
+
+    def __init__(self, data: memoryview, index: Dict[Any, Any]) -> None:
+        self._data = data
+        self._index = index
+        self._decoded: Dict[Any, Any] = {}
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> MultidataSections:
+        data = memoryview(data)
+        index_length = int.from_bytes(data[1:5], "little")
+        return cls(data[5 + index_length:], restricted_loads(zlib.decompress(data[5:5 + index_length])))
+
+    def raw_section(self, key: Any) -> Optional[memoryview]:
+        """The compressed section of key, if it wasn't decoded yet."""
+        entry = self._index.get(key)
+        if key in self._decoded or not isinstance(entry, tuple):
+            return None
+        offset, length = entry
+        return self._data[offset:offset + length]
+
+    def get_lazy(self, key: Any, default: Any = None) -> typing.Callable[[], Any]:
+        """Returns a function that decodes the section of key when called, without keeping the others alive."""
+        section = self.raw_section(key)
+        if section is None:
+            value = self.get(key, default)
+            return lambda: value
+        return lambda: restricted_loads(zlib.decompress(section))
+
+    def __getitem__(self, key: Any) -> Any:
+        if key not in self._decoded:
+            entry = self._index[key]
+            if isinstance(entry, dict):
+                self._decoded[key] = MultidataSections(self._data, entry)
+            else:
+                self._decoded[key] = restricted_loads(zlib.decompress(self.raw_section(key)))
+        return self._decoded[key]
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._decoded[key] = value
+
+    def __delitem__(self, key: Any) -> None:
+        if key not in self._index and key not in self._decoded:
+            raise KeyError(key)
+        self._index.pop(key, None)
+        self._decoded.pop(key, None)
+
+    def __iter__(self) -> typing.Iterator[Any]:
+        yield from self._index
+        yield from (key for key in self._decoded if key not in self._index)
+
+    def __len__(self) -> int:
+        return len(self._index.keys() | self._decoded.keys())
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._index or key in self._decoded
+
+
 class ByValue:
     """
     Mixin for enums to pickle value instead of name (restores pre-3.11 behavior). Use as left-most parent.
@@ -485,10 +577,11 @@ loglevel_mapping = {'error': logging.ERROR, 'info': logging.INFO, 'warning': log
 
 def init_logging(name: str, loglevel: typing.Union[str, int] = logging.INFO, write_mode: str = "w",
                  log_format: str = "[%(name)s at %(asctime)s]: %(message)s",
-                 exception_logger: typing.Optional[str] = None):
+                 exception_logger: typing.Optional[str] = None, log_folder: typing.Optional[str] = None):
     import datetime
     loglevel: int = loglevel_mapping.get(loglevel, loglevel)
-    log_folder = user_path("logs")
+    if log_folder is None:
+        log_folder = user_path("logs")
     os.makedirs(log_folder, exist_ok=True)
     root_logger = logging.getLogger()
     for handler in root_logger.handlers[:]:
@@ -557,6 +650,29 @@ def init_logging(name: str, loglevel: typing.Union[str, int] = logging.INFO, wri
     )
 
 
+@contextlib.contextmanager
+def silenced_stdout() -> typing.Iterator[None]:
+    """
+    Discards what gets written to stdout, for worker processes that log to their own file instead of interleaving on
+    the console. Logging handlers that init_logging created for it are removed when leaving.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            yield
+        finally:
+            root_logger = logging.getLogger()
+            for handler in root_logger.handlers[:]:
+                if type(handler) is logging.StreamHandler and handler.stream is devnull:
+                    root_logger.removeHandler(handler)
+
+
+def get_fork_context() -> "multiprocessing.context.BaseContext":
+    """The multiprocessing context for worker processes, which forks them if the platform can, so they start with
+    everything that's imported already, like the worlds."""
+    import multiprocessing
+    return multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+
+
 def stream_input(stream: typing.TextIO, queue: "asyncio.Queue[str]"):
     def queuer():
         while 1:
@@ -197,6 +197,15 @@ def get_static_server_data() -> dict:
             for world_name, world in worlds.AutoWorldRegister.world_types.items()
         },
     }
+    for world_name, entry in worlds.world_manifest.items():
+        # worlds that aren't loaded with worlds.lazy_loading, take what's needed from the cached manifest instead
+        if world_name not in worlds.AutoWorldRegister.world_types:
+            game_package = entry["data_package"]
+            data["non_hintable_names"][world_name] = frozenset(entry["hint_blacklist"])
+            data["item_name_groups"][world_name] = {group_name: set(item_names) for group_name, item_names
+                                                    in game_package["item_name_groups"].items()}
+            data["location_name_groups"][world_name] = {group_name: set(location_names) for group_name, location_names
+                                                        in game_package["location_name_groups"].items()}
 
     return data
 
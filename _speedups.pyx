@@ -26,6 +26,7 @@ cdef extern from *:
 
 ctypedef uint32_t ap_player_t  # on AMD64 this is faster (and smaller) than 64bit ints
 ctypedef uint32_t ap_flags_t
+ctypedef uint32_t ap_sphere_t
 ctypedef int64_t ap_id_t
 
 cdef ap_player_t MAX_PLAYER_ID = 1000000  # limit the size of indexing array
@@ -62,6 +63,7 @@ cdef struct LocationEntry:
     ap_player_t receiver
     ap_id_t item
     ap_flags_t flags
+    ap_sphere_t sphere  # sphere + 1, 0 if unknown
 
 
 cdef struct IndexEntry:
@@ -88,6 +90,10 @@ cdef class LocationStore:
     cdef list _items  # ~64KB/1000 players, speed up items (56 per tuple + 8 per list entry)
     cdef list _proxies  # ~92KB/1000 players, speed up self[player] (56 per struct + 28 per len + 8 per list entry)
     cdef PyObject** _raw_proxies  # 8K/1000 players, faster access to _proxies, but does not keep a ref
+    # optional index for hints and collect, entries sorted by receiver and item, then their order in entries
+    cdef uint32_t* receiver_order  # 400KB/100k items
+    cdef IndexEntry* receiver_index  # 16KB/1000 players
+    cdef size_t receiver_index_size
 
     def get_size(self):
         from sys import getsizeof
@@ -98,9 +104,11 @@ cdef class LocationStore:
         size += sum(sizeof(item) for item in self._items)
         size += sum(sizeof(proxy) for proxy in self._proxies)
         size += sizeof(self._raw_proxies[0]) * self.sender_index_size
+        if self.receiver_order:
+            size += sizeof(uint32_t) * self.entry_count + sizeof(IndexEntry) * self.receiver_index_size
         return size
 
-    def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]]) -> None:
+    def __init__(self, locations_dict: Dict[int, Dict[int, Sequence[int]]], index_items: bool = False) -> None:
         self._mem = Pool()
         cdef object key
         self._keys = []
@@ -109,6 +117,7 @@ cdef class LocationStore:
 
         # iterate over everything to get all maxima and validate everything
         cdef size_t max_sender = INVALID_SIZE  # keep track of highest used player id for indexing
+        cdef size_t max_receiver = 0
         cdef size_t sender_count = 0
         cdef size_t count = 0
         for sender, locations in locations_dict.items():
@@ -123,6 +132,7 @@ cdef class LocationStore:
                 receiver = data[1]
                 if receiver < 1 or receiver > MAX_PLAYER_ID:
                     raise ValueError(f"Invalid player id {receiver} for item")
+                max_receiver = max(max_receiver, receiver)
                 count += 1
             sender_count += 1
 
@@ -176,6 +186,38 @@ cdef class LocationStore:
         self.entry_count = count
         self._len = sender_count
 
+        if index_items:
+            self._build_receiver_index(max_receiver)
+
+    cdef _build_receiver_index(self, size_t max_receiver):
+        if self.entry_count > 0xffffffff:
+            raise ValueError("Too many locations to index")
+        cdef size_t i
+        cdef ap_player_t receiver
+        order = sorted([(self.entries[i].receiver, self.entries[i].item, i) for i in range(self.entry_count)])
+        self.receiver_order = <uint32_t*>self._mem.alloc(self.entry_count, sizeof(uint32_t))
+        self.receiver_index = <IndexEntry*>self._mem.alloc(max_receiver + 1, sizeof(IndexEntry))
+        for i in range(self.entry_count):
+            receiver = order[i][0]
+            self.receiver_order[i] = order[i][2]
+            if not self.receiver_index[receiver].count:
+                self.receiver_index[receiver].start = i
+            self.receiver_index[receiver].count += 1
+        self.receiver_index_size = max_receiver + 1
+
+    cdef size_t _find_receiver_item(self, size_t start, size_t count, ap_id_t item) nogil:
+        # binary search for the first entry of item in a receiver's range of receiver_order
+        cdef size_t l = start
+        cdef size_t r = start + count
+        cdef size_t m
+        while l < r:
+            m = (l + r) // 2
+            if self.entries[self.receiver_order[m]].item < item:
+                l = m + 1
+            else:
+                r = m
+        return l
+
     # fake dict access
     def __len__(self) -> int:
         return self._len
@@ -208,7 +250,26 @@ cdef class LocationStore:
         cdef ap_player_t receiver
         cdef ap_player_set* receivers
         cdef size_t slot_count = len(slots)
-        if slot_count == 1:
+        cdef size_t i
+        cdef size_t end
+        cdef LocationEntry* found_entry
+        if self.receiver_order:
+            # look up each receiver's entries of item, then restore the order of entries
+            found: List[int] = []
+            for slot in slots:
+                if not 0 < slot < self.receiver_index_size:
+                    continue
+                i = self._find_receiver_item(self.receiver_index[slot].start, self.receiver_index[slot].count, item)
+                end = self.receiver_index[slot].start + self.receiver_index[slot].count
+                while i < end and self.entries[self.receiver_order[i]].item == item:
+                    found.append(self.receiver_order[i])
+                    i += 1
+            found.sort()
+            for i in found:
+                found_entry = self.entries + i
+                yield (found_entry.sender, found_entry.location, found_entry.item, found_entry.receiver,
+                       found_entry.flags)
+        elif slot_count == 1:
             # specialized implementation for single slot
             receiver = list(slots)[0]
             with nogil:
@@ -233,9 +294,39 @@ cdef class LocationStore:
             finally:
                 ap_player_set_free(receivers)
 
+    def set_spheres(self, spheres: Sequence[Dict[int, Iterable[int]]]) -> None:
+        """Stores the sphere of each location, ignoring locations that are not in the store."""
+        cdef LocationEntry* entry
+        cdef ap_sphere_t sphere
+        for sphere, sphere_locations in enumerate(spheres, 1):
+            for player, locations in sphere_locations.items():
+                if not 0 < player < self.sender_index_size:
+                    continue
+                for location in locations:
+                    entry = (<PlayerLocationProxy>self._raw_proxies[player])._get(location)
+                    if entry:
+                        entry.sphere = sphere
+
+    def get_sphere(self, player: int, location: int) -> int:
+        """Returns the sphere of a location, raises KeyError if it's unknown."""
+        cdef LocationEntry* entry = NULL
+        if 0 < player < self.sender_index_size:
+            entry = (<PlayerLocationProxy>self._raw_proxies[player])._get(location)
+        if not entry or not entry.sphere:
+            raise KeyError(f"No sphere for location {location} of player {player}")
+        return entry.sphere - 1
+
     def get_for_player(self, slot: int) -> Dict[int, Set[int]]:
         cdef ap_player_t receiver = slot
+        cdef size_t start
+        cdef uint32_t i
         all_locations: Dict[int, Set[int]] = {}
+        if self.receiver_order:
+            if receiver < self.receiver_index_size:
+                start = self.receiver_index[receiver].start
+                for i in self.receiver_order[start:start + self.receiver_index[receiver].count]:
+                    all_locations.setdefault(self.entries[i].sender, set()).add(self.entries[i].location)
+            return all_locations
         with nogil:
             for entry in self.entries[:self.entry_count]:
                 if entry.receiver == receiver:
@@ -34,16 +34,29 @@ def _update_cache() -> None:
         return
 
     try:
-        from worlds.AutoWorld import AutoWorldRegister
-        for world in AutoWorldRegister.world_types.values():
-            annotation = world.__annotations__.get("settings", None)
-            if annotation is None or annotation == "ClassVar[Optional['Group']]":
-                continue
-            _world_settings_name_cache[world.settings_key] = f"{world.__module__}.{world.__name__}"
+        import worlds
+        if worlds.lazy_loading:
+            # don't load all worlds, the manifest knows their settings
+            for entry in worlds.world_manifest.values():
+                if entry["settings_key"]:
+                    _world_settings_name_cache[entry["settings_key"]] = entry["world_class"]
+        else:
+            for world in worlds.AutoWorldRegister.world_types.values():
+                settings_key = get_world_settings_key(world)
+                if settings_key:
+                    _world_settings_name_cache[settings_key] = f"{world.__module__}.{world.__name__}"
     finally:
         _world_settings_name_cache_updated = True
 
 
+def get_world_settings_key(world: type) -> Optional[str]:
+    """Returns the settings_key of a World class if it has settings in host.yaml, otherwise None"""
+    annotation = world.__annotations__.get("settings", None)
+    if annotation is None or annotation == "ClassVar[Optional['Group']]":
+        return None
+    return getattr(world, "settings_key")
+
+
 def fmt_doc(cls: type, level: int) -> str:
     comment = cls.__doc__
     assert comment, f"{cls} has no __doc__"
@@ -570,6 +583,18 @@ class ServerOptions(Group):
     class AutoShutdown(int):
         """Automatically shut down the server after this many seconds without new location checks, 0 to keep running"""
 
+    class BatchWindow(int):
+        """
+        Milliseconds to collect messages to a client for before they are sent together, 0 to send them at the end of
+        each server tick. Clients that have the NoBatching tag get every message sent on its own.
+        """
+
+    class SaveJournal(Bool):
+        """
+        Append each change to a journal next to the save file as it happens, instead of rewriting the whole save
+        every auto save interval. The journal gets merged into the save file once it outgrows it.
+        """
+
     class Compatibility(IntEnum):
         """
         Compatibility handling
@@ -592,6 +617,8 @@ class ServerOptions(Group):
     multidata: Optional[str] = None
     savefile: Optional[str] = None
     disable_save: bool = False
+    save_journal: Union[SaveJournal, bool] = False
+    batch_window: BatchWindow = BatchWindow(0)
     loglevel: str = "info"
     server_password: Optional[ServerPassword] = None
     disable_item_cheat: Union[DisableItemCheat, bool] = False
@@ -662,6 +689,18 @@ class GeneratorOptions(Group):
         start_inventory -> Move remaining items to start_inventory, generate additional filler items to fill locations.
         """
 
+    class ProgressionBalancingLimit(int):
+        """
+        How many items progression balancing may test for being needed earlier before it stops, 0 for no limit.
+        Lowers generation time of large multiworlds, at the cost of less balanced late spheres.
+        """
+
+    class OutputProcesses(int):
+        """
+        How many processes to create the output of worlds that support it in, 0 to create all output in threads.
+        Speeds up creating many patches or roms on multiple cores. Needs forking, so it has no effect on Windows.
+        """
+
     enemizer_path: EnemizerPath = EnemizerPath("EnemizerCLI/EnemizerCLI.Core")  # + ".exe" is implied on Windows
     player_files_path: PlayerFilesPath = PlayerFilesPath("Players")
     players: Players = Players(0)
@@ -671,6 +710,8 @@ class GeneratorOptions(Group):
     race: Race = Race(0)
     plando_options: PlandoOptions = PlandoOptions("bosses, connections, texts")
     panic_method: PanicMethod = PanicMethod("swap")
+    progression_balancing_limit: ProgressionBalancingLimit = ProgressionBalancingLimit(0)
+    output_processes: OutputProcesses = OutputProcesses(0)
 
 
 class SNIOptions(Group):
@@ -739,6 +780,11 @@ class Settings(Group):
                 return super().__getattribute__(key)
             # directly import world and grab settings class
             world_mod, world_cls_name = _world_settings_name_cache[key].rsplit(".", 1)
+            if world_mod not in sys.modules:
+                # not loaded yet with worlds.lazy_loading
+                import worlds
+                worlds.load_games(game for game, entry in worlds.world_manifest.items()
+                                  if entry["settings_key"] == key)
             world = cast(type, getattr(__import__(world_mod, fromlist=[world_cls_name]), world_cls_name))
             assert getattr(world, "settings_key") == key
             try:
@@ -0,0 +1,229 @@
+"""
+Generates full multiworlds from the player sets in generation_sets.yaml and records the wall time and peak memory
+of each generation stage, for comparison against a stored baseline report.
+
+Each set runs in its own process, so memory use and class level state of one set don't carry over into the next.
+Run from the Archipelago folder or from this one, e.g. to store a baseline and compare against it later:
+  python test/benchmark/generation.py --sets solo small --report baseline.json
+  python test/benchmark/generation.py --sets solo small --baseline baseline.json
+"""
+import typing
+
+sets_file_name = "generation_sets.yaml"
+# stages are named after the World method or function that gets timed
+world_steps: typing.FrozenSet[str] = frozenset((
+    "generate_early", "create_regions", "create_items", "set_rules", "generate_basic", "pre_fill", "post_fill"))
+
+
+class StageRecorder:
+    """Accumulates the time spent in each stage, as the span from its first start to its last end, since stages
+    like generate_output run in multiple threads at once. Also records the peak memory of the process at the end of
+    each stage, which is a high-water mark and as such includes all stages before it."""
+
+    def __init__(self) -> None:
+        import threading
+        self.lock = threading.Lock()
+        self.stages: typing.Dict[str, typing.Dict[str, typing.Optional[float]]] = {}
+
+    @staticmethod
+    def max_rss() -> typing.Optional[int]:
+        try:
+            import resource
+        except ImportError:  # Windows
+            return None
+        import sys
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kibibytes, except on macOS
+        return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+    def start(self, stage: str) -> None:
+        import time
+        with self.lock:
+            self.stages.setdefault(stage, {"start": time.perf_counter(), "end": None, "max_rss": None})
+
+    def end(self, stage: str) -> None:
+        import time
+        with self.lock:
+            self.stages[stage]["end"] = time.perf_counter()
+            self.stages[stage]["max_rss"] = self.max_rss()
+
+    def wrap(self, stage: typing.Union[str, typing.Callable[..., typing.Optional[str]]],
+             function: typing.Callable[..., typing.Any]) -> typing.Callable[..., typing.Any]:
+        """:param stage: the name of the stage, or a function getting it from the arguments, None to not record"""
+        import functools
+
+        @functools.wraps(function)
+        def wrapper(*args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            name = stage(*args, **kwargs) if callable(stage) else stage
+            if name is None:
+                return function(*args, **kwargs)
+            self.start(name)
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.end(name)
+        return wrapper
+
+    def report(self) -> typing.Dict[str, typing.Dict[str, typing.Optional[float]]]:
+        return {stage: {"time": round(times["end"] - times["start"], 4), "max_rss": times["max_rss"]}
+                for stage, times in sorted(self.stages.items(),
+                                           key=lambda stage_times: (stage_times[0] == "total", stage_times[1]["start"]))}
+
+
+def write_player_files(players: typing.List[typing.Dict[str, typing.Any]], path: str) -> int:
+    import os
+    import yaml
+
+    player_count = 0
+    for entry in players:
+        for _ in range(entry.get("count", 1)):
+            player_count += 1
+            with open(os.path.join(path, f"Player{player_count}.yaml"), "w") as f:
+                yaml.dump({"name": f"Player{player_count}", "game": entry["game"],
+                           entry["game"]: entry.get("options", {})}, f)
+    return player_count
+
+
+def run_set(set_name: str, seed: int, spoiler: int) -> typing.Dict[str, typing.Any]:
+    """Generates a single set in this process and returns its part of the report."""
+    import logging
+    import os
+    import sys
+    import tempfile
+    import yaml
+
+    with open(os.path.join(os.path.dirname(__file__), sets_file_name)) as f:
+        generation_set = yaml.safe_load(f)[set_name]
+
+    recorder = StageRecorder()
+    with tempfile.TemporaryDirectory() as player_files_path, tempfile.TemporaryDirectory() as output_path:
+        player_count = write_player_files(generation_set["players"], player_files_path)
+
+        # like Generate.py, only load the worlds of the games that get rolled
+        os.environ.setdefault("ARCHIPELAGO_LAZY_WORLDS", "1")
+        import Generate
+        import Main
+        from BaseClasses import MultiWorld, Spoiler
+        from worlds import AutoWorld
+
+        AutoWorld.call_all = recorder.wrap(lambda multiworld, method_name, *args:
+                                           method_name if method_name in world_steps else None,
+                                           AutoWorld.call_all)
+        AutoWorld.call_stage = recorder.wrap(lambda multiworld, method_name, *args:
+                                             method_name if method_name == "generate_output" else None,
+                                             AutoWorld.call_stage)
+        AutoWorld.call_single = recorder.wrap(lambda multiworld, method_name, *args:
+                                              method_name if method_name == "generate_output" else None,
+                                              AutoWorld.call_single)
+        Main.distribute_items_restrictive = recorder.wrap("fill", Main.distribute_items_restrictive)
+        Main.flood_items = recorder.wrap("fill", Main.flood_items)
+        Main.balance_multiworld_progression = recorder.wrap("balancing", Main.balance_multiworld_progression)
+        MultiWorld.analyze_spheres = recorder.wrap("sphere_analysis", MultiWorld.analyze_spheres)
+        Spoiler.create_playthrough = recorder.wrap("playthrough", Spoiler.create_playthrough)
+        Spoiler.to_file = recorder.wrap("spoiler", Spoiler.to_file)
+
+        sys.argv = [sys.argv[0], "--player_files_path", player_files_path, "--outputpath", output_path,
+                    "--seed", str(seed), "--spoiler", str(spoiler)]
+        args, seed = Generate.main(Generate.mystery_argparse())
+        recorder.start("total")
+        Main.main(args, seed)
+        recorder.end("total")
+        logging.getLogger("Benchmark").info(f"Generated {set_name} with {player_count} players.")
+
+    return {"players": player_count, "seed": seed, "stages": recorder.report()}
+
+
+def compare(report: typing.Dict[str, typing.Any], baseline: typing.Dict[str, typing.Any],
+            tolerance: float, min_seconds: float) -> typing.List[str]:
+    """Returns a description of each stage that got slower or used more memory than the baseline allows."""
+    regressions: typing.List[str] = []
+    for set_name, set_report in report["sets"].items():
+        baseline_stages = baseline["sets"].get(set_name, {}).get("stages", {})
+        for stage, result in set_report["stages"].items():
+            if stage not in baseline_stages:
+                continue
+            old = baseline_stages[stage]
+            if result["time"] > old["time"] * (1 + tolerance) and result["time"] - old["time"] > min_seconds:
+                regressions.append(f"{set_name} {stage}: {old['time']:.2f}s -> {result['time']:.2f}s")
+            if result["max_rss"] and old["max_rss"] and result["max_rss"] > old["max_rss"] * (1 + tolerance):
+                regressions.append(f"{set_name} {stage}: peak memory "
+                                   f"{old['max_rss'] / 2 ** 20:.0f}MiB -> {result['max_rss'] / 2 ** 20:.0f}MiB")
+    return regressions
+
+
+def format_report(report: typing.Dict[str, typing.Any]) -> str:
+    lines: typing.List[str] = []
+    for set_name, set_report in report["sets"].items():
+        lines.append(f"{set_name} ({set_report['players']} players, seed {set_report['seed']}):")
+        for stage, result in set_report["stages"].items():
+            max_rss = f"{result['max_rss'] / 2 ** 20:8.0f}MiB" if result["max_rss"] else ""
+            lines.append(f"  {stage:<16} {result['time']:10.3f}s {max_rss}")
+    return "\n".join(lines)
+
+
+def run_generation_benchmark(argv: typing.Optional[typing.List[str]] = None) -> int:
+    import argparse
+    import json
+    import logging
+    import os
+    import platform
+    import subprocess
+    import sys
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Times each generation stage of the sets in " + sets_file_name)
+    parser.add_argument("--sets", nargs="+", default=["solo", "small"], help="names of the sets to generate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--spoiler", type=int, default=3)
+    parser.add_argument("--report", help="where to write the JSON report")
+    parser.add_argument("--baseline", help="JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="how much slower or larger than the baseline a stage may get, as a fraction")
+    parser.add_argument("--min-seconds", type=float, default=0.5,
+                        help="time differences smaller than this aren't considered a regression")
+    parser.add_argument("--run-set", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_set:
+        # child process of a run, writing the result of a single set to the report path
+        result = run_set(args.run_set, args.seed, args.spoiler)
+        with open(args.report, "w") as f:
+            json.dump(result, f)
+        return 0
+
+    from Utils import __version__, init_logging
+    init_logging("Benchmark Runner")
+    logger = logging.getLogger("Benchmark")
+
+    report: typing.Dict[str, typing.Any] = {"version": __version__, "python": platform.python_version(), "sets": {}}
+    for set_name in args.sets:
+        logger.info(f"Generating {set_name}.")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            set_report_path = os.path.join(temp_dir, "report.json")
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run-set", set_name, "--report",
+                            set_report_path, "--seed", str(args.seed), "--spoiler", str(args.spoiler)],
+                           check=True, stdin=subprocess.DEVNULL)
+            with open(set_report_path) as f:
+                report["sets"][set_name] = json.load(f)
+
+    logger.info("\n" + format_report(report))
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds)
+        if regressions:
+            logger.error("Regressions against the baseline:\n" + "\n".join(regressions))
+            return 1
+        logger.info("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+    from path_change import change_home
+    change_home()
+    sys.exit(run_generation_benchmark())
@@ -1,12 +1,14 @@
-from typing import List, Iterable
+from typing import Dict, List, Iterable, Optional, Tuple
 import unittest
+from unittest import mock
 
 from Options import Accessibility
-from test.general import generate_items, generate_locations, generate_test_multiworld
-from Fill import FillError, balance_multiworld_progression, fill_restrictive, \
-    distribute_early_items, distribute_items_restrictive
-from BaseClasses import Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
+from test.general import generate_items, generate_locations, generate_test_multiworld, setup_multiworld
+from Fill import FillError, _ExplorationSweep, _FillCandidates, _SphereIndex, balance_multiworld_progression, \
+    fill_restrictive, distribute_early_items, distribute_items_restrictive, swap_location_item, sweep_from_pool
+from BaseClasses import CollectionState, Entrance, LocationProgressType, MultiWorld, Region, Item, Location, \
     ItemClassification
+from worlds.AutoWorld import AutoWorldRegister
 from worlds.generic.Rules import CollectionRule, add_item_rule, locality_rules, set_rule
 
 
@@ -749,6 +751,53 @@ class TestDistributeItemsRestrictive(unittest.TestCase):
             assert item in items_in_locations, "early item to be placed in location"
 
 
+class _ScanFillCandidates(_FillCandidates):
+    """Candidate search of fill_restrictive before the open locations were indexed, asking every location in order."""
+    def pop(self, item: Item, check_access: bool, single_player: bool) -> Optional[Location]:
+        for location in self.open.values():
+            if (not single_player or location.player == item.player) \
+                    and location.can_fill(self.state, item, check_access):
+                del self.open[id(location)]
+                return location
+        return None
+
+
+class TestFillCandidates(unittest.TestCase):
+    def fill(self, games: List[str], seed: int) -> Dict[Tuple[int, str], Tuple[int, str]]:
+        multiworld = setup_multiworld([AutoWorldRegister.world_types[game] for game in games], seed=seed)
+        distribute_items_restrictive(multiworld)
+        return {(location.player, location.name): (location.item.player, location.item.name)
+                for location in multiworld.get_filled_locations()}
+
+    def test_placements_unchanged(self) -> None:
+        """Test that indexing the open locations places the same items as asking every location for a fixed seed"""
+        games = ["Timespinner", "Hollow Knight", "Rogue Legacy"]
+        placements = self.fill(games, 1)
+        with mock.patch("Fill._FillCandidates", _ScanFillCandidates):
+            self.assertEqual(placements, self.fill(games, 1))
+
+
+class _FullExplorationSweep(_ExplorationSweep):
+    """Maximum exploration state of fill_restrictive before sweeps were continued, sweeping every location each time."""
+    def sweep(self, itempool: List[Item], player: Optional[int] = None) -> CollectionState:
+        return sweep_from_pool(self.base_state, itempool, self.base_state.multiworld.get_filled_locations(player))
+
+
+class TestExplorationSweep(unittest.TestCase):
+    def fill(self, games: List[str], seed: int) -> Dict[Tuple[int, str], Tuple[int, str]]:
+        multiworld = setup_multiworld([AutoWorldRegister.world_types[game] for game in games], seed=seed)
+        distribute_items_restrictive(multiworld)
+        return {(location.player, location.name): (location.item.player, location.item.name)
+                for location in multiworld.get_filled_locations()}
+
+    def test_placements_unchanged(self) -> None:
+        """Test that continuing the last sweep places the same items as sweeping every location for a fixed seed"""
+        games = ["Timespinner", "Hollow Knight", "Rogue Legacy"] * 2
+        placements = self.fill(games, 5)
+        with mock.patch("Fill._ExplorationSweep", _FullExplorationSweep):
+            self.assertEqual(placements, self.fill(games, 5))
+
+
 class TestBalanceMultiworldProgression(unittest.TestCase):
     def assertRegionContains(self, region: Region, item: Item) -> bool:
         for location in region.locations:
@@ -801,10 +850,43 @@ class TestBalanceMultiworldProgression(unittest.TestCase):
         self.assertRegionContains(
             self.player1.regions[2], self.player2.prog_items[0])
 
-        balance_multiworld_progression(self.multiworld)
+        report = balance_multiworld_progression(self.multiworld)
 
         self.assertRegionContains(
             self.player1.regions[1], self.player2.prog_items[0])
+        self.assertEqual(report.moved_items, 1)
+        self.assertFalse(report.limit_reached)
+
+    def test_stops_at_test_limit(self) -> None:
+        """Test that progression balancing stops once it tested as many items as its limit"""
+        self.multiworld.progression_balancing[self.player1.id].value = 50
+        self.multiworld.progression_balancing[self.player2.id].value = 50
+
+        report = balance_multiworld_progression(self.multiworld, test_limit=1)
+
+        self.assertEqual(report.tested_items, 1)
+        self.assertTrue(report.limit_reached)
+
+    def test_sphere_index_after_moving_items(self) -> None:
+        """Test that a sphere index reusing the spheres from before moving items earlier matches a new one"""
+        state = CollectionState(self.multiworld)
+        index = _SphereIndex(state, self.multiworld.get_locations())
+        first_sphere = index[0]
+        index[3]
+        moved_to = next(location for location in sorted(first_sphere) if not location.advancement)
+        swap_location_item(self.player2.prog_items[0].location, moved_to)
+        for location in first_sphere:
+            if location.advancement:
+                state.collect(location.item, True, location)
+        remaining = set(self.multiworld.get_locations()) - first_sphere
+
+        moved = index.moved_items(state, remaining, 1)
+        new = _SphereIndex(state, remaining)
+
+        self.assertEqual([moved[num] for num in range(3)], [new[num] for num in range(3)])
+        self.assertEqual(moved.unlocked_counts, new.unlocked_counts)
+        self.assertEqual(moved.beaten, new.beaten)
+        self.assertNotEqual(moved.spheres, index.spheres[1:4])
 
     def test_balances_progression_light(self) -> None:
         """Test that progression balancing still moves items earlier on minimum value"""
@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+
+from Main import collect_process_output, start_output_processes
+from . import TestWorld, generate_test_multiworld
+
+
+class OutputTestWorld(TestWorld):
+    item_name_to_id = {}
+    location_name_to_id = {}
+    process_safe_output = True
+    output_attributes = ("rom_name", "rom_name_available_event")
+
+    def generate_output(self, output_directory: str) -> None:
+        if self.player_name == "Failing":
+            raise Exception("Failing output")
+        with open(os.path.join(output_directory, f"P{self.player}.txt"), "w") as f:
+            f.write(self.player_name)
+        self.rom_name = bytearray(self.player_name, "utf8")
+        self.multiworld.seed_name = "Changed"
+
+
+@unittest.skipUnless("fork" in multiprocessing.get_all_start_methods(), "Output processes need to be forked")
+class TestOutputProcesses(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        for world in self.multiworld.worlds.values():
+            world.__class__ = OutputTestWorld
+            world.rom_name_available_event = threading.Event()
+
+    def generate_output(self, output_directory: str) -> None:
+        pool, futures = start_output_processes(self.multiworld, [1, 2], output_directory, 2)
+        self.assertIsNotNone(pool)
+        with pool:
+            for player, future in futures.items():
+                collect_process_output(self.multiworld.worlds[player], future)
+
+    def test_output_attributes(self) -> None:
+        """Ensure the output gets written and only the output_attributes get taken over from the processes"""
+        seed_name = self.multiworld.seed_name
+        with tempfile.TemporaryDirectory() as output_directory:
+            self.generate_output(output_directory)
+            self.assertEqual(sorted(os.listdir(output_directory)), ["P1.txt", "P2.txt"])
+        for world in self.multiworld.worlds.values():
+            self.assertEqual(world.rom_name, bytearray(world.player_name, "utf8"))
+            self.assertTrue(world.rom_name_available_event.is_set())
+        self.assertEqual(self.multiworld.seed_name, seed_name)
+
+    def test_failure(self) -> None:
+        """Ensure errors get raised and events still get set, so nothing waits for them forever"""
+        self.multiworld.player_name[2] = "Failing"
+        with tempfile.TemporaryDirectory() as output_directory:
+            with self.assertRaisesRegex(Exception, "Failing output"):
+                self.generate_output(output_directory)
+        self.assertTrue(self.multiworld.worlds[2].rom_name_available_event.is_set())
+        self.assertFalse(hasattr(self.multiworld.worlds[2], "rom_name"))
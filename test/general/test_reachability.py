@@ -1,8 +1,9 @@
 import unittest
 
-from BaseClasses import CollectionState
+from BaseClasses import CollectionState, Item, ItemClassification, Region
 from worlds.AutoWorld import AutoWorldRegister
-from . import setup_solo_multiworld
+from worlds.generic.Rules import Has, set_rule
+from . import generate_test_multiworld, setup_solo_multiworld
 
 
 class TestBase(unittest.TestCase):
@@ -79,3 +80,85 @@ class TestBase(unittest.TestCase):
                             locations.add(location)
                     self.assertGreater(len(locations), 0,
                                        msg="Need to be able to reach at least one location to get started.")
+
+
+class TestTrackedReachability(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.multiworld.worlds[1].track_rule_dependencies = True
+        menu = self.multiworld.get_region("Menu", 1)
+        self.cave = Region("Cave", 1, self.multiworld)
+        self.lake = Region("Lake", 1, self.multiworld)
+        self.tower = Region("Tower", 1, self.multiworld)
+        self.vault = Region("Vault", 1, self.multiworld)
+        self.multiworld.regions += [self.cave, self.lake, self.tower, self.vault]
+        menu.connect(self.cave, rule=lambda state: state.has("Lamp", 1))
+        menu.connect(self.lake, rule=lambda state: state.has_any(("Boat", "Flippers"), 1))
+        self.cave.connect(self.tower, rule=lambda state: state.has("Key", 1, 2))
+        tower_to_vault = menu.connect(self.vault, rule=lambda state: state.can_reach_region("Tower", 1))
+        self.multiworld.register_indirect_condition(self.tower, tower_to_vault)
+
+    def collect(self, state: CollectionState, item_name: str) -> None:
+        state.collect(Item(item_name, ItemClassification.progression, None, 1), True)
+
+    def reachable(self, state: CollectionState) -> set:
+        return {region.name for region in self.multiworld.get_regions(1) if region.can_reach(state)}
+
+    def test_only_dependent_entrances_rechecked(self) -> None:
+        """Ensure collecting an item only reevaluates entrances that looked at it, with the same results"""
+        state = CollectionState(self.multiworld)
+        self.assertEqual(self.reachable(state), {"Menu"})
+        self.assertIn("Lamp", state.entrance_dependencies[1])
+        self.assertIn("Flippers", state.entrance_dependencies[1])
+
+        self.collect(state, "Boat")
+        self.assertEqual(self.reachable(state), {"Menu", "Lake"})
+        self.assertNotIn("Boat", state.entrance_dependencies[1])
+        self.collect(state, "Key")
+        self.collect(state, "Key")
+        self.assertEqual(self.reachable(state), {"Menu", "Lake"})
+        self.collect(state, "Lamp")
+        self.assertEqual(self.reachable(state), {"Menu", "Lake", "Cave", "Tower", "Vault"})
+        self.assertFalse(state.blocked_connections[1])
+
+    def test_copy_and_remove(self) -> None:
+        """Ensure copies keep tracking separately and removing items falls back to a full update"""
+        state = CollectionState(self.multiworld)
+        self.collect(state, "Lamp")
+        self.collect(state, "Key")
+        self.assertEqual(self.reachable(state), {"Menu", "Cave"})
+        copy = state.copy()
+        self.collect(copy, "Key")
+        self.assertEqual(self.reachable(copy), {"Menu", "Cave", "Tower", "Vault"})
+        self.assertEqual(self.reachable(state), {"Menu", "Cave"})
+        copy.remove(Item("Lamp", ItemClassification.progression, None, 1))
+        self.assertEqual(self.reachable(copy), {"Menu"})
+
+    def test_untraceable_rule(self) -> None:
+        """Ensure rules that look at all items at once are rechecked on every update"""
+        menu = self.multiworld.get_region("Menu", 1)
+        garden = Region("Garden", 1, self.multiworld)
+        self.multiworld.regions.append(garden)
+        garden_entrance = menu.connect(garden, rule=lambda state: sum(state.prog_items[1].values()) >= 3)
+        state = CollectionState(self.multiworld)
+        self.assertFalse(garden.can_reach(state))
+        self.assertIn(garden_entrance, state.untraced_entrances[1])
+        for item_name in ("Rock", "Stick", "Leaf"):
+            self.collect(state, item_name)
+        self.assertTrue(garden.can_reach(state))
+        self.assertNotIn(garden_entrance, state.untraced_entrances[1])
+
+    def test_rule_objects_not_traced(self) -> None:
+        """Ensure entrances with rule objects are rechecked through the items the rules declare"""
+        menu = self.multiworld.get_region("Menu", 1)
+        garden = Region("Garden", 1, self.multiworld)
+        self.multiworld.regions.append(garden)
+        garden_entrance = menu.connect(garden)
+        set_rule(garden_entrance, Has("Rake", 1) & Has("Shovel", 1, 2))
+        state = CollectionState(self.multiworld)
+        self.assertFalse(garden.can_reach(state))
+        # tracing would have stopped at the missing Rake
+        self.assertIn(garden_entrance, state.entrance_dependencies[1]["Shovel"])
+        for item_name in ("Shovel", "Shovel", "Rake"):
+            self.collect(state, item_name)
+        self.assertTrue(garden.can_reach(state))
@@ -0,0 +1,56 @@
+import unittest
+
+from BaseClasses import CollectionState, Item, ItemClassification, Region
+from worlds.generic.Rules import And, CanReachRegion, Has, HasAll, HasAny, Or, add_rule, set_rule
+from . import generate_test_multiworld
+
+
+class TestRuleObjects(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld()
+        self.menu = self.multiworld.get_region("Menu", 1)
+        self.cave = Region("Cave", 1, self.multiworld)
+        self.tower = Region("Tower", 1, self.multiworld)
+        self.multiworld.regions += [self.cave, self.tower]
+
+    def collect(self, state: CollectionState, item_name: str) -> None:
+        state.collect(Item(item_name, ItemClassification.progression, None, 1), True)
+
+    def test_flatten_and_dedupe(self) -> None:
+        """Ensure combined rules get flattened and item rules of a player merged"""
+        self.assertEqual(And(Has("Lamp", 1), And(Has("Key", 1), Has("Lamp", 1))), HasAll(("Lamp", "Key"), 1))
+        self.assertEqual(And(Has("Key", 1, 2), Has("Lamp", 1), Has("Lamp", 1)), And(Has("Key", 1, 2), Has("Lamp", 1)))
+        rule = Or(Has("Boat", 1), CanReachRegion("Cave", 1), Or(HasAny(("Flippers", "Boat"), 1), Has("Boat", 2)))
+        self.assertEqual(rule, Or(HasAny(("Boat", "Flippers"), 1), CanReachRegion("Cave", 1), Has("Boat", 2)))
+        self.assertEqual(rule.item_dependencies, {("Boat", 1), ("Flippers", 1), ("Boat", 2)})
+        self.assertEqual(rule.region_dependencies, {("Cave", 1)})
+
+    def test_evaluation(self) -> None:
+        """Ensure rules give the same results as the CollectionState methods they stand for"""
+        rule = Has("Key", 1, 2) & (Has("Lamp", 1) | HasAll(("Boat", "Oar"), 1))
+        state = CollectionState(self.multiworld)
+        for item_name, expected in (("Key", False), ("Key", False), ("Boat", False), ("Oar", True)):
+            self.collect(state, item_name)
+            self.assertEqual(rule(state), expected)
+
+    def test_set_and_add_rule(self) -> None:
+        """Ensure set_rule and add_rule share identical rules, combine rule objects
+        and register the indirect conditions of entrances"""
+        cave_entrance = self.menu.connect(self.cave)
+        tower_entrance = self.menu.connect(self.tower)
+        set_rule(cave_entrance, Has("Lamp", 1))
+        set_rule(tower_entrance, Has("Lamp", 1))
+        self.assertIs(cave_entrance.access_rule, tower_entrance.access_rule)
+        add_rule(tower_entrance, CanReachRegion("Cave", 1))
+        self.assertEqual(tower_entrance.access_rule, And(CanReachRegion("Cave", 1), Has("Lamp", 1)))
+        self.assertIn(tower_entrance, self.multiworld.indirect_connections[self.cave])
+        add_rule(cave_entrance, lambda state: state.has("Key", 1), "or")
+        self.assertNotIsInstance(cave_entrance.access_rule, Has)
+
+        state = CollectionState(self.multiworld)
+        self.assertFalse(self.tower.can_reach(state))
+        self.collect(state, "Key")
+        self.assertTrue(self.cave.can_reach(state))
+        self.assertFalse(self.tower.can_reach(state))
+        self.collect(state, "Lamp")
+        self.assertTrue(self.tower.can_reach(state))
@@ -0,0 +1,59 @@
+import unittest
+
+from BaseClasses import MultiWorld
+from Fill import distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import setup_multiworld
+
+
+class TestSphereAnalysis(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = self.generate()
+
+    @staticmethod
+    def generate() -> MultiWorld:
+        multiworld = setup_multiworld([AutoWorldRegister.world_types["Timespinner"],
+                                       AutoWorldRegister.world_types["Rogue Legacy"]], seed=1)
+        distribute_items_restrictive(multiworld)
+        call_all(multiworld, "post_fill")
+        return multiworld
+
+    def test_same_results(self) -> None:
+        """Ensure the sphere analysis gives the same results as computing them from scratch"""
+        self.assertIsNone(self.multiworld.get_sphere_analysis())
+        spheres = list(self.multiworld.get_spheres())
+        beatable = self.multiworld.can_beat_game()
+        accessible = self.multiworld.fulfills_accessibility()
+
+        self.multiworld.analyze_spheres(keep_states=True)
+        self.assertIsNotNone(self.multiworld.get_sphere_analysis())
+        self.assertEqual(list(self.multiworld.get_spheres()), spheres)
+        self.assertEqual(self.multiworld.can_beat_game(), beatable)
+        self.assertEqual(self.multiworld.fulfills_accessibility(), accessible)
+
+    def test_same_playthrough(self) -> None:
+        """Ensure the playthrough built from the sphere analysis matches one built from scratch"""
+        # the playthrough reorders precollected items, so compare against a separately generated multiworld
+        multiworld = self.generate()
+        multiworld.spoiler.create_playthrough(create_paths=False)
+        self.multiworld.analyze_spheres(keep_states=True)
+        self.multiworld.spoiler.create_playthrough(create_paths=False)
+        self.assertEqual(self.multiworld.spoiler.playthrough, multiworld.spoiler.playthrough)
+
+    def test_invalidated_by_moving_items(self) -> None:
+        """Ensure the sphere analysis isn't used anymore once items are moved"""
+        self.multiworld.analyze_spheres()
+        location = next(iter(self.multiworld.get_filled_locations()))
+        item = location.item
+        location.item = None
+        self.assertIsNone(self.multiworld.get_sphere_analysis())
+        location.item = item
+        self.assertIsNone(self.multiworld.get_sphere_analysis())
+        self.multiworld.analyze_spheres()
+        self.assertIsNotNone(self.multiworld.get_sphere_analysis())
+
+    def test_invalidated_by_precollecting_items(self) -> None:
+        """Ensure the sphere analysis isn't used anymore once items are precollected"""
+        self.multiworld.analyze_spheres()
+        self.multiworld.push_precollected(self.multiworld.create_item("Lightwall", 1))
+        self.assertIsNone(self.multiworld.get_sphere_analysis())
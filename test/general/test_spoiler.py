@@ -0,0 +1,35 @@
+import unittest
+
+from Fill import distribute_items_restrictive
+from worlds.AutoWorld import AutoWorldRegister, call_all
+from . import setup_multiworld
+
+
+class TestPlaythroughCulling(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = setup_multiworld([AutoWorldRegister.world_types["Timespinner"],
+                                            AutoWorldRegister.world_types["Rogue Legacy"]], seed=1)
+        distribute_items_restrictive(self.multiworld)
+        call_all(self.multiworld, "post_fill")
+
+    def test_same_as_one_by_one(self) -> None:
+        """Ensure culling a sphere in groups removes the same items as checking each item on its own"""
+        sphere_analysis = self.multiworld.analyze_spheres(keep_states=True)
+        for num, sphere in enumerate(sphere_analysis.spheres):
+            with self.subTest(sphere=num):
+                locations = [location for location in sphere if location.item.advancement]
+                expected = {}
+                for location in locations:
+                    item = location.item
+                    location.item = None
+                    if self.multiworld.can_beat_game(sphere_analysis.states[num]):
+                        expected[location] = item
+                    else:
+                        location.item = item
+                for location, item in expected.items():
+                    location.item = item
+
+                culled = self.multiworld.spoiler._cull_sphere(locations, sphere_analysis.states[num])
+                for location, item in culled.items():
+                    location.item = item
+                self.assertEqual(culled, expected)
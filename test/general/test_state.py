@@ -0,0 +1,77 @@
+import collections
+import unittest
+
+from BaseClasses import CollectionState, CopyOnAccessDict, Item, ItemClassification, Region
+from . import generate_test_multiworld
+
+
+class TestStateCopy(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multiworld = generate_test_multiworld(2)
+        for player in self.multiworld.player_ids:
+            menu = self.multiworld.get_region("Menu", player)
+            cave = Region("Cave", player, self.multiworld)
+            self.multiworld.regions.append(cave)
+            menu.connect(cave, rule=lambda state, player=player: state.has("Lamp", player))
+
+    def lamp(self, player: int) -> Item:
+        return Item("Lamp", ItemClassification.progression, None, player)
+
+    def test_copies_are_independent(self) -> None:
+        """Ensure changes to a copy or the copied state don't show up in the other one"""
+        state = CollectionState(self.multiworld)
+        cave = self.multiworld.get_region("Cave", 1)
+        self.assertFalse(cave.can_reach(state))
+        copy = state.copy()
+        copy.collect(self.lamp(1), True)
+        self.assertTrue(cave.can_reach(copy))
+        self.assertFalse(cave.can_reach(state))
+        self.assertFalse(state.has("Lamp", 1))
+
+        state.collect(self.lamp(2), True)
+        self.assertFalse(copy.has("Lamp", 2))
+        second_copy = copy.copy()
+        self.assertTrue(second_copy.has("Lamp", 1))
+        self.assertFalse(second_copy.has("Lamp", 2))
+
+    def test_unaccessed_players_are_shared(self) -> None:
+        """Ensure per-player data only gets copied for players that are accessed"""
+        state = CollectionState(self.multiworld)
+        state.collect(self.lamp(1), True)
+        copy = state.copy()
+        self.assertIsInstance(copy.prog_items, CopyOnAccessDict)
+        copy.collect(self.lamp(2), True)
+        self.assertNotIn(1, dict.keys(copy.prog_items))
+        self.assertIn(1, copy.prog_items)
+        self.assertEqual(set(copy.prog_items), {1, 2})
+        self.assertEqual(copy.count("Lamp", 1), 1)
+
+    def test_mapping_interface(self) -> None:
+        """Ensure a copied state's per-player data stays complete through the mapping interface without being copied"""
+        state = CollectionState(self.multiworld)
+        state.collect(self.lamp(1), True)
+        copy = state.copy()
+        prog_items = copy.prog_items
+        self.assertEqual(len(prog_items), 2)
+        self.assertEqual(list(prog_items), [1, 2])
+        self.assertEqual(set(prog_items.keys()), {1, 2})
+        self.assertEqual(prog_items, state.prog_items)
+        self.assertEqual(state.prog_items, prog_items)
+        self.assertEqual(repr(prog_items), repr(dict(state.prog_items.items())))
+        self.assertEqual(dict.__len__(prog_items), 0)
+        prog_items_copy = prog_items.copy()
+        self.assertEqual(prog_items_copy, {1: collections.Counter({"Lamp": 1}), 2: collections.Counter()})
+        self.assertIs(prog_items_copy[1], prog_items[1])
+        self.assertIsNot(prog_items[1], state.prog_items[1])
+
+    def test_world_collect_into_copy(self) -> None:
+        """Ensure collecting into a copy through World.collect directly leaves the copied state untouched"""
+        state = CollectionState(self.multiworld)
+        cave = self.multiworld.get_region("Cave", 1)
+        self.assertFalse(cave.can_reach(state))
+        copy = state.copy()
+        self.multiworld.worlds[1].collect(copy, self.lamp(1))
+        self.assertTrue(cave.can_reach(copy))
+        self.assertFalse(state.has("Lamp", 1))
+        self.assertFalse(cave.can_reach(state))
+
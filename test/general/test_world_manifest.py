@@ -0,0 +1,38 @@
+import json
+import unittest
+
+import worlds
+from settings import get_world_settings_key
+from worlds.AutoWorld import AutoWorldRegister
+
+
+class TestWorldManifest(unittest.TestCase):
+    def test_entries_match_worlds(self) -> None:
+        """Ensure the manifest has what's needed in place of worlds that aren't loaded, also after storing it"""
+        manifest = json.loads(json.dumps(worlds.get_world_manifest_entries()))
+        sources = {source.path for source in worlds.world_sources}
+        for game_name, entry in manifest.items():
+            with self.subTest(game=game_name):
+                world_type = AutoWorldRegister.world_types[game_name]
+                self.assertIn(entry["source"], sources)
+                self.assertEqual(entry["world_class"], f"{world_type.__module__}.{world_type.__name__}")
+                self.assertEqual(entry["settings_key"], get_world_settings_key(world_type))
+                self.assertEqual(set(entry["hint_blacklist"]), world_type.hint_blacklist)
+                data_package = world_type.get_data_package_data()
+                for key in ("item_name_to_id", "location_name_to_id", "checksum"):
+                    self.assertEqual(entry["data_package"][key], data_package[key])
+        self.assertIn("Archipelago", manifest)
+
+    def test_cached_entries_match_worlds(self) -> None:
+        """Ensure the manifest entries that were taken from the world cache are still up to date"""
+        for game_name, entry in worlds.world_manifest.items():
+            with self.subTest(game=game_name):
+                world_type = AutoWorldRegister.world_types[game_name]
+                self.assertEqual(entry["data_package"]["item_name_to_id"], world_type.item_name_to_id)
+                self.assertEqual(entry["data_package"]["location_name_to_id"], world_type.location_name_to_id)
+
+    def test_load_games(self) -> None:
+        """Ensure loading games that are already loaded or unknown doesn't do anything"""
+        world_types = dict(AutoWorldRegister.world_types)
+        worlds.load_games([*world_types, "Unknown Game"])
+        self.assertEqual(AutoWorldRegister.world_types, world_types)
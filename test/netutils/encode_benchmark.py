@@ -0,0 +1,49 @@
+"""
+Compares NetUtils.encode to encoding with json only, for the largest messages a server sends.
+Run from the Archipelago folder with `python -m test.netutils.encode_benchmark`.
+"""
+import time
+import typing
+
+
+def run_encode_benchmark(iterations: int = 20) -> None:
+    from NetUtils import Hint, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, _encode, _scan_for_TypedTuples, \
+        encode, orjson
+    from worlds.AutoWorld import AutoWorldRegister
+
+    players = range(1, 1001)
+    messages: typing.Dict[str, typing.List[typing.Dict[str, typing.Any]]] = {
+        "ReceivedItems": [{"cmd": "ReceivedItems", "index": 0,
+                           "items": [NetworkItem(i, i, i % 1000 + 1, i % 8) for i in range(5000)]}],
+        "LocationInfo": [{"cmd": "LocationInfo",
+                          "locations": [NetworkItem(i, i, i % 1000 + 1, i % 8) for i in range(1000)]}],
+        "Connected": [{"cmd": "Connected", "team": 0, "slot": 1,
+                       "players": [NetworkPlayer(0, slot, f"Player{slot}", f"Player{slot}") for slot in players],
+                       "missing_locations": list(range(500)), "checked_locations": [], "slot_data": {},
+                       "slot_info": {slot: NetworkSlot(f"Player{slot}", "Game", SlotType.player) for slot in players},
+                       "hint_points": 0}],
+        "SetReply": [{"cmd": "SetReply", "key": "_read_hints_0_1",
+                      "value": [Hint(1, slot, slot, slot, False, "", 1) for slot in players]}],
+        "DataPackage": [{"cmd": "DataPackage", "data": {"games": {
+            game: world.get_data_package_data() for game, world in AutoWorldRegister.world_types.items()}}}],
+    }
+
+    print(f"Encoding with {'orjson' if orjson else 'json'}, {iterations} times each:")
+    for name, message in messages.items():
+        assert encode(message) == _encode(_scan_for_TypedTuples(message)), f"{name} encodes differently"
+        start = time.perf_counter()
+        for _ in range(iterations):
+            _encode(_scan_for_TypedTuples(message))
+        json_time = (time.perf_counter() - start) / iterations
+        start = time.perf_counter()
+        for _ in range(iterations):
+            encode(message)
+        encode_time = (time.perf_counter() - start) / iterations
+        print(f"  {name}: {encode_time * 1000:.2f}ms instead of {json_time * 1000:.2f}ms, "
+              f"{json_time / encode_time:.1f}x")
+
+
+if __name__ == "__main__":
+    import ModuleUpdate
+    ModuleUpdate.update_ran = True  # only measuring, don't ask to install anything
+    run_encode_benchmark()
@@ -0,0 +1,45 @@
+# Tests for NetUtils.encode
+import unittest
+
+from NetUtils import ClientStatus, Hint, NetworkItem, NetworkPlayer, NetworkSlot, SlotType, Version, \
+    _encode, _scan_for_TypedTuples, encode, orjson
+
+sample_messages = [
+    {"cmd": "ReceivedItems", "index": 0, "items": [NetworkItem(i, -i, i % 3, i % 8) for i in range(100)]},
+    {"cmd": "Connected", "team": 0, "slot": 1, "players": [NetworkPlayer(0, 1, "Alias", "Näme 😀")],
+     "missing_locations": [1, 2], "checked_locations": [], "slot_data": {"option": 1, "list": [1.5, None, True]},
+     "slot_info": {1: NetworkSlot("Name", "Game", SlotType.player), 2: NetworkSlot("Group", "Game", SlotType.group,
+                                                                                     [1])},
+     "hint_points": 0},
+    {"cmd": "SetReply", "key": "_read_hints_0_1", "value": {Hint(1, 2, 3, 4, False, "Entrance", 1)},
+     "original_value": frozenset()},
+    {"cmd": "RoomInfo", "version": Version(0, 5, 1), "tags": ["AP"], "time": 1712345678.123456,
+     "status": ClientStatus.CLIENT_GOAL, "text": "\"quoted\"\\\n\t\x00\u2028"},
+    {"cmd": "Bounced", "data": {"small": 1e-05, "large": 1e16, "negative": -2.5e-07, 1.5: 0.0}},
+    {"cmd": "Retrieved", "keys": {"text": "1e5", "list": "[1,1e5]", "number": 2 ** 64}},
+    {"cmd": "Bounced", "data": {1e-05: 1, -2.5e-07: 2, 1e16: 3, 0.5: 4, "1e-5": 5, "force-1": 6}},
+    {"cmd": "Retrieved", "keys": {"nan": float("nan"), "list": [None, float("inf"), -float("inf")],
+                                  float("nan"): None}},
+]
+
+
+class TestEncode(unittest.TestCase):
+    def test_compatible(self) -> None:
+        """Ensure encoding results in the same string as encoding without orjson"""
+        for index, message in enumerate(sample_messages):
+            with self.subTest(index=index, cmd=message["cmd"]):
+                expected = _encode(_scan_for_TypedTuples([message]))
+                self.assertEqual(encode([message]), expected)
+
+    @unittest.skipIf(orjson is None, "orjson not available")
+    def test_unencodable(self) -> None:
+        """Ensure what can't be encoded fails the same way as without orjson"""
+        for value in (object(), "\ud800", {(1, 2): 3}):
+            with self.subTest(value=value):
+                try:
+                    expected = _encode(_scan_for_TypedTuples(value))
+                except Exception as e:
+                    with self.assertRaises(type(e)):
+                        encode(value)
+                else:
+                    self.assertEqual(encode(value), expected)
@@ -116,6 +116,15 @@ class Base:
             self.assertEqual(self.store.get_for_player(3), {4: {9}})
             self.assertEqual(self.store.get_for_player(1), {1: {13}, 2: {22, 23}})
 
+        def test_get_sphere(self) -> None:
+            self.store.set_spheres([{1: {11, 12}, 4: {9}}, {2: {21}, 1: {99}, 9: {1}}])
+            self.assertEqual(self.store.get_sphere(1, 11), 0)
+            self.assertEqual(self.store.get_sphere(4, 9), 0)
+            self.assertEqual(self.store.get_sphere(2, 21), 1)
+            for player, location in ((1, 13), (1, 99), (9, 1), (0, 11)):
+                with self.assertRaises(KeyError):
+                    self.store.get_sphere(player, location)
+
         def test_get_checked(self) -> None:
             self.assertEqual(self.store.get_checked(full_state, 0, 1), [11, 12, 13])
             self.assertEqual(self.store.get_checked(one_state, 0, 1), [12])
@@ -208,6 +217,21 @@ class TestPurePythonLocationStore(Base.TestLocationStore):
         super().setUp()
 
 
+class TestPurePythonIndexedLocationStore(Base.TestLocationStore):
+    """Run base method tests for pure python implementation with items indexed by receiver."""
+    def setUp(self) -> None:
+        self.store = _LocationStore(sample_data, index_items=True)
+        super().setUp()
+
+    def test_find_item_order(self) -> None:
+        self.assertEqual(list(self.store.find_item({1, 2, 3, 4, 5}, 99)), list(_LocationStore(sample_data).find_item(
+            {1, 2, 3, 4, 5}, 99)))
+        # receivers in reverse order of the store
+        reversed_data = {1: {1: (7, 2, 0)}, 2: {2: (7, 1, 0)}}
+        self.assertEqual(list(_LocationStore(reversed_data, index_items=True).find_item({1, 2}, 7)),
+                         [(1, 1, 7, 2, 0), (2, 2, 7, 1, 0)])
+
+
 class TestPurePythonLocationStoreConstructor(Base.TestLocationStoreConstructor):
     """Run base constructor tests for the pure python implementation."""
     def setUp(self) -> None:
@@ -224,6 +248,26 @@ class TestSpeedupsLocationStore(Base.TestLocationStore):
         super().setUp()
 
 
+@unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
+class TestSpeedupsIndexedLocationStore(Base.TestLocationStore):
+    """Run base method tests for cython implementation with items indexed by receiver."""
+    def setUp(self) -> None:
+        self.assertFalse(LocationStore is _LocationStore, "Failed to load _speedups")
+        self.store = LocationStore(sample_data, index_items=True)
+        super().setUp()
+
+    def test_find_item_order(self) -> None:
+        self.assertEqual(list(self.store.find_item({1, 2, 3, 4, 5}, 99)), list(LocationStore(sample_data).find_item(
+            {1, 2, 3, 4, 5}, 99)))
+        # receivers in reverse order of the store
+        reversed_data = {1: {1: (7, 2, 0)}, 2: {2: (7, 1, 0)}}
+        self.assertEqual(list(LocationStore(reversed_data, index_items=True).find_item({1, 2}, 7)),
+                         [(1, 1, 7, 2, 0), (2, 2, 7, 1, 0)])
+
+    def test_get_size(self) -> None:
+        self.assertGreater(self.store.get_size(), LocationStore(sample_data).get_size())
+
+
 @unittest.skipIf(LocationStore is _LocationStore and not ci, "_speedups not available")
 class TestSpeedupsLocationStoreConstructor(Base.TestLocationStoreConstructor):
     """Run base constructor tests and tests the additional constraints for cython implementation."""
@@ -0,0 +1,18 @@
+import logging
+import os
+import threading
+from tempfile import TemporaryDirectory
+
+
+class TemporaryLogFolder(TemporaryDirectory):
+    """Temporary folder to pass as log_folder, closing the log files opened in it before it gets removed."""
+    def cleanup(self) -> None:
+        for thread in threading.enumerate():
+            if thread.name == "LogCleaner":
+                thread.join()
+        root_logger = logging.getLogger()
+        for handler in root_logger.handlers[:]:
+            if isinstance(handler, logging.FileHandler) and os.path.dirname(handler.baseFilename) == self.name:
+                root_logger.removeHandler(handler)
+                handler.close()
+        super().cleanup()
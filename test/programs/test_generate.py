@@ -10,6 +10,7 @@ from tempfile import TemporaryDirectory
 
 import Generate
 import Main
+from . import TemporaryLogFolder
 
 
 class TestGenerateMain(unittest.TestCase):
@@ -92,3 +93,30 @@ class TestGenerateMain(unittest.TestCase):
             user_path.cached_path = user_path_backup
 
         self.assertOutput(self.output_tempdir.name)
+
+    def test_roll_workers(self):
+        """Ensure options rolled in worker processes don't depend on the number of them"""
+        results = []
+        for workers in ("1", "2"):
+            sys.argv = [sys.argv[0], '--seed', '0',
+                        '--player_files_path', str(self.abs_input_dir),
+                        '--outputpath', self.output_tempdir.name,
+                        '--roll_workers', workers]
+            with TemporaryLogFolder(prefix="AP_logs_") as log_folder:
+                erargs, seed = Generate.main(log_folder=log_folder)
+            results.append({key: {player: getattr(value, "value", value) for player, value in values.items()}
+                            for key, values in vars(erargs).items() if isinstance(values, dict)})
+        self.assertEqual(results[0], results[1])
+
+    def test_attempts(self):
+        """Ensure only the output of the attempt that succeeded is kept"""
+        sys.argv = [sys.argv[0], '--seed', '0',
+                    '--player_files_path', str(self.abs_input_dir),
+                    '--outputpath', self.output_tempdir.name]
+        erargs, seed = Generate.main()
+        with TemporaryDirectory(prefix="AP_logs_") as log_folder:
+            self.assertIn(Generate.generate_attempts(erargs, seed, 2, log_folder), Generate.get_attempt_seeds(seed, 2))
+            self.assertTrue(os.listdir(log_folder))
+
+        self.assertOutput(self.output_tempdir.name)
+        self.assertEqual(len(os.listdir(self.output_tempdir.name)), 1)
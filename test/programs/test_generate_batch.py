@@ -0,0 +1,55 @@
+# Tests for GenerateBatch.py
+
+import os
+import unittest
+from pathlib import Path
+
+import GenerateBatch
+from GenerateBatch import ClassStateSnapshot
+from . import TemporaryLogFolder
+
+
+class TestClassStateSnapshot(unittest.TestCase):
+    def test_restore(self):
+        """Ensure changed, added and mutated class attributes are restored, keeping the identity of containers"""
+        class Example:
+            functions = [len]
+            counts = {"a": 1}
+            name = "example"
+
+        functions = Example.functions
+        snapshot = ClassStateSnapshot((Example,))
+        Example.functions.append(print)
+        Example.counts = {}
+        Example.name = "changed"
+        Example.added = True
+        self.assertEqual(len(snapshot.restore()), 4)
+        self.assertIs(Example.functions, functions)
+        self.assertEqual(Example.functions, [len])
+        self.assertEqual(Example.counts, {"a": 1})
+        self.assertEqual(Example.name, "example")
+        self.assertFalse(hasattr(Example, "added"))
+        self.assertEqual(snapshot.restore(), [])
+
+
+class TestGenerateSeed(unittest.TestCase):
+    input_dir = Path(__file__).parent / "data" / "one_player"
+
+    def setUp(self):
+        self.original_class_state = GenerateBatch.class_state
+        GenerateBatch.class_state = ClassStateSnapshot.of_generation_classes()
+
+    def tearDown(self):
+        GenerateBatch.class_state = self.original_class_state
+
+    def test_consecutive_seeds(self):
+        """Ensure seeds can be generated one after another in the same process, and failures get reported"""
+        with TemporaryLogFolder(prefix="AP_logs_") as log_folder:
+            for seed in (1, 2):
+                result = GenerateBatch.generate_seed(str(self.input_dir), seed, ["--skip_output"], log_folder)
+                self.assertTrue(result["success"], result["error"])
+                self.assertEqual(result["seed"], seed)
+            result = GenerateBatch.generate_seed(str(self.input_dir / "missing"), 3, ["--skip_output"], log_folder)
+            self.assertFalse(result["success"])
+            self.assertIn("FileNotFoundError", result["error"])
+            self.assertEqual(len(os.listdir(log_folder)), 3)
@@ -1,5 +1,18 @@
+import asyncio
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+import typing
 import unittest
-from MultiServer import Context, ServerCommandProcessor
+import zlib
+
+from MultiServer import Context, ServerCommandProcessor, batch_encoded_msgs, encoded_game_packages, \
+    process_client_cmd, register_location_checks
+from NetUtils import Hint, NetworkSlot, SlotType
+from Utils import encode_multidata, MultidataSections
+from worlds.AutoWorld import AutoWorldRegister
 
 
 class TestResolvePlayerName(unittest.TestCase):
@@ -38,3 +51,314 @@ class TestResolvePlayerName(unittest.TestCase):
         assert p.resolve_player("ABC") == (1, 2, "abc"), "case insensitive resolves when 1 match"
         assert p.resolve_player("abcd") == (1, 3, "abCD"), "case insensitive resolves when 1 match"
         assert not p.resolve_player("aB"), "partial name shouldn't resolve to player"
+
+
+class TestLazyWorlds(unittest.TestCase):
+    def test_contexts(self) -> None:
+        """Ensure multiple Contexts can be created in a process that loads worlds lazily"""
+        code = "\n".join((
+            "import ModuleUpdate",
+            "ModuleUpdate.update_ran = True",
+            "import worlds",
+            "from MultiServer import Context",
+            "assert worlds.lazy_loading",
+            "contexts = [Context('', 0, '', '', 0, 0, False) for _ in range(2)]",
+            "assert contexts[0].item_name_groups == contexts[1].item_name_groups",
+            "assert all('item_name_groups' not in package for package in contexts[1].gamespackage.values())",
+            "assert all('item_name_groups' in entry['data_package'] for entry in worlds.world_manifest.values())",
+        ))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                                env={**os.environ, "ARCHIPELAGO_LAZY_WORLDS": "1"})
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+class TestMultidata(unittest.TestCase):
+    def setUp(self) -> None:
+        self.multidata = {
+            "slot_data": {1: {"option": 1}, 2: {"option": 2}},
+            "slot_info": {1: NetworkSlot("Player1", "Archipelago", SlotType.player),
+                          2: NetworkSlot("Player2", "Archipelago", SlotType.player)},
+            "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+            "locations": {1: {1: (1, 2, 0)}, 2: {2: (2, 1, 0)}},
+            "er_hint_data": {},
+            "precollected_items": {1: [], 2: []},
+            "precollected_hints": {1: set(), 2: set()},
+            "version": (0, 5, 1),
+            "minimum_versions": {"server": (0, 0, 0), "clients": {}},
+            "seed_name": "Test",
+            "spheres": [{1: {1}}, {2: {2}}],
+            "datapackage": {"Archipelago": AutoWorldRegister.world_types["Archipelago"].get_data_package_data()},
+        }
+
+    def test_sections(self) -> None:
+        """Ensure sectioned multidata decodes to the original, one section at a time"""
+        decoded = Context.decompress(encode_multidata(self.multidata))
+        self.assertIsInstance(decoded, MultidataSections)
+        self.assertIsNotNone(decoded.raw_section("spheres"))
+        self.assertEqual(decoded["spheres"], self.multidata["spheres"])
+        self.assertIsNone(decoded.raw_section("spheres"))
+        self.assertIsNotNone(decoded["slot_data"].raw_section(2))
+        self.assertEqual(decoded["slot_data"][1], {"option": 1})
+        self.assertIsNotNone(decoded["slot_data"].raw_section(2))
+        self.assertEqual(dict(decoded), self.multidata)
+        # untouched and changed sections survive encoding again
+        decoded = Context.decompress(encode_multidata(self.multidata))
+        decoded["seed_name"] = "Changed"
+        del decoded["er_hint_data"]
+        self.assertEqual(dict(Context.decompress(encode_multidata(decoded))),
+                         {**{key: value for key, value in self.multidata.items() if key != "er_hint_data"},
+                          "seed_name": "Changed"})
+
+    def test_format_3(self) -> None:
+        """Ensure multidata of the previous format can still be read"""
+        decoded = Context.decompress(bytes([3]) + zlib.compress(pickle.dumps(self.multidata), 9))
+        self.assertEqual(decoded, self.multidata)
+
+    def test_load(self) -> None:
+        """Ensure the server only decodes slot_data and spheres once they're needed"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        decoded = Context.decompress(encode_multidata(self.multidata))
+        ctx._load(decoded, {}, False)
+        self.assertIsNotNone(decoded["slot_data"].raw_section(1))
+        self.assertIsNotNone(decoded.raw_section("spheres"))
+        self.assertEqual(ctx.read_data["slot_data_1"](), {"option": 1})
+        self.assertIsNone(decoded["slot_data"].raw_section(1))
+        self.assertEqual(ctx.get_sphere(2, 2), 1)
+        with self.assertRaises(KeyError):
+            ctx.get_sphere(2, 1)
+
+
+def load_context(precollected_hints: typing.Optional[typing.Dict[int, typing.Set[Hint]]] = None) -> Context:
+    """Loads a Context with two players, where location -2 of player 1 has an item for player 2."""
+    ctx = Context("", 0, "", "", 0, 0, False)
+    ctx._load({
+        "slot_data": {1: {}, 2: {}},
+        "slot_info": {1: NetworkSlot("Player1", "Archipelago", SlotType.player),
+                      2: NetworkSlot("Player2", "Archipelago", SlotType.player)},
+        "connect_names": {"Player1": (0, 1), "Player2": (0, 2)},
+        "locations": {1: {-2: (-1, 2, 0)}, 2: {}},
+        "er_hint_data": {},
+        "precollected_items": {1: [], 2: []},
+        "precollected_hints": precollected_hints or {1: set(), 2: set()},
+        "version": (0, 5, 1),
+        "minimum_versions": {"server": (0, 0, 0), "clients": {}},
+        "seed_name": "Test",
+        "datapackage": {"Archipelago": AutoWorldRegister.world_types["Archipelago"].get_data_package_data()},
+    }, {}, False)
+    return ctx
+
+
+class TestHints(unittest.IsolatedAsyncioTestCase):
+    async def test_found(self) -> None:
+        """Ensure checking a location finds its hints for all slots that have them, and only notifies those"""
+        hint = Hint(2, 1, -2, -1, False)
+        ctx = load_context({1: {hint}, 2: {hint}})
+        changed = []
+        ctx.on_changed_hints = lambda team, slot: changed.append((team, slot))
+        ctx.mark_hints_found(0, 2, [-2])
+        self.assertEqual(changed, [])
+        register_location_checks(ctx, 0, 1, [-2])
+        self.assertEqual(sorted(changed), [(0, 1), (0, 2)])
+        self.assertEqual(ctx.hints[0, 1], {hint._replace(found=True)})
+        self.assertEqual(ctx.hints[0, 2], {hint._replace(found=True)})
+        self.assertEqual(ctx.unfound_hints, {})
+
+
+class TestDataPackage(unittest.TestCase):
+    def test_encoded(self) -> None:
+        """Ensure the assembled DataPackage matches encoding it whole, and packages get encoded once per checksum,
+        also across Contexts"""
+        ctx = load_context()
+        games = list(ctx.gamespackage)[:3]
+        encoded = ctx.get_data_package_msg(games)
+        self.assertEqual(encoded, ctx.dumper([{"cmd": "DataPackage", "data": {"games": {
+            game: ctx.gamespackage[game] for game in games}}}]))
+        self.assertEqual(ctx.get_data_package_msg([]), ctx.dumper([{"cmd": "DataPackage", "data": {"games": {}}}]))
+        key = games[0], ctx.gamespackage[games[0]]["checksum"]
+        cached = encoded_game_packages[key]
+        load_context().get_data_package_msg(games[:1])
+        self.assertIs(encoded_game_packages[key], cached)
+        ctx.gamespackage[games[0]] = {**ctx.gamespackage[games[0]], "checksum": "changed"}
+        ctx.get_data_package_msg(games[:1])
+        self.assertIn((games[0], "changed"), encoded_game_packages)
+        del encoded_game_packages[games[0], "changed"]
+
+
+class TestDataStorage(unittest.IsolatedAsyncioTestCase):
+    class Client:
+        auth = True
+        team = 0
+        slot = 1
+
+        def __init__(self) -> None:
+            self.stored_data_notification_keys: typing.Set[str] = set()
+            self.stored_data_notification_prefixes: typing.Set[str] = set()
+
+    def setUp(self) -> None:
+        self.ctx = load_context()
+        self.sent: typing.List[typing.Tuple[typing.Set[TestDataStorage.Client], dict]] = []
+        self.ctx.broadcast = lambda clients, msgs: self.sent.extend((set(clients), msg) for msg in msgs)
+
+        async def send_msgs(client: TestDataStorage.Client, msgs: typing.List[dict]) -> bool:
+            self.ctx.broadcast([client], msgs)
+            return True
+        self.ctx.send_msgs = send_msgs
+
+    async def test_prefixes(self) -> None:
+        """Ensure clients get SetReply packages for keys starting with the prefixes they registered, once each"""
+        client, other = self.Client(), self.Client()
+        await process_client_cmd(self.ctx, client, {"cmd": "SetNotify", "keys": ["deathlink_1"],
+                                                    "prefixes": ["deathlink_", "death"]})
+        await process_client_cmd(self.ctx, other, {"cmd": "SetNotify", "prefixes": ["_read_client_status_0_"]})
+        await process_client_cmd(self.ctx, other, {"cmd": "Set", "key": "deathlink_1", "want_reply": False,
+                                                   "operations": [{"operation": "replace", "value": 1}]})
+        await process_client_cmd(self.ctx, other, {"cmd": "Set", "key": "other", "want_reply": False,
+                                                   "operations": [{"operation": "replace", "value": 1}]})
+        self.ctx.on_client_status_change(0, 2)
+        self.assertEqual([(clients, msg["key"]) for clients, msg in self.sent],
+                         [({client}, "deathlink_1"), ({other}, "_read_client_status_0_2")])
+        await process_client_cmd(self.ctx, client, {"cmd": "SetNotify", "prefixes": "deathlink_"})
+        self.assertEqual(self.sent[-1][1]["cmd"], "InvalidPacket")
+
+    async def test_remove_notifications(self) -> None:
+        """Ensure keys and prefixes are dropped once the last client that registered them is removed"""
+        client, other = self.Client(), self.Client()
+        await process_client_cmd(self.ctx, client, {"cmd": "SetNotify", "keys": ["deathlink_1"],
+                                                    "prefixes": ["deathlink_", "death"]})
+        await process_client_cmd(self.ctx, other, {"cmd": "SetNotify", "prefixes": ["death"]})
+        self.ctx.remove_stored_data_notifications(client)
+        self.assertEqual(self.ctx.stored_data_notification_clients, {})
+        self.assertEqual(self.ctx.stored_data_prefix_notification_clients.keys(), {len("death")})
+        self.assertEqual(self.ctx.get_stored_data_notification_clients("deathlink_1"), {other})
+        self.ctx.remove_stored_data_notifications(other)
+        self.assertEqual(self.ctx.stored_data_prefix_notification_clients, {})
+
+    async def test_sets(self) -> None:
+        """Ensure multiple keys get set in order, and nothing is stored if one of the operations fails"""
+        client = self.Client()
+        self.ctx.stored_data["list"] = [1]
+        await process_client_cmd(self.ctx, client, {"cmd": "Set", "sets": [
+            {"key": "list", "operations": [{"operation": "add", "value": [2]}]},
+            {"key": "number", "default": 1, "want_reply": False, "operations": [{"operation": "mul", "value": 3}]},
+            {"key": "list", "tag": 1, "operations": [{"operation": "remove", "value": 1}]},
+        ]})
+        self.assertEqual(self.ctx.stored_data, {"list": [2], "number": 3})
+        self.assertEqual([msg for clients, msg in self.sent], [
+            {"cmd": "SetReply", "key": "list", "original_value": [1], "value": [1, 2],
+             "operations": [{"operation": "add", "value": [2]}]},
+            {"cmd": "SetReply", "key": "list", "original_value": [1, 2], "value": [2], "tag": 1,
+             "operations": [{"operation": "remove", "value": 1}]},
+        ])
+        with self.assertRaises(KeyError):
+            await process_client_cmd(self.ctx, client, {"cmd": "Set", "sets": [
+                {"key": "list", "operations": [{"operation": "add", "value": [3]}]},
+                {"key": "list", "operations": [{"operation": "pop", "value": 0}, {"operation": "?", "value": 0}]},
+            ]})
+        self.assertEqual(self.ctx.stored_data, {"list": [2], "number": 3})
+        await process_client_cmd(self.ctx, client, {"cmd": "Set", "sets": [{"key": "_read_race_mode",
+                                                                            "operations": []}]})
+        self.assertEqual(self.sent[-1][1]["cmd"], "InvalidPacket")
+
+    async def test_read_data_cache(self) -> None:
+        """Ensure _read_ values are computed once, until what they're read from changes"""
+        hints = self.ctx.get_read_data("hints_0_1")
+        self.assertIs(self.ctx.get_read_data("hints_0_1"), hints)
+        self.assertIsNone(self.ctx.get_read_data("missing"))
+        self.ctx.notify_hints(0, [Hint(2, 1, -2, -1, False)])
+        self.assertEqual(self.ctx.get_read_data("hints_0_1"), [Hint(2, 1, -2, -1, False)])
+        self.ctx.client_game_state[0, 1] = 30
+        self.ctx.on_client_status_change(0, 1)
+        self.assertEqual(self.ctx.get_read_data("client_status_0_1"), 30)
+
+
+class TestBatching(unittest.IsolatedAsyncioTestCase):
+    class Client:
+        def __init__(self, tags: typing.List[str]) -> None:
+            self.tags = tags
+            self.outbox: typing.List[str] = []
+            self.batches_messages = "NoBatching" not in tags
+
+    def test_batch_encoded_msgs(self) -> None:
+        self.assertEqual(list(batch_encoded_msgs(['[{"a":1}]', '[]', '[{"b":2},{"c":3}]'], 100)),
+                         ['[{"a":1},{"b":2},{"c":3}]'])
+        self.assertEqual(list(batch_encoded_msgs(['[{"a":1}]', '[{"b":2}]', '[{"c":3}]'], 16)),
+                         ['[{"a":1},{"b":2}]', '[{"c":3}]'])
+        self.assertEqual(list(batch_encoded_msgs(['[{"long":1}]', '[{"a":1}]'], 4)), ['[{"long":1}]', '[{"a":1}]'])
+
+    async def test_broadcast(self) -> None:
+        """Ensure broadcasts are sent once per tick, in order, and one at a time to clients that don't batch"""
+        ctx = Context("", 0, "", "", 0, 0, False)
+        sent: typing.List[typing.Tuple[typing.List[TestBatching.Client], str]] = []
+        ctx._broadcast_encoded_msgs = lambda clients, msg: sent.append((list(clients), msg))
+        batching = [self.Client([]), self.Client(["AP"])]
+        not_batching = self.Client(["NoBatching"])
+        for number in range(3):
+            ctx.broadcast([*batching, not_batching], [{"cmd": "Test", "number": number}])
+        ctx.broadcast(batching[:1], [{"cmd": "Test", "number": 3}])
+        await asyncio.sleep(0)
+        self.assertEqual([msg for clients, msg in sent if clients == [not_batching]],
+                         [ctx.dumper([{"cmd": "Test", "number": number}]) for number in range(3)])
+        self.assertEqual([(clients, msg) for clients, msg in sent if clients != [not_batching]], [
+            (batching[:1], ctx.dumper([{"cmd": "Test", "number": number} for number in range(4)])),
+            (batching[1:], ctx.dumper([{"cmd": "Test", "number": number} for number in range(3)])),
+        ])
+        self.assertEqual(ctx.outbox_clients, [])
+
+
+class TestSaveJournal(unittest.IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.save_filename = os.path.join(self.directory.name, "Test.apsave")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def load(self) -> Context:
+        ctx = load_context()
+        ctx.save_filename = self.save_filename
+        ctx._start_async_saving = lambda: None
+        ctx.init_save(True, journal=True)
+        return ctx
+
+    async def test_replay(self) -> None:
+        """Ensure changes saved to the journal are there after loading again, without rewriting the save"""
+        ctx = self.load()
+        save_size = os.path.getsize(self.save_filename)
+        register_location_checks(ctx, 0, 1, [-2])
+        ctx.stored_data["key"] = "value"
+        ctx.record_change("stored_data", "key")
+        ctx.hint_cost = 50
+        ctx.random.seed(1)
+        ctx.record_change("random", None)
+        self.assertTrue(ctx.save())
+        self.assertEqual(os.path.getsize(self.save_filename), save_size)
+        self.assertGreater(ctx.journal.size, 0)
+        # an entry that was only partially written gets ignored
+        with open(ctx.journal.path, "ab") as f:
+            f.write(b"\xff\x00")
+
+        loaded = self.load()
+        self.assertEqual(loaded.location_checks[0, 1], {-2})
+        self.assertEqual(len(loaded.received_items[0, 2, True]), 1)
+        self.assertEqual(loaded.stored_data["key"], "value")
+        self.assertEqual(loaded.hint_cost, 50)
+        self.assertEqual(loaded.client_activity_timers, ctx.client_activity_timers)
+        self.assertEqual(loaded.random.getstate(), ctx.random.getstate())
+        # loading merged the journal into the save
+        self.assertEqual(os.path.getsize(loaded.journal.path), 0)
+        self.assertEqual(loaded.journal.generation, 2)
+
+    async def test_compaction(self) -> None:
+        """Ensure a journal that outgrew the save gets merged into it, and its old entries don't get applied again"""
+        ctx = self.load()
+        ctx.journal.min_compaction_size = 0
+        with open(ctx.journal.path, "ab") as f:
+            entry = zlib.compress(pickle.dumps((ctx.journal.generation, [("set", "stored_data", "key", "old")])))
+            f.write(len(entry).to_bytes(4, "little") + entry)
+        ctx.journal.size = os.path.getsize(ctx.journal.path) + os.path.getsize(self.save_filename)
+        ctx.stored_data["key"] = "new"
+        ctx.record_change("stored_data", "key")
+        self.assertTrue(ctx.save())
+        self.assertEqual(ctx.journal.size, 0)
+        self.assertEqual(self.load().stored_data["key"], "new")
@@ -300,6 +300,22 @@ class World(metaclass=AutoWorldRegister):
     If False, everything is rechecked at every step, which is slower computationally, 
     but may be desirable in complex/dynamic worlds."""
 
+    track_rule_dependencies: bool = False
+    """If True, CollectionState records which items each blocked Entrance's access_rule looked at, and only rechecks
+    those Entrances when one of these items changes, instead of every blocked Entrance on every collect.
+    Only enable this if Entrance access rules depend solely on this player's state.prog_items and on regions registered
+    through MultiWorld.register_indirect_condition(). Requires explicit_indirect_conditions.
+    Entrances using the rule objects of worlds.generic.Rules skip the recording and use the rule's item_dependencies."""
+
+    process_safe_output: bool = False
+    """If True, generate_output may run in a forked process when enabled through host.yaml's
+    generator.output_processes. It then works on a copy of the multiworld, so it may not wait for other threads and
+    anything it changes is lost, except the attributes listed in output_attributes."""
+
+    output_attributes: Tuple[str, ...] = ()
+    """Attributes that generate_output sets for later steps, like a rom_name for modify_multidata, which get copied
+    back from its process. threading.Event attributes among them get set once the process is done instead."""
+
     multiworld: "MultiWorld"
     """autoset on creation. The MultiWorld object for the currently generating multiworld."""
     player: int
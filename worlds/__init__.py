@@ -7,9 +7,9 @@ import warnings
 import zipimport
 import time
 import dataclasses
-from typing import Dict, List, TypedDict
+from typing import Dict, Iterable, List, Optional, Set, TypedDict
 
-from Utils import local_path, user_path
+from Utils import cache_path, local_path, user_path, __version__
 
 local_folder = os.path.dirname(__file__)
 user_folder = user_path("worlds") if user_path() != local_path() else user_path("custom_worlds")
@@ -27,8 +27,15 @@ __all__ = {
     "GamesPackage",
     "DataPackage",
     "failed_world_loads",
+    "lazy_loading",
+    "world_manifest",
+    "load_games",
 }
 
+# Only load the worlds that get asked for through load_games, with the data packages of all other games coming from
+# the world manifest in the world cache. Set by Generate and MultiServer when run directly, "0" turns it off again.
+lazy_loading: bool = os.environ.get("ARCHIPELAGO_LAZY_WORLDS", "0") != "0"
+
 
 failed_world_loads: List[str] = []
 
@@ -45,6 +52,14 @@ class DataPackage(TypedDict):
     games: Dict[str, GamesPackage]
 
 
+class WorldManifestEntry(TypedDict):
+    source: str  # WorldSource.path of the world handling the game
+    world_class: str  # module and name of the World class
+    settings_key: Optional[str]  # None if the world has no settings in host.yaml
+    hint_blacklist: List[str]
+    data_package: GamesPackage
+
+
 @dataclasses.dataclass(order=True)
 class WorldSource:
     path: str  # typically relative path from this module
@@ -55,6 +70,10 @@ class WorldSource:
     def __repr__(self) -> str:
         return f"{self.__class__.__name__}({self.path}, is_zip={self.is_zip}, relative={self.relative})"
 
+    @property
+    def module_name(self) -> str:
+        return f"worlds.{os.path.basename(self.path).rsplit('.', 1)[0]}"
+
     @property
     def resolved_path(self) -> str:
         if self.relative:
@@ -122,15 +141,178 @@ for folder in (folder for folder in (user_folder, local_folder) if folder):
             elif entry.is_file() and entry.name.endswith(".apworld"):
                 world_sources.append(WorldSource(file_name, is_zip=True, relative=relative))
 
-# import all submodules to trigger AutoWorldRegister
 world_sources.sort()
-for world_source in world_sources:
-    world_source.load()
+# game name -> where to find its world and its data package
+world_manifest: Dict[str, WorldManifestEntry] = {}
+_tried_sources: Set[str] = set()
+
+
+class _CachedWorldSource(TypedDict):
+    fingerprint: str
+    games: Dict[str, WorldManifestEntry]
+
+
+def _get_world_cache_path() -> str:
+    import hashlib
+    # multiple installs share the cache folder
+    folders = f"{local_folder}|{user_folder}"
+    return cache_path("world_manifest", f"{hashlib.sha1(folders.encode()).hexdigest()[:16]}.pickle")
+
+
+# core files that shape the manifest entries of every world, such as the data packages and settings keys
+_core_files = ("BaseClasses.py", "Options.py", "settings.py", "Utils.py",
+               os.path.join("worlds", "__init__.py"), os.path.join("worlds", "AutoWorld.py"))
+
+
+def _describe_files(paths: Iterable[str]) -> bytes:
+    descriptions: List[str] = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:  # frozen installs don't ship the core files as source
+            descriptions.append(f"{path}|missing")
+        else:
+            descriptions.append(f"{path}|{stat.st_size}|{stat.st_mtime_ns}")
+    return "\n".join(descriptions).encode()
+
+
+def _get_core_fingerprint() -> bytes:
+    """Hash of the version and of the path, size and modification time of the core files."""
+    import hashlib
+    fingerprint = hashlib.sha1(__version__.encode())
+    root_folder = os.path.dirname(local_folder)
+    fingerprint.update(_describe_files(os.path.join(root_folder, file) for file in _core_files))
+    return fingerprint.digest()
+
+
+def _get_source_fingerprint(source: WorldSource, core_fingerprint: bytes) -> str:
+    """Hash of the core fingerprint and of the path, size and modification time of every file of the world source."""
+    import hashlib
+    fingerprint = hashlib.sha1(core_fingerprint)
+    if source.is_zip:
+        paths = [source.resolved_path]
+    else:
+        paths = []
+        for root, dirs, files in os.walk(source.resolved_path):
+            dirs[:] = sorted(folder for folder in dirs if folder != "__pycache__")
+            paths.extend(os.path.join(root, file) for file in sorted(files))
+    fingerprint.update(_describe_files(paths))
+    return fingerprint.hexdigest()
+
+
+def _read_world_cache() -> Dict[str, _CachedWorldSource]:
+    import zlib
+    from Utils import restricted_loads
+    try:
+        with open(_get_world_cache_path(), "rb") as f:
+            return restricted_loads(zlib.decompress(f.read()))
+    except Exception:  # missing or unreadable, gets rebuilt
+        return {}
+
+
+def _write_world_cache(world_cache: Dict[str, _CachedWorldSource]) -> None:
+    import pickle
+    import zlib
+    path = _get_world_cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(zlib.compress(pickle.dumps(world_cache, pickle.HIGHEST_PROTOCOL)))
+        os.replace(f"{path}.tmp", path)
+    except OSError as e:
+        logging.warning(f"Could not write world cache: {e}")
+
+
+def get_world_manifest_entries(data_packages: Optional[Dict[str, GamesPackage]] = None) \
+        -> Dict[str, WorldManifestEntry]:
+    """
+    Builds the manifest entries of all loaded worlds that come from one of the world sources.
+
+    :param data_packages: already built data packages by game, to not build them again
+    """
+    from settings import get_world_settings_key
+    sources = {source.module_name: source.path for source in world_sources}
+    manifest: Dict[str, WorldManifestEntry] = {}
+    for game, world in AutoWorldRegister.world_types.items():
+        module_name = ".".join(world.__module__.split(".", 2)[:2])
+        if module_name in sources:
+            manifest[game] = {
+                "source": sources[module_name],
+                "world_class": f"{world.__module__}.{world.__name__}",
+                "settings_key": get_world_settings_key(world),
+                "hint_blacklist": sorted(world.hint_blacklist),
+                "data_package": data_packages[game] if data_packages and game in data_packages
+                else world.get_data_package_data(),
+            }
+    return manifest
+
+
+def _load_source(source: WorldSource) -> None:
+    if source.path not in _tried_sources:
+        _tried_sources.add(source.path)
+        source.load()
+
+
+def load_games(games: Iterable[str]) -> None:
+    """
+    Loads the worlds of the given games, if they aren't loaded yet, which is only the case with lazy_loading.
+    Unknown games retry the worlds that failed to load before and are otherwise left for the caller to report.
+    """
+    missing = set(games) - AutoWorldRegister.world_types.keys()
+    if not missing:
+        return
+    sources = {source.path: source for source in world_sources}
+    manifest_sources = {entry["source"] for entry in world_manifest.values()}
+    for game in sorted(missing):
+        if game in world_manifest:
+            _load_source(sources[world_manifest[game]["source"]])
+        else:
+            for source in world_sources:
+                if source.path not in manifest_sources:
+                    _load_source(source)
+
 
-# Build the data package for each game.
 from .AutoWorld import AutoWorldRegister
 
-network_data_package: DataPackage = {
-    "games": {world_name: world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
-}
+# The world cache holds the manifest entries of each world source, valid as long as its files and the core files don't
+# change. It's only of use to lazy_loading, as otherwise building the manifest entries is cheap next to loading worlds.
+_fingerprints: Dict[str, str] = {}
+_cached_sources: Dict[str, _CachedWorldSource] = {}
+if lazy_loading:
+    _core_fingerprint = _get_core_fingerprint()
+    _fingerprints = {source.path: _get_source_fingerprint(source, _core_fingerprint) for source in world_sources}
+    _cached_sources = {path: cached_source for path, cached_source in _read_world_cache().items()
+                       if _fingerprints.get(path) == cached_source["fingerprint"]}
+    # only load changed world sources to update their cache, the generic world is always needed
+    for cached_source in _cached_sources.values():
+        world_manifest.update(cached_source["games"])
+    for world_source in world_sources:
+        if world_source.path not in _cached_sources:
+            _load_source(world_source)
+    load_games(("Archipelago",))
+else:
+    # import all submodules to trigger AutoWorldRegister
+    for world_source in world_sources:
+        _load_source(world_source)
+
+# Build the data package for each game, unless cached.
+world_manifest.update(get_world_manifest_entries({
+    game: entry["data_package"] for cached_source in _cached_sources.values()
+    for game, entry in cached_source["games"].items()
+}))
+network_data_package: DataPackage
+if lazy_loading:
+    network_data_package = {"games": {game: entry["data_package"] for game, entry in world_manifest.items()}}
+else:
+    network_data_package = {
+        "games": {world_name: world_manifest[world_name]["data_package"] if world_name in world_manifest
+                  else world.get_data_package_data() for world_name, world in AutoWorldRegister.world_types.items()},
+    }
 
+if lazy_loading and _cached_sources.keys() != _fingerprints.keys():
+    _write_world_cache({
+        world_source.path: _cached_sources.get(world_source.path) or {
+            "fingerprint": _fingerprints[world_source.path],
+            "games": {game: entry for game, entry in world_manifest.items() if entry["source"] == world_source.path},
+        } for world_source in world_sources
+    })
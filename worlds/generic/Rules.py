@@ -1,6 +1,7 @@
 import collections
 import logging
 import typing
+import weakref
 
 from BaseClasses import LocationProgressType, MultiWorld, Location, Region, Entrance
 
@@ -96,7 +97,181 @@ def exclusion_rules(multiworld: MultiWorld, player: int, exclude_locations: typi
                 logging.warning(f"Unable to exclude location {loc_name} in player {player}'s world.")
 
 
+class Rule:
+    """
+    Base of composable access rules, usable anywhere a CollectionRule is, including set_rule and add_rule.
+    Unlike lambdas, rules compare by value, get flattened and deduplicated when combined,
+    and know which items and regions they depend on through item_dependencies and region_dependencies.
+    """
+    __slots__ = ("item_dependencies", "region_dependencies", "_key", "__weakref__")
+    item_dependencies: typing.FrozenSet[typing.Tuple[str, int]]
+    """(item name, player) of every item the rule looks at"""
+    region_dependencies: typing.FrozenSet[typing.Tuple[str, int]]
+    """(region name, player) of every region the rule checks for reachability"""
+    _key: typing.Tuple[typing.Any, ...]
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        raise NotImplementedError
+
+    def __and__(self, other: "Rule") -> "Rule":
+        return And(self, other)
+
+    def __or__(self, other: "Rule") -> "Rule":
+        return Or(self, other)
+
+    def __eq__(self, other: object) -> bool:
+        return type(other) is type(self) and other._key == self._key
+
+    def __hash__(self) -> int:
+        return hash((type(self), self._key))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}{self._key!r}"
+
+
+class Has(Rule):
+    __slots__ = ("item", "player", "count")
+
+    def __init__(self, item: str, player: int, count: int = 1) -> None:
+        self.item = item
+        self.player = player
+        self.count = count
+        self._key = (item, player, count)
+        self.item_dependencies = frozenset(((item, player),))
+        self.region_dependencies = frozenset()
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        return state.has(self.item, self.player, self.count)
+
+
+class HasAll(Rule):
+    __slots__ = ("items", "player")
+
+    def __init__(self, items: typing.Iterable[str], player: int) -> None:
+        self.items = tuple(dict.fromkeys(items))
+        self.player = player
+        self._key = (self.items, player)
+        self.item_dependencies = frozenset((item, player) for item in self.items)
+        self.region_dependencies = frozenset()
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        return state.has_all(self.items, self.player)
+
+
+class HasAny(Rule):
+    __slots__ = ("items", "player")
+
+    def __init__(self, items: typing.Iterable[str], player: int) -> None:
+        self.items = tuple(dict.fromkeys(items))
+        self.player = player
+        self._key = (self.items, player)
+        self.item_dependencies = frozenset((item, player) for item in self.items)
+        self.region_dependencies = frozenset()
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        return state.has_any(self.items, self.player)
+
+
+class CanReachRegion(Rule):
+    """When set on an Entrance through set_rule or add_rule, the indirect condition gets registered automatically,
+    which requires the region to already exist."""
+    __slots__ = ("region", "player")
+
+    def __init__(self, region: str, player: int) -> None:
+        self.region = region
+        self.player = player
+        self._key = (region, player)
+        self.item_dependencies = frozenset()
+        self.region_dependencies = frozenset(((region, player),))
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        return state.can_reach_region(self.region, self.player)
+
+
+class _Combined(Rule):
+    """Shared flattening and deduplication of And and Or."""
+    __slots__ = ("rules",)
+    rules: typing.Tuple[Rule, ...]
+    _items_rule: typing.ClassVar[typing.Type[typing.Union[HasAll, HasAny]]]
+    """rule into which single Has rules and rules of this type get merged, per player"""
+
+    def __new__(cls, *rules: Rule) -> Rule:
+        flattened: typing.Dict[Rule, None] = {}
+        for rule in rules:
+            for sub_rule in (rule.rules if type(rule) is cls else (rule,)):
+                flattened[intern_rule(sub_rule)] = None
+        combined = cls._merge_items(flattened)
+        if len(combined) == 1:
+            return combined[0]
+        self = super().__new__(cls)
+        self.rules = combined
+        self._key = combined
+        self.item_dependencies = frozenset().union(*(rule.item_dependencies for rule in combined))
+        self.region_dependencies = frozenset().union(*(rule.region_dependencies for rule in combined))
+        return self
+
+    @classmethod
+    def _merge_items(cls, rules: typing.Iterable[Rule]) -> typing.Tuple[Rule, ...]:
+        merged: typing.List[typing.Optional[Rule]] = []
+        items_per_player: typing.Dict[int, typing.Tuple[int, typing.List[str]]] = {}
+        for rule in rules:
+            if type(rule) is Has and rule.count == 1:
+                items: typing.Sequence[str] = (rule.item,)
+            elif type(rule) is cls._items_rule:
+                items = rule.items
+            else:
+                merged.append(rule)
+                continue
+            if rule.player not in items_per_player:
+                items_per_player[rule.player] = len(merged), []
+                merged.append(None)
+            items_per_player[rule.player][1].extend(items)
+        for player, (position, items) in items_per_player.items():
+            items = list(dict.fromkeys(items))
+            merged[position] = intern_rule(Has(items[0], player) if len(items) == 1 else cls._items_rule(items, player))
+        return tuple(merged)
+
+
+class And(_Combined):
+    """True if all of the rules are. Has rules of the same player get merged into a HasAll."""
+    __slots__ = ()
+    _items_rule = HasAll
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        for rule in self.rules:
+            if not rule(state):
+                return False
+        return True
+
+
+class Or(_Combined):
+    """True if any of the rules is. Has rules of the same player get merged into a HasAny."""
+    __slots__ = ()
+    _items_rule = HasAny
+
+    def __call__(self, state: "BaseClasses.CollectionState") -> bool:
+        for rule in self.rules:
+            if rule(state):
+                return True
+        return False
+
+
+_interned_rules: "weakref.WeakValueDictionary[typing.Tuple[typing.Type[Rule], typing.Tuple[typing.Any, ...]], Rule]" = \
+    weakref.WeakValueDictionary()
+
+
+def intern_rule(rule: Rule) -> Rule:
+    """Returns the instance equal to rule that is already in use, so identical rules get shared between spots."""
+    return _interned_rules.setdefault((type(rule), rule._key), rule)
+
+
 def set_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"], rule: CollectionRule):
+    if isinstance(rule, Rule):
+        rule = intern_rule(rule)
+        if isinstance(spot, Entrance) and rule.region_dependencies:
+            multiworld = spot.parent_region.multiworld
+            for region, player in rule.region_dependencies:
+                multiworld.register_indirect_condition(multiworld.get_region(region, player), spot)
     spot.access_rule = rule
 
 
@@ -104,7 +279,10 @@ def add_rule(spot: typing.Union["BaseClasses.Location", "BaseClasses.Entrance"],
     old_rule = spot.access_rule
     # empty rule, replace instead of add
     if old_rule is spot.__class__.access_rule:
-        spot.access_rule = rule if combine == "and" else old_rule
+        if combine == "and":
+            set_rule(spot, rule)
+    elif isinstance(rule, Rule) and isinstance(old_rule, Rule):
+        set_rule(spot, And(rule, old_rule) if combine == "and" else Or(rule, old_rule))
     else:
         if combine == "and":
             spot.access_rule = lambda state: rule(state) and old_rule(state)
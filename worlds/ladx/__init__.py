@@ -79,6 +79,7 @@ class LinksAwakeningWorld(World):
     options: LinksAwakeningOptions
     settings: typing.ClassVar[LinksAwakeningSettings]
     topology_present = True  # show path to required location checks in spoiler
+    process_safe_output = True  # generate_output only writes the patch
 
     # ID of first item and location, could be hard-coded but code may be easier
     # to read with this as a propery.
@@ -111,6 +111,10 @@ class SMWorld(World):
     # changes to client Remote Item handling for 0.2.6
     required_client_version = (0, 2, 6)
 
+    # modify_multidata only needs the rom_name from generate_output
+    process_safe_output = True
+    output_attributes = ("rom_name", "rom_name_available_event")
+
     itemManager: ItemManager
 
     Logic.factory('vanilla')
@@ -84,6 +84,10 @@ class SMZ3World(World):
     # optimized message queues for 0.4.4
     required_client_version = (0, 4, 4)
 
+    # modify_multidata only needs the rom_name from generate_output
+    process_safe_output = True
+    output_attributes = ("rom_name", "rom_name_available_event")
+
     def __init__(self, world: MultiWorld, player: int):
         self.rom_name_available_event = threading.Event()
         self.locations: Dict[str, Location] = {}